@@ -1,3 +1,61 @@
-from flask import Flask
+import secrets
+import time
+from flask import Flask, render_template
+from app.config import load_config
+from app.logger.app_logging import setup_logging
 
-app = Flask(__name__)
\ No newline at end of file
+logger = setup_logging()
+
+def create_app(config=None) -> Flask:
+    # Imported here so that importing a DAO or job does not pull in Flask views
+    from app.controllers.auth_controller import auth_bp
+    from app.controllers.bank_controller import bank_bp
+    from app.controllers.analytics_controller import analytics_bp
+    from app.controllers.async_controller import async_bp
+    from app.errors.error import register_error_handlers
+    from app.services.session_store import ServerSideSessionInterface, create_session_store
+    from app.services.compression import register_compression
+    from app.services.static_assets import register_static_assets
+
+    app = Flask(__name__)
+    app.config.from_object(load_config(config))
+    if not app.config.get('SECRET_KEY'):
+        if app.config.get('REQUIRE_SECRET_KEY'):
+            raise RuntimeError("SECRET_KEY must be set in production")
+        logger.warning("SECRET_KEY not set, using a per-process key")
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
+
+    app.session_interface = ServerSideSessionInterface(create_session_store(app.config['SESSION_STORE']))
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(bank_bp, url_prefix='/bank')
+    app.register_blueprint(analytics_bp, url_prefix='/analytics')
+    app.register_blueprint(async_bp, url_prefix='/async')
+    register_error_handlers(app)
+    register_static_assets(app)
+    register_compression(app)
+
+    @app.route('/')
+    def index():
+        return render_template('auth/login.html')
+
+    return app
+
+def warm_up_app(app: Flask, connections: bool = True) -> None:
+    """Loads templates, services, the plotting stack and the connection pool.
+
+    With a pre-forking server this runs once in the master with
+    connections=False, so workers inherit the loaded modules and compiled
+    templates, then open their own connections after the fork.
+    """
+    from app.services.registry import warm_up
+    from app.dal.database import connection_pool
+
+    started = time.perf_counter()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    warm_up(background=False)
+    app.extensions['static_assets'].precompress()
+    if connections:
+        connection_pool.warm_up()
+    logger.info(f"App warmed up in {(time.perf_counter() - started) * 1000:.0f}ms")
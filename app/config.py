@@ -0,0 +1,44 @@
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # Sessions are kept server side; the key only signs what else Flask signs
+    SECRET_KEY = os.getenv('SECRET_KEY')
+    REQUIRE_SECRET_KEY = False
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    TEMPLATES_AUTO_RELOAD = False
+    # 'memory' is per process; 'sqlite' is shared by every worker on the host
+    # and survives restarts
+    SESSION_STORE = os.getenv('SESSION_STORE', 'memory')
+    PERMANENT_SESSION_LIFETIME = timedelta(seconds=int(os.getenv('SESSION_LIFETIME', '28800')))
+    # Cache-Control max-age of app/static files; they also carry an ETag and
+    # Last-Modified, so an expired copy is revalidated rather than downloaded
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', '3600'))
+
+class DevelopmentConfig(Config):
+    TEMPLATES_AUTO_RELOAD = True
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', '0'))
+
+class ProductionConfig(Config):
+    REQUIRE_SECRET_KEY = True
+    SESSION_STORE = os.getenv('SESSION_STORE', 'sqlite')
+    SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', '1') == '1'
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig
+}
+
+def load_config(config=None):
+    """Returns a config class from a name, APP_ENV, or the object given"""
+    if config is None:
+        config = os.getenv('APP_ENV', 'development')
+    if isinstance(config, str):
+        if config not in CONFIGS:
+            raise ValueError(f"Unknown config: {config}")
+        return CONFIGS[config]
+    return config
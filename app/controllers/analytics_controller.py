@@ -1,21 +1,66 @@
-from flask import Blueprint, render_template, session
-from app.services.analytics_service import AnalyticsService
-from app.errors.error import handle_401
-from functools import wraps
+from flask import Blueprint, render_template, request, flash, jsonify, redirect, url_for
+from app.services.registry import LazyService
+from app.services.http_cache import conditional_response, make_etag
+from app.controllers.auth_controller import auth_required
+from app.services.analytics_windows import parse_window
+from app.services.render_profiles import RenderProfile, parse_render_profile
+from app.logger.app_logging import setup_logging
 
+logger = setup_logging()
 analytics_bp = Blueprint('analytics', __name__)
-analytics_service = AnalyticsService()
+analytics_service = LazyService('analytics')
+snapshot_service = LazyService('dashboard_snapshots')
 
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('admin_id'):
-            return handle_401("Authentication required")
-        return f(*args, **kwargs)
-    return decorated_function
+def _dashboard_options():
+    # An invalid parameter falls back to its default, with a warning
+    try:
+        window = parse_window(request.args)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        window = parse_window({})
+    try:
+        profile = parse_render_profile(request.args)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        profile = RenderProfile()
+    return window, profile
 
 @analytics_bp.route('/dashboard')
-@login_required
+@auth_required
 def dashboard():
-    dashboard_data = analytics_service.generate_dashboard_data()
-    return render_template('analytics/dashboard.html', data=dashboard_data)
\ No newline at end of file
+    window, profile = _dashboard_options()
+    # Snapshot or data version, checked before anything is queried or rendered
+    version = snapshot_service.version(window, profile)
+    etag, last_modified = (make_etag('dashboard', version[0], window, profile), version[1]) if version else (None, None)
+    return conditional_response(
+        etag,
+        lambda: render_template('analytics/dashboard.html', data=snapshot_service.get_dashboard(window, profile)),
+        last_modified
+    )
+
+@analytics_bp.route('/snapshots/refresh', methods=['POST'])
+@auth_required
+def refresh_snapshots():
+    try:
+        snapshots = snapshot_service.refresh()
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard snapshots: {str(e)}")
+        snapshots = []
+    if request.accept_mimetypes.accept_json and not request.accept_mimetypes.accept_html:
+        return jsonify({'status': 'success' if snapshots else 'error', 'snapshots': [
+            dict(snapshot, as_of=snapshot['as_of'].isoformat()) for snapshot in snapshots
+        ]}), 200 if snapshots else 500
+    if snapshots:
+        flash("Dashboard refreshed", 'success')
+    else:
+        flash("Dashboard refresh failed, showing the previous snapshot", 'error')
+    return redirect(url_for('analytics.dashboard'))
+
+@analytics_bp.route('/api/trends')
+@auth_required
+def trends():
+    try:
+        window = parse_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    return jsonify(analytics_service.get_window_trends(window))
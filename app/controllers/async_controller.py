@@ -0,0 +1,179 @@
+from flask import Blueprint, render_template, redirect, url_for, request, flash
+from app.services.registry import LazyService
+from app.services.http_cache import conditional_response_async, make_etag
+from app.controllers.auth_controller import auth_required
+from app.services.analytics_windows import parse_window
+from app.services.render_profiles import RenderProfile, parse_render_profile
+from app.logger.app_logging import setup_logging
+from decimal import Decimal
+import uuid
+import asyncio
+from app.errors.error import NotFound, handle_404, handle_500
+from app.services.posting_queue import PostingPending
+
+# Async variants of the I/O-bound bank routes, mounted under /async. Same
+# templates and behaviour as bank_controller; requires Flask's async extra.
+logger = setup_logging()
+async_bp = Blueprint('async_bank', __name__)
+async_bank_service = LazyService('async_bank')
+snapshot_service = LazyService('dashboard_snapshots')
+
+def _idempotency_key():
+    return request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+
+async def _account_etag(account_number, *parts):
+    version = await async_bank_service.get_account_version(account_number)
+    return make_etag('account', account_number, version, *parts) if version is not None else None
+
+@async_bp.route('/view/<int:account_number>')
+@auth_required
+async def view(account_number):
+    try:
+        async def render():
+            account = await async_bank_service.get_account(account_number)
+            return render_template('bank/view.html', account=account)
+        return await conditional_response_async(await _account_etag(account_number, 'view'), render)
+    except NotFound:
+        return handle_404(f"Account {account_number} not found")
+    except Exception as e:
+        logger.error(f"Error viewing account {account_number}: {str(e)}")
+        return handle_500(e)
+
+@async_bp.route('/search', methods=['GET', 'POST'])
+@auth_required
+async def search():
+    action = request.args.get('action')
+
+    if request.method == 'POST':
+        try:
+            search_term = request.form.get('search_term', '').strip()
+            if not search_term:
+                flash("Please enter a search term", 'warning')
+                return render_template('bank/search.html', action=action)
+
+            accounts = await async_bank_service.search_accounts(search_term)
+
+            if not accounts:
+                flash(f"No accounts found for: {search_term}", 'info')
+                return render_template('bank/search.html', action=action)
+
+            if len(accounts) == 1:
+                account_number = accounts[0].account_number
+                if action in ('deposit', 'withdraw', 'transfer', 'statement'):
+                    return redirect(url_for(f'async_bank.{action}', account_number=account_number))
+                return redirect(url_for('async_bank.view', account_number=account_number))
+
+            return render_template('bank/search.html', accounts=accounts, search_term=search_term, action=action)
+
+        except ValueError as e:
+            flash(str(e), 'warning')
+        except Exception as e:
+            logger.error(f"Error during search: {str(e)}")
+            flash("An error occurred during search", 'error')
+
+    return render_template('bank/search.html', action=action)
+
+async def _posting_view(account_number, template, post, success_message):
+    account = None
+    try:
+        account = await async_bank_service.get_account(account_number)
+
+        if request.method == 'POST':
+            await post()
+            flash(success_message, 'success')
+            return redirect(url_for('async_bank.view', account_number=account_number))
+
+        return render_template(template, account=account, idempotency_key=uuid.uuid4().hex)
+
+    except ValueError as e:
+        flash(str(e), 'error')
+        return render_template(template, account=account, idempotency_key=uuid.uuid4().hex)
+    except PostingPending as e:
+        # Not an error: the account shows whether it went through
+        flash(str(e), 'warning')
+        return redirect(url_for('async_bank.view', account_number=account_number))
+    except NotFound:
+        return handle_404(f"Account {account_number} not found")
+    except Exception as e:
+        logger.error(f"Error processing posting on account {account_number}: {str(e)}")
+        return handle_500(e)
+
+@async_bp.route('/account/<int:account_number>/deposit', methods=['GET', 'POST'])
+@auth_required
+async def deposit(account_number):
+    async def post():
+        amount = Decimal(request.form.get('amount', '0'))
+        await async_bank_service.process_deposit(
+            account_number, amount, request.form.get('description'), _idempotency_key()
+        )
+    return await _posting_view(account_number, 'bank/deposit.html', post, 'Deposit processed successfully')
+
+@async_bp.route('/account/<int:account_number>/withdraw', methods=['GET', 'POST'])
+@auth_required
+async def withdraw(account_number):
+    async def post():
+        amount = Decimal(request.form.get('amount', '0'))
+        await async_bank_service.process_withdrawal(
+            account_number, amount, request.form.get('description'), _idempotency_key()
+        )
+    return await _posting_view(account_number, 'bank/withdraw.html', post, 'Withdrawal processed successfully')
+
+@async_bp.route('/account/<int:account_number>/transfer', methods=['GET', 'POST'])
+@auth_required
+async def transfer(account_number):
+    async def post():
+        to_account_number = int(request.form.get('to_account'))
+        amount = Decimal(request.form.get('amount', '0'))
+        await async_bank_service.process_transfer(
+            account_number, to_account_number, amount, request.form.get('description'), _idempotency_key()
+        )
+    return await _posting_view(account_number, 'bank/transfer.html', post, 'Transfer processed successfully')
+
+@async_bp.route('/account/<int:account_number>/statement', methods=['GET', 'POST'])
+@auth_required
+async def statement(account_number):
+    try:
+        start_date = request.form.get('start_date') if request.method == 'POST' else request.args.get('start_date')
+        end_date = request.form.get('end_date') if request.method == 'POST' else request.args.get('end_date')
+
+        async def render():
+            statement = await async_bank_service.get_bank_statement(account_number, start_date, end_date)
+            return render_template('bank/statement.html', statement=statement)
+        return await conditional_response_async(
+            await _account_etag(account_number, 'statement', start_date, end_date), render)
+
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('async_bank.view', account_number=account_number))
+    except NotFound:
+        return handle_404(f"Account {account_number} not found")
+    except Exception as e:
+        logger.error(f"Error generating statement: {str(e)}")
+        return handle_500(e)
+
+def _dashboard_options():
+    # An invalid parameter falls back to its default, with a warning
+    try:
+        window = parse_window(request.args)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        window = parse_window({})
+    try:
+        profile = parse_render_profile(request.args)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        profile = RenderProfile()
+    return window, profile
+
+@async_bp.route('/dashboard')
+@auth_required
+async def dashboard():
+    window, profile = _dashboard_options()
+    # version() reads the database through the sync pool: keep it off the event loop
+    version = await asyncio.to_thread(snapshot_service.version, window, profile)
+    etag, last_modified = (make_etag('dashboard', version[0], window, profile), version[1]) if version else (None, None)
+
+    async def render():
+        dashboard_data = await snapshot_service.get_dashboard_async(window, profile)
+        return render_template('analytics/dashboard.html', data=dashboard_data)
+    return await conditional_response_async(etag, render, last_modified)
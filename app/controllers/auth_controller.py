@@ -1,19 +1,41 @@
+import inspect
 import logging
-from flask import Blueprint, request, render_template, session, redirect, url_for
-from app.services.auth_service import authenticate_admin
-from app.errors.error import handle_401, handle_403
+from flask import Blueprint, request, render_template, session, redirect, url_for, jsonify, current_app
+from app.services.auth_service import authenticate_admin, LoginThrottled
+from app.errors.error import handle_401, handle_403, handle_429
 from app.logger.app_logging import setup_logging
 from functools import wraps
 
 logger = setup_logging()
 auth_bp = Blueprint('auth', __name__)
 
-def auth_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
+def auth_required(f=None, roles=None):
+    """Requires a logged-in admin, and one of `roles` when given.
+
+    The admin id and role are cached in the server-side session at login,
+    so the check costs no query. Works on sync and async views.
+    """
+    if f is None:
+        return lambda view: auth_required(view, roles)
+
+    def check():
         if not session.get('admin_id'):
+            logger.warning(f"Unauthorized access attempt to {request.path}")
             return handle_401("Authentication required")
-        return f(*args, **kwargs)
+        if roles and session.get('role') not in roles:
+            logger.warning(f"Admin {session.get('username')} with role {session.get('role')} denied access to {request.path}")
+            return handle_403("Insufficient role")
+        return None
+
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def async_decorated_function(*args, **kwargs):
+            return check() or await f(*args, **kwargs)
+        return async_decorated_function
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        return check() or f(*args, **kwargs)
     return decorated_function
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
@@ -26,9 +48,18 @@ def login():
             logger.warning("Login attempt with missing credentials")
             return handle_401("Username and password are required")
             
-        admin = authenticate_admin(username, password)
+        try:
+            admin = authenticate_admin(username, password, request.remote_addr)
+        except LoginThrottled as e:
+            logger.warning(f"Throttled login attempt for username: {username} from {request.remote_addr}")
+            return handle_429(e.retry_after)
         if admin:
+            # New session id on login, with what authorization checks need
+            session.clear()
+            session.regenerate()
             session['admin_id'] = admin.id
+            session['username'] = admin.username
+            session['role'] = admin.role
             logger.info(f"Admin {username} logged in successfully")
             return redirect(url_for('bank.menu'))
         else:
@@ -39,7 +70,19 @@ def login():
 
 @auth_bp.route('/logout')
 def logout():
-    admin_id = session.pop('admin_id', None)
+    admin_id = session.get('admin_id')
+    # An empty session is removed from the store
+    session.clear()
     if admin_id:
         logger.info(f"Admin ID {admin_id} logged out")
-    return redirect(url_for('index'))
\ No newline at end of file
+    return redirect(url_for('index'))
+
+@auth_bp.route('/sessions/revoke/<int:admin_id>', methods=['POST'])
+@auth_required
+def revoke_sessions(admin_id):
+    # Admins may end their own sessions, super admins anyone's
+    if admin_id != session.get('admin_id') and session.get('role') != 'SUPERADMIN':
+        return handle_403("Insufficient role")
+    revoked = current_app.session_interface.store.revoke_admin(admin_id)
+    logger.info(f"Admin {session.get('username')} revoked {revoked} sessions of admin ID {admin_id}")
+    return jsonify({'status': 'success', 'revoked': revoked})
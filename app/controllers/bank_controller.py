@@ -1,23 +1,28 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request, flash, abort
-from app.services.bank_service import BankService
+from flask import Blueprint, render_template, redirect, url_for, request, flash, abort, Response, stream_with_context, jsonify
+from app.services.registry import LazyService
+from app.services.http_cache import conditional_response, make_etag
+from app.controllers.auth_controller import auth_required
 from app.logger.app_logging import setup_logging
-from functools import wraps
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
-from app.errors.error import NotFound, handle_401, handle_404, handle_500
+import csv
+import io
+import uuid
+from app.errors.error import NotFound, handle_404, handle_500
+from app.services.posting_queue import PostingPending
 
 logger = setup_logging()
 bank_bp = Blueprint('bank', __name__)
-bank_service = BankService()
+bank_service = LazyService('bank')
 
-def auth_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('admin_id'):
-            logger.warning("Unauthorized access attempt")
-            return handle_401("Authentication required")
-        return f(*args, **kwargs)
-    return decorated_function
+def _idempotency_key():
+    return request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+
+def _account_etag(account_number, *parts):
+    # One indexed lookup of the account's change counter; None for an
+    # unknown account, which then gets its usual 404
+    version = bank_service.get_account_version(account_number)
+    return make_etag('account', account_number, version, *parts) if version is not None else None
 
 @bank_bp.route('/menu')
 @auth_required
@@ -38,8 +43,10 @@ def list():
 @auth_required
 def view(account_number):
     try:
-        account = bank_service.get_account(account_number)
-        return render_template('bank/view.html', account=account)
+        return conditional_response(
+            _account_etag(account_number, 'view'),
+            lambda: render_template('bank/view.html', account=bank_service.get_account(account_number))
+        )
     except NotFound:
         return handle_404(f"Account {account_number} not found")
     except Exception as e:
@@ -186,15 +193,19 @@ def deposit(account_number):
             amount = Decimal(request.form.get('amount', '0'))
             description = request.form.get('description')
             
-            bank_service.process_deposit(account_number, amount, description)
+            bank_service.process_deposit(account_number, amount, description, _idempotency_key())
             flash('Deposit processed successfully', 'success')
             return redirect(url_for('bank.view', account_number=account_number))
             
-        return render_template('bank/deposit.html', account=account)
+        return render_template('bank/deposit.html', account=account, idempotency_key=uuid.uuid4().hex)
         
     except ValueError as e:
         flash(str(e), 'error')
-        return render_template('bank/deposit.html', account=account)
+        return render_template('bank/deposit.html', account=account, idempotency_key=uuid.uuid4().hex)
+    except PostingPending as e:
+        # Not an error: the account shows whether it went through
+        flash(str(e), 'warning')
+        return redirect(url_for('bank.view', account_number=account_number))
     except NotFound:
         return handle_404(f"Account {account_number} not found")
     except Exception as e:
@@ -211,15 +222,19 @@ def withdraw(account_number):
             amount = Decimal(request.form.get('amount', '0'))
             description = request.form.get('description')
             
-            bank_service.process_withdrawal(account_number, amount, description)
+            bank_service.process_withdrawal(account_number, amount, description, _idempotency_key())
             flash('Withdrawal processed successfully', 'success')
             return redirect(url_for('bank.view', account_number=account_number))
             
-        return render_template('bank/withdraw.html', account=account)
+        return render_template('bank/withdraw.html', account=account, idempotency_key=uuid.uuid4().hex)
         
     except ValueError as e:
         flash(str(e), 'error')
-        return render_template('bank/withdraw.html', account=account)
+        return render_template('bank/withdraw.html', account=account, idempotency_key=uuid.uuid4().hex)
+    except PostingPending as e:
+        # Not an error: the account shows whether it went through
+        flash(str(e), 'warning')
+        return redirect(url_for('bank.view', account_number=account_number))
     except NotFound:
         return handle_404(f"Account {account_number} not found")
     except Exception as e:
@@ -237,15 +252,19 @@ def transfer(account_number):
             amount = Decimal(request.form.get('amount', '0'))
             description = request.form.get('description')
             
-            bank_service.process_transfer(account_number, to_account_number, amount, description)
+            bank_service.process_transfer(account_number, to_account_number, amount, description, _idempotency_key())
             flash('Transfer processed successfully', 'success')
             return redirect(url_for('bank.view', account_number=account_number))
             
-        return render_template('bank/transfer.html', account=from_account)
+        return render_template('bank/transfer.html', account=from_account, idempotency_key=uuid.uuid4().hex)
         
     except ValueError as e:
         flash(str(e), 'error')
-        return render_template('bank/transfer.html', account=from_account)
+        return render_template('bank/transfer.html', account=from_account, idempotency_key=uuid.uuid4().hex)
+    except PostingPending as e:
+        # Not an error: the account shows whether it went through
+        flash(str(e), 'warning')
+        return redirect(url_for('bank.view', account_number=account_number))
     except NotFound:
         return handle_404(f"Account {account_number} not found")
     except Exception as e:
@@ -259,9 +278,12 @@ def statement(account_number):
         start_date = request.form.get('start_date') if request.method == 'POST' else request.args.get('start_date')
         end_date = request.form.get('end_date') if request.method == 'POST' else request.args.get('end_date')
 
-        statement = bank_service.get_bank_statement(account_number, start_date, end_date)
-        return render_template('bank/statement.html', statement=statement)
-        
+        return conditional_response(
+            _account_etag(account_number, 'statement', start_date, end_date),
+            lambda: render_template('bank/statement.html',
+                                    statement=bank_service.get_bank_statement(account_number, start_date, end_date))
+        )
+
     except ValueError as e:
         flash(str(e), 'error')
         return redirect(url_for('bank.view', account_number=account_number))
@@ -271,6 +293,64 @@ def statement(account_number):
         logger.error(f"Error generating statement: {str(e)}")
         return handle_500(e)
 
+@bank_bp.route('/account/<int:account_number>/statement/export')
+@auth_required
+def statement_export(account_number):
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+
+        chunks, mimetype, filename = bank_service.export_bank_statement(
+            account_number, export_format, start_date, end_date
+        )
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('bank.statement', account_number=account_number))
+    except NotFound:
+        return handle_404(f"Account {account_number} not found")
+    except Exception as e:
+        logger.error(f"Error exporting statement: {str(e)}")
+        return handle_500(e)
+
+def _read_bulk_operations():
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        return payload.get('operations') if isinstance(payload, dict) else payload
+
+    if 'file' in request.files:
+        content = request.files['file'].read().decode('utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        content = request.get_data(as_text=True)
+    else:
+        raise ValueError("Send operations as JSON or as a CSV file")
+    return [row for row in csv.DictReader(io.StringIO(content))]
+
+@bank_bp.route('/bulk', methods=['POST'])
+@auth_required
+def bulk_postings():
+    try:
+        operations = _read_bulk_operations()
+        result = bank_service.process_bulk_postings(operations)
+        return jsonify(result)
+    except ValueError as e:
+        logger.warning(f"Rejected bulk posting: {str(e)}")
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    except Exception as e:
+        logger.error(f"Error processing bulk posting: {str(e)}")
+        return handle_500(e)
+
+@bank_bp.route('/posting-queue')
+@auth_required
+def posting_stats():
+    return jsonify(bank_service.get_posting_stats())
+
 @bank_bp.route('/errors/<error_code>')
 @auth_required
 def test_error(error_code):
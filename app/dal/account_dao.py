@@ -1,71 +1,58 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from decimal import Decimal
 from datetime import datetime
 from app.models.account import Account
-from app.dal.database import get_cursor
+from app.dal.archive_dao import LEDGER_SOURCE, get_archive_horizon
+from app.dal.database import get_cursor, stream_pool
+from app.dal.data_version import bump_data_version
 from app.logger.sql_logging import setup_sql_logging
 
+# Columns in Account field order, so rows map with Account._make and no
+# per-field conversion: NUMERIC already arrives as Decimal.
+ACCOUNT_SELECT = """
+    SELECT a.number, a.user_id, a.type,
+           a.balance, a.status, COALESCE(a.interest_rate, 0.00), a.created_at,
+           u.first_name || ' ' || u.last_name, u.email
+    FROM accounts a
+    JOIN users u ON a.user_id = u.id
+"""
+
 class AccountDAO:
     def __init__(self):
         self.sql_logger = setup_sql_logging()
 
     def get_all_accounts(self) -> List[Account]:
-        with get_cursor() as cursor:
-            query = """
-                SELECT a.number, a.user_id, a.type, 
-                       a.balance, a.status, a.interest_rate, a.created_at,
-                       u.first_name, u.last_name, u.email
-                FROM accounts a
-                JOIN users u ON a.user_id = u.id
+        with get_cursor(row_factory=Account._make) as cursor:
+            query = ACCOUNT_SELECT + """
                 ORDER BY a.number
             """
             self.sql_logger.info(f"Executing query: {query}")
             cursor.execute(query)
-            
-            accounts = []
-            for row in cursor.fetchall():
-                account = Account(
-                    account_number=row[0],
-                    user_id=row[1],
-                    account_type=row[2],
-                    balance=Decimal(str(row[3])),
-                    is_active=row[4],
-                    interest_rate=Decimal(str(row[5])) if row[5] else Decimal('0.00'),
-                    created_at=row[6]
-                )
-                account.holder_name = f"{row[7]} {row[8]}"
-                account.holder_email = row[9]
-                accounts.append(account)
-            return accounts
+            return cursor.fetchall()
 
-    def get_account_by_number(self, account_number: int) -> Optional[Account]:
+    def count_accounts(self, after_account: int = 0) -> int:
         with get_cursor() as cursor:
-            query = """
-                SELECT a.number, a.user_id, a.type, 
-                       a.balance, a.status, a.interest_rate, a.created_at,
-                       u.first_name, u.last_name, u.email
-                FROM accounts a
-                JOIN users u ON a.user_id = u.id
+            cursor.execute("SELECT COUNT(*) FROM accounts WHERE number > %s", (after_account,))
+            return cursor.fetchone()[0]
+
+    def iter_accounts(self, after_account: int = 0) -> Iterator[Account]:
+        with get_cursor(name='accounts_stream', row_factory=Account._make) as cursor:
+            query = ACCOUNT_SELECT + """
+                WHERE a.number > %s
+                ORDER BY a.number
+            """
+            self.sql_logger.info(f"Streaming accounts after: {after_account}")
+            cursor.execute(query, (after_account,))
+            yield from cursor
+
+    def get_account_by_number(self, account_number: int) -> Optional[Account]:
+        with get_cursor(row_factory=Account._make) as cursor:
+            query = ACCOUNT_SELECT + """
                 WHERE a.number = %s
             """
             self.sql_logger.info(f"Executing query: {query} with account_number: {account_number}")
             cursor.execute(query, (account_number,))
-            row = cursor.fetchone()
-            
-            if row:
-                account = Account(
-                    account_number=row[0],
-                    user_id=row[1],
-                    account_type=row[2],
-                    balance=Decimal(str(row[3])),
-                    is_active=row[4],
-                    interest_rate=Decimal(str(row[5])) if row[5] else Decimal('0.00'),
-                    created_at=row[6]
-                )
-                account.holder_name = f"{row[7]} {row[8]}"
-                account.holder_email = row[9]
-                return account
-            return None
+            return cursor.fetchone()
     
     def create_account(self, data: Dict[str, Any]) -> Optional[Account]:
         with get_cursor() as cursor:
@@ -96,29 +83,15 @@ class AccountDAO:
                     raise ValueError("Failed to get new account number")
                 new_account_number = result[0]
                 self.sql_logger.info(f"Created account with number: {new_account_number}")
-                fetch_query = """
-                    SELECT a.number, a.user_id, a.type, 
-                           a.balance, a.status, a.interest_rate, a.created_at,
-                           u.first_name, u.last_name, u.email
-                    FROM accounts a
-                    JOIN users u ON a.user_id = u.id
+                fetch_query = ACCOUNT_SELECT + """
                     WHERE a.number = %s
                 """
                 cursor.execute(fetch_query, (new_account_number,))
                 row = cursor.fetchone()
                 if not row:
                     raise ValueError(f"Could not fetch created account {new_account_number}")
-                account = Account(
-                    account_number=row[0],
-                    user_id=row[1],
-                    account_type=row[2],
-                    balance=Decimal(str(row[3])),
-                    is_active=row[4],
-                    interest_rate=Decimal(str(row[5])) if row[5] else Decimal('0.00'),
-                    created_at=row[6]
-                )
-                account.holder_name = f"{row[7]} {row[8]}"
-                account.holder_email = row[9]
+                account = Account._make(row)
+                bump_data_version(cursor, new_account_number)
                 cursor.execute("COMMIT")
                 self.sql_logger.info(f"Successfully created and fetched account {new_account_number}")
                 return account
@@ -134,7 +107,8 @@ class AccountDAO:
                 SET type = %s,
                     balance = %s,
                     status = %s,
-                    interest_rate = %s
+                    interest_rate = %s,
+                    version = version + 1
                 WHERE number = %s
             """
             values = (
@@ -146,16 +120,25 @@ class AccountDAO:
             )
             self.sql_logger.info(f"Executing query: {query} with values: {values}")
             cursor.execute(query, values)
-            return self.get_account_by_number(account_number)
+            bump_data_version(cursor, account_number)
+        return self.get_account_by_number(account_number)
 
     def delete_account(self, account_number: int) -> None:
         with get_cursor() as cursor:
             query = "DELETE FROM accounts WHERE number = %s"
             self.sql_logger.info(f"Executing query: {query} with account_number: {account_number}")
             cursor.execute(query, (account_number,))
+            bump_data_version(cursor, account_number)
 
-    def search_accounts(self, search_term: str) -> List[Account]:
+    def get_account_version(self, account_number: int) -> Optional[int]:
+        # Only the counter: enough to answer a conditional request
         with get_cursor() as cursor:
+            cursor.execute("SELECT version FROM accounts WHERE number = %s", (account_number,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def search_accounts(self, search_term: str) -> List[Account]:
+        with get_cursor(row_factory=Account._make) as cursor:
             try:
                 try:
                     account_number = int(search_term)
@@ -163,22 +146,12 @@ class AccountDAO:
                 except ValueError:
                     number_search = False
                 if number_search:
-                    query = """
-                        SELECT a.number, a.user_id, a.type, 
-                               a.balance, a.status, a.interest_rate, a.created_at,
-                               u.first_name, u.last_name, u.email
-                        FROM accounts a
-                        JOIN users u ON a.user_id = u.id
+                    query = ACCOUNT_SELECT + """
                         WHERE a.number = %s
                     """
                     params = (account_number,)
                 else:
-                    query = """
-                        SELECT a.number, a.user_id, a.type, 
-                               a.balance, a.status, a.interest_rate, a.created_at,
-                               u.first_name, u.last_name, u.email
-                        FROM accounts a
-                        JOIN users u ON a.user_id = u.id
+                    query = ACCOUNT_SELECT + """
                         WHERE LOWER(u.first_name) LIKE LOWER(%s) 
                         OR LOWER(u.last_name) LIKE LOWER(%s)
                     """
@@ -186,74 +159,195 @@ class AccountDAO:
                     params = (search_pattern, search_pattern)
                 self.sql_logger.info(f"Executing search query with term: {search_term}")
                 cursor.execute(query, params)
-                accounts = []
-                for row in cursor.fetchall():
-                    account = Account(
-                        account_number=row[0],
-                        user_id=row[1],
-                        account_type=row[2],
-                        balance=Decimal(str(row[3])),
-                        is_active=row[4],
-                        interest_rate=Decimal(str(row[5])) if row[5] else Decimal('0.00'),
-                        created_at=row[6]
-                    )
-                    account.holder_name = f"{row[7]} {row[8]}"
-                    account.holder_email = row[9]
-                    accounts.append(account)
-                return accounts
+                return cursor.fetchall()
             except Exception as e:
                 self.sql_logger.error(f"Database error during search: {str(e)}")
                 raise
     
+    def _needs_archive(self, start_date: datetime = None) -> bool:
+        # Archived months are only read when the requested range reaches them
+        with get_cursor() as cursor:
+            horizon = get_archive_horizon(cursor)
+        return horizon is not None and (start_date is None or start_date < horizon)
+
+    def _transaction_source(self, include_archive: bool) -> str:
+        return LEDGER_SOURCE if include_archive else "transactions"
+
+    def _build_statement_query(self, account_number: int, start_date: datetime = None, end_date: datetime = None,
+                               include_archive: bool = False):
+        # One side per index, as in iter_statement_book: postings made by the
+        # account, then transfers it received. Both are ordered range scans
+        # on (account, date) instead of a bitmap OR over the heap; only the
+        # description is read from the heap rows.
+        source = self._transaction_source(include_archive)
+        date_filter, date_params = "", []
+        if start_date:
+            date_filter += " AND t.date >= %s"
+            date_params.append(start_date)
+        if end_date:
+            date_filter += " AND t.date <= %s"
+            date_params.append(end_date)
+        query = f"""
+            SELECT t.id, t.type, t.amount, t.recipient_account,
+                   t.description, t.date,
+                   CASE WHEN t.type = 'DEPOSIT' THEN t.amount ELSE -t.amount END AS transaction_amount
+            FROM {source} t
+            WHERE t.account_id = %s{date_filter}
+            UNION ALL
+            SELECT t.id, t.type, t.amount, t.recipient_account,
+                   t.description, t.date, t.amount
+            FROM {source} t
+            WHERE t.recipient_account = %s AND t.type = 'TRANSFER' AND t.account_id <> %s{date_filter}
+            ORDER BY date, id
+        """
+        params = [account_number, *date_params, account_number, account_number, *date_params]
+        return query, params
+
+    def _opening_balance_query(self, account_number: int, start_date: datetime = None,
+                               include_archive: bool = False):
+        # Current balance less every movement since start_date: the balance
+        # the account had when the statement period began
+        query = f"""
+            SELECT a.balance - COALESCE(SUM(
+                       CASE
+                           WHEN t.type = 'DEPOSIT' THEN t.amount
+                           WHEN t.type = 'TRANSFER' AND t.account_id = a.number THEN -t.amount
+                           WHEN t.type = 'TRANSFER' AND t.recipient_account = a.number THEN t.amount
+                           ELSE -t.amount
+                       END), 0)
+            FROM accounts a
+            LEFT JOIN {self._transaction_source(include_archive)} t
+                   ON (t.account_id = a.number OR t.recipient_account = a.number)
+        """
+        params = []
+        if start_date:
+            query += " AND t.date >= %s"
+            params.append(start_date)
+        query += " WHERE a.number = %s GROUP BY a.number, a.balance"
+        params.append(account_number)
+        return query, params
+
+    def get_opening_balance(self, account_number: int, start_date: datetime = None) -> Optional[Decimal]:
+        query, params = self._opening_balance_query(account_number, start_date, self._needs_archive(start_date))
+        with get_cursor() as cursor:
+            self.sql_logger.info(f"Executing opening balance query for account: {account_number} at {start_date}")
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def _statement_rows(self, rows: Iterable, running_balance: Decimal = Decimal('0.00')) -> Iterator[Dict]:
+        for row in rows:
+            transaction_amount = row[6]
+            running_balance += transaction_amount
+            yield {
+                'id': row[0],
+                'type': row[1],
+                'amount': abs(row[2]),
+                'recipient_account': row[3],
+                'description': row[4],
+                'date': row[5],
+                'transaction_amount': transaction_amount,
+                'running_balance': running_balance
+            }
+
+    def iter_bank_statement(self, account_number: int, start_date: datetime = None, end_date: datetime = None,
+                            opening_balance: Decimal = Decimal('0.00')) -> Iterator[Dict]:
+        query, params = self._build_statement_query(account_number, start_date, end_date,
+                                                    self._needs_archive(start_date))
+        with get_cursor(name=f"statement_{account_number}", pool=stream_pool) as cursor:
+            try:
+                self.sql_logger.info(f"Streaming bank statement query for account: {account_number}")
+                cursor.execute(query, params)
+                yield from self._statement_rows(cursor, opening_balance)
+            except Exception as e:
+                self.sql_logger.error(f"Error streaming bank statement: {e}")
+                raise
+
+    def iter_statement_book(self, start_date: datetime, end_date: datetime, after_account: int = 0) -> Iterator[tuple]:
+        # One ordered pass over the whole ledger for the period. Transfers
+        # appear once for the sender and once for the recipient so rows can
+        # be partitioned by account_number directly.
+        source = self._transaction_source(self._needs_archive(start_date))
+        query = f"""
+            SELECT l.account_number, l.id, l.type, l.amount, l.recipient_account,
+                   l.description, l.date, l.transaction_amount
+            FROM (
+                SELECT t.account_id AS account_number, t.id, t.type, t.amount,
+                       t.recipient_account, t.description, t.date,
+                       CASE WHEN t.type = 'DEPOSIT' THEN t.amount ELSE -t.amount END AS transaction_amount
+                FROM {source} t
+                WHERE t.date >= %s AND t.date < %s
+                UNION ALL
+                SELECT t.recipient_account, t.id, t.type, t.amount,
+                       t.recipient_account, t.description, t.date, t.amount
+                FROM {source} t
+                WHERE t.type = 'TRANSFER' AND t.recipient_account IS NOT NULL
+                  AND t.date >= %s AND t.date < %s
+            ) l
+            WHERE l.account_number > %s
+            ORDER BY l.account_number, l.date, l.id
+        """
+        params = (start_date, end_date, start_date, end_date, after_account)
+        with get_cursor(name='statement_book') as cursor:
+            self.sql_logger.info(f"Streaming statement book from {start_date} to {end_date} after account {after_account}")
+            cursor.execute(query, params)
+            yield from cursor
+
+    def iter_opening_balances(self, start_date: datetime, after_account: int = 0) -> Iterator[Tuple[Account, Decimal]]:
+        # Every account with its balance at start_date, in account order like
+        # iter_statement_book. Balance and movements come from one snapshot.
+        source = self._transaction_source(self._needs_archive(start_date))
+        query = f"""
+            WITH movements AS (
+                SELECT l.account_number, SUM(l.transaction_amount) AS movement
+                FROM (
+                    SELECT t.account_id AS account_number,
+                           CASE WHEN t.type = 'DEPOSIT' THEN t.amount ELSE -t.amount END AS transaction_amount
+                    FROM {source} t
+                    WHERE t.date >= %s
+                    UNION ALL
+                    SELECT t.recipient_account, t.amount
+                    FROM {source} t
+                    WHERE t.type = 'TRANSFER' AND t.recipient_account IS NOT NULL AND t.date >= %s
+                ) l
+                GROUP BY l.account_number
+            )
+            SELECT acc.*, COALESCE(m.movement, 0)
+            FROM ({ACCOUNT_SELECT} WHERE a.number > %s) acc
+            LEFT JOIN movements m ON m.account_number = acc.number
+            ORDER BY acc.number
+        """
+        with get_cursor(name='opening_balances') as cursor:
+            self.sql_logger.info(f"Streaming opening balances at {start_date} after account {after_account}")
+            cursor.execute(query, (start_date, start_date, after_account))
+            for row in cursor:
+                account = Account._make(row[:-1])
+                yield account, account.balance - row[-1]
+
     def get_bank_statement(self, account_number: int, start_date: datetime = None, end_date: datetime = None) -> Dict:
+        include_archive = self._needs_archive(start_date)
         with get_cursor() as cursor:
             try:
-                query = """
-                    SELECT t.id, t.type, t.amount, t.recipient_account, 
-                           t.description, t.date,
-                           CASE 
-                               WHEN t.type = 'DEPOSIT' THEN t.amount
-                               WHEN t.type = 'TRANSFER' AND t.account_id = %s THEN -t.amount
-                               WHEN t.type = 'TRANSFER' AND t.recipient_account = %s THEN t.amount
-                               ELSE -t.amount
-                           END as transaction_amount
-                    FROM transactions t
-                    WHERE (t.account_id = %s OR t.recipient_account = %s)
-                """
-                params = [account_number, account_number, account_number, account_number]
-                if start_date:
-                    query += " AND t.date >= %s"
-                    params.append(start_date)
-                if end_date:
-                    query += " AND t.date <= %s"
-                    params.append(end_date)
-                query += " ORDER BY t.date"
+                query, params = self._opening_balance_query(account_number, start_date, include_archive)
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+                opening_balance = row[0] if row else Decimal('0.00')
+                query, params = self._build_statement_query(account_number, start_date, end_date, include_archive)
                 self.sql_logger.info(f"Executing bank statement query for account: {account_number}")
                 cursor.execute(query, params)
-                transactions = []
-                running_balance = Decimal('0.00')
-                for row in cursor.fetchall():
-                    transaction_amount = Decimal(str(row[6]))
-                    running_balance += transaction_amount
-                    transactions.append({
-                        'id': row[0],
-                        'type': row[1],
-                        'amount': abs(Decimal(str(row[2]))),
-                        'recipient_account': row[3],
-                        'description': row[4],
-                        'date': row[5],
-                        'transaction_amount': transaction_amount,
-                        'running_balance': running_balance
-                    })
-                cursor.execute("SELECT balance FROM accounts WHERE number = %s", (account_number,))
-                current_balance = cursor.fetchone()[0]
+                transactions = list(self._statement_rows(cursor.fetchall(), opening_balance))
+                closing_balance = transactions[-1]['running_balance'] if transactions else opening_balance
+                # Same connection: taking a second one while holding this one
+                # can exhaust the pool
+                cursor.execute(ACCOUNT_SELECT + " WHERE a.number = %s", (account_number,))
+                row = cursor.fetchone()
                 statement = {
-                    'account': self.get_account_by_number(account_number),
+                    'account': Account._make(row) if row else None,
                     'transactions': transactions,
                     'start_date': start_date or transactions[0]['date'] if transactions else None,
                     'end_date': end_date or transactions[-1]['date'] if transactions else None,
-                    'opening_balance': Decimal(str(current_balance)) - running_balance,
-                    'closing_balance': Decimal(str(current_balance)),
+                    'opening_balance': opening_balance,
+                    'closing_balance': closing_balance,
                     'total_deposits': sum(t['transaction_amount'] for t in transactions if t['transaction_amount'] > 0),
                     'total_withdrawals': abs(sum(t['transaction_amount'] for t in transactions if t['transaction_amount'] < 0))
                 }
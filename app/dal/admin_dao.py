@@ -1,19 +1,101 @@
-import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from app.models.admin import Admin
 from app.dal.database import get_cursor
 from app.logger.sql_logging import setup_sql_logging
 
 sql_logger = setup_sql_logging()
 
-def get_admin_by_username(username):
-    sql_logger = logging.getLogger('sql')
-    with get_cursor() as cursor:
-        query = "SELECT * FROM admins WHERE username = %s"
+ADMIN_CACHE_SIZE = int(os.getenv('ADMIN_CACHE_SIZE', '1000'))
+# Bounds how long another worker may keep serving an admin record changed elsewhere
+ADMIN_CACHE_TTL = int(os.getenv('ADMIN_CACHE_TTL', '60'))
+
+ADMIN_SELECT = "SELECT id, username, password, email, role, is_active, last_login, created_at FROM admins"
+
+
+class AdminCache:
+    """In-process LRU of admin records by username, unknown usernames included.
+
+    Repeated logins, good or bad, are answered without a query; a change
+    made through this module invalidates the entry right away.
+    """
+
+    def __init__(self, max_entries: int = ADMIN_CACHE_SIZE, ttl_seconds: int = ADMIN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Tuple[bool, Optional[Admin]]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False, None
+            admin, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[username]
+                return False, None
+            self._entries.move_to_end(username)
+            return True, admin
+
+    def put(self, username: str, admin: Optional[Admin]) -> None:
+        with self._lock:
+            self._entries[username] = (admin, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str = None) -> None:
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+admin_cache = AdminCache()
+
+
+def get_admin_by_username(username: str) -> Optional[Admin]:
+    found, admin = admin_cache.get(username)
+    if found:
+        return admin
+    with get_cursor(row_factory=Admin._make) as cursor:
+        query = ADMIN_SELECT + " WHERE username = %s"
         sql_logger.info(f"Executing query: {query} with username: {username}")
         cursor.execute(query, (username,))
-        row = cursor.fetchone()
-        if row:
+        admin = cursor.fetchone()
+        if admin:
             sql_logger.info(f"Found admin record for username: {username}")
-            return Admin(*row)
-        sql_logger.warning(f"No admin record found for username: {username}")
-        return None
\ No newline at end of file
+        else:
+            sql_logger.warning(f"No admin record found for username: {username}")
+    admin_cache.put(username, admin)
+    return admin
+
+
+def update_admin_password(admin: Admin, password_hash: str) -> None:
+    with get_cursor() as cursor:
+        try:
+            cursor.execute("UPDATE admins SET password = %s WHERE id = %s", (password_hash, admin.id))
+            sql_logger.info(f"Updated password hash for admin {admin.username}")
+        except Exception as e:
+            sql_logger.error(f"Error updating password for admin {admin.username}: {e}")
+            raise
+    admin_cache.invalidate(admin.username)
+
+
+def record_admin_login(admin: Admin) -> Admin:
+    with get_cursor() as cursor:
+        try:
+            cursor.execute("UPDATE admins SET last_login = CURRENT_TIMESTAMP WHERE id = %s RETURNING last_login",
+                           (admin.id,))
+            admin = admin._replace(last_login=cursor.fetchone()[0])
+        except Exception as e:
+            sql_logger.error(f"Error recording login of admin {admin.username}: {e}")
+            raise
+    # Only last_login changed, so the cached record is refreshed in place
+    admin_cache.put(admin.username, admin)
+    return admin
@@ -0,0 +1,151 @@
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+from psycopg2.extras import execute_values
+from app.dal.data_version import bump_data_version
+from app.dal.database import get_cursor
+from app.dal.ledger_horizon import settled_transaction_id
+from app.logger.sql_logging import setup_sql_logging
+from app.models.risk_state import AccountRiskState
+
+SCORING_WATERMARK = 'anomaly_scoring'
+
+
+class AnomalyDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def get_watermark(self) -> int:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT last_id FROM job_watermarks WHERE name = %s", (SCORING_WATERMARK,))
+            row = cursor.fetchone()
+            return (row[0] or 0) if row else 0
+
+    def get_new_transactions(self, after_id: int, limit: int, settle_timeout: float = 1.0) -> List[tuple]:
+        # Ids are taken before commit, so a lower id can become visible after a
+        # higher one. The batch stops at the commit-order horizon, below
+        # which no id can still appear, whatever the transaction dates.
+        horizon = settled_transaction_id(settle_timeout)
+        if horizon is None or horizon <= after_id:
+            return []
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, account_id, type, amount, recipient_account, date
+                FROM transactions
+                WHERE id > %s AND id <= %s
+                ORDER BY id
+                LIMIT %s""",
+                (after_id, horizon, limit)
+            )
+            return cursor.fetchall()
+
+    def get_states(self, account_ids: Iterable[int]) -> Dict[int, AccountRiskState]:
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT account_id, ewma_amount, ewma_variance, outgoing_count,
+                       burst_start, burst_count, round_streak, last_transaction_id
+                FROM account_risk_state
+                WHERE account_id = ANY(%s)""",
+                (list(account_ids),)
+            )
+            return {row[0]: AccountRiskState(*row) for row in cursor.fetchall()}
+
+    def get_balances(self, account_ids: Iterable[int], as_of_id: int) -> Dict[int, Decimal]:
+        # Balances just after transaction as_of_id: every later movement is
+        # taken back out, from the same snapshot as the balances
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT a.number, a.balance - COALESCE(SUM(
+                           CASE
+                               WHEN t.type = 'DEPOSIT' THEN t.amount
+                               WHEN t.type = 'TRANSFER' AND t.account_id = a.number THEN -t.amount
+                               WHEN t.type = 'TRANSFER' AND t.recipient_account = a.number THEN t.amount
+                               ELSE -t.amount
+                           END), 0)
+                FROM accounts a
+                LEFT JOIN transactions t
+                       ON t.id > %s AND (t.account_id = a.number OR t.recipient_account = a.number)
+                WHERE a.number = ANY(%s)
+                GROUP BY a.number, a.balance""",
+                (as_of_id, list(account_ids))
+            )
+            return {row[0]: row[1] for row in cursor.fetchall()}
+
+    def save_batch(self, states: Iterable[AccountRiskState], alerts: List[Dict[str, Any]], last_id: int) -> None:
+        # States, alerts and the watermark move together, so a crashed run
+        # resumes exactly after the last saved batch.
+        with get_cursor() as cursor:
+            try:
+                execute_values(cursor, """
+                    INSERT INTO account_risk_state
+                        (account_id, ewma_amount, ewma_variance, outgoing_count, burst_start,
+                         burst_count, round_streak, last_transaction_id)
+                    VALUES %s
+                    ON CONFLICT (account_id) DO UPDATE
+                    SET ewma_amount = EXCLUDED.ewma_amount,
+                        ewma_variance = EXCLUDED.ewma_variance,
+                        outgoing_count = EXCLUDED.outgoing_count,
+                        burst_start = EXCLUDED.burst_start,
+                        burst_count = EXCLUDED.burst_count,
+                        round_streak = EXCLUDED.round_streak,
+                        last_transaction_id = EXCLUDED.last_transaction_id,
+                        updated_at = CURRENT_TIMESTAMP""",
+                    [
+                        (s.account_id, s.ewma_amount, s.ewma_variance, s.outgoing_count, s.burst_start,
+                         s.burst_count, s.round_streak, s.last_transaction_id)
+                        for s in states
+                    ],
+                    page_size=1000
+                )
+                if alerts:
+                    execute_values(cursor, """
+                        INSERT INTO transaction_alerts
+                            (transaction_id, account_id, rule, score, amount, transaction_date)
+                        VALUES %s
+                        ON CONFLICT (transaction_id, rule) DO NOTHING""",
+                        [
+                            (a['transaction_id'], a['account_id'], a['rule'], a['score'], a['amount'], a['date'])
+                            for a in alerts
+                        ],
+                        page_size=1000
+                    )
+                cursor.execute("""
+                    INSERT INTO job_watermarks (name, last_id)
+                    VALUES (%s, %s)
+                    ON CONFLICT (name) DO UPDATE
+                    SET last_id = EXCLUDED.last_id, updated_at = CURRENT_TIMESTAMP""",
+                    (SCORING_WATERMARK, last_id)
+                )
+                if alerts:
+                    # The dashboard lists open alerts
+                    bump_data_version(cursor)
+            except Exception as e:
+                self.sql_logger.error(f"Error saving anomaly scoring batch up to transaction {last_id}: {e}")
+                raise
+
+    def get_recent_alerts(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, transaction_id, account_id, rule, score, amount, transaction_date, created_at
+                FROM transaction_alerts
+                WHERE status = 'open'
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s""",
+                (limit,)
+            )
+            return [
+                {
+                    'id': row[0],
+                    'transaction_id': row[1],
+                    'account_id': row[2],
+                    'rule': row[3],
+                    'score': float(row[4]),
+                    'amount': float(row[5]),
+                    'transaction_date': row[6],
+                    'created_at': row[7]
+                } for row in cursor.fetchall()
+            ]
+
+    def count_open_alerts(self) -> int:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM transaction_alerts WHERE status = 'open'")
+            return cursor.fetchone()[0]
@@ -0,0 +1,92 @@
+from datetime import date, datetime
+from typing import Optional
+from psycopg2 import sql
+from app.dal.database import get_cursor
+from app.dal.partition_dao import add_months, partition_name
+from app.logger.sql_logging import setup_sql_logging
+
+ARCHIVE_TABLE = 'transactions_archive'
+ARCHIVE_WATERMARK = 'transactions_archive'
+TRANSACTION_COLUMNS = 'id, account_id, type, amount, recipient_account, description, date'
+# Hot and archived transactions together, for queries over the full ledger
+LEDGER_SOURCE = f"""(
+                SELECT {TRANSACTION_COLUMNS} FROM transactions
+                UNION ALL
+                SELECT {TRANSACTION_COLUMNS} FROM {ARCHIVE_TABLE}
+            )"""
+
+
+def get_archive_horizon(cursor) -> Optional[datetime]:
+    # Everything strictly before the horizon lives in transactions_archive
+    cursor.execute("SELECT value FROM job_watermarks WHERE name = %s", (ARCHIVE_WATERMARK,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class ArchiveDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def get_horizon(self) -> Optional[datetime]:
+        with get_cursor() as cursor:
+            return get_archive_horizon(cursor)
+
+    def get_oldest_hot_date(self) -> Optional[datetime]:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT MIN(date) FROM transactions")
+            return cursor.fetchone()[0]
+
+    def archive_month(self, month: date) -> int:
+        """Moves one month of transactions to the archive and advances the horizon.
+
+        A monthly partition is detached from transactions and attached to
+        transactions_archive, so no rows are copied. Rows of that month that
+        are not in their own partition (default partition or an unpartitioned
+        table) are moved with DELETE ... RETURNING.
+        """
+        name = partition_name(month)
+        next_month = add_months(month, 1)
+        with get_cursor() as cursor:
+            try:
+                cursor.execute("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM pg_inherits
+                        WHERE inhrelid = to_regclass(%s) AND inhparent = 'transactions'::regclass
+                    )""",
+                    (name,)
+                )
+                moved = 0
+                if cursor.fetchone()[0]:
+                    cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(name)))
+                    moved = cursor.fetchone()[0]
+                    cursor.execute(sql.SQL("ALTER TABLE transactions DETACH PARTITION {}").format(sql.Identifier(name)))
+                    cursor.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM ({}) TO ({})").format(
+                        sql.Identifier(ARCHIVE_TABLE), sql.Identifier(name),
+                        sql.Literal(month.isoformat()), sql.Literal(next_month.isoformat())
+                    ))
+
+                cursor.execute(f"""
+                    WITH moved AS (
+                        DELETE FROM transactions
+                        WHERE date < %s
+                        RETURNING {TRANSACTION_COLUMNS}
+                    )
+                    INSERT INTO {ARCHIVE_TABLE} ({TRANSACTION_COLUMNS})
+                    SELECT {TRANSACTION_COLUMNS} FROM moved""",
+                    (next_month,)
+                )
+                moved += cursor.rowcount
+
+                cursor.execute("""
+                    INSERT INTO job_watermarks (name, value)
+                    VALUES (%s, %s)
+                    ON CONFLICT (name) DO UPDATE
+                    SET value = GREATEST(job_watermarks.value, EXCLUDED.value),
+                        updated_at = CURRENT_TIMESTAMP""",
+                    (ARCHIVE_WATERMARK, next_month)
+                )
+                self.sql_logger.info(f"Archived {moved} transactions of {month:%Y-%m}")
+                return moved
+            except Exception as e:
+                self.sql_logger.error(f"Error archiving transactions of {month:%Y-%m}: {e}")
+                raise
@@ -0,0 +1,85 @@
+from typing import List, Optional, Dict
+from decimal import Decimal
+from datetime import datetime
+from app.models.account import Account
+from app.dal.account_dao import AccountDAO, ACCOUNT_SELECT
+from app.dal.archive_dao import ARCHIVE_WATERMARK
+from app.dal.async_database import get_async_cursor
+from app.logger.sql_logging import setup_sql_logging
+
+class AsyncAccountDAO:
+    """Async counterparts of the AccountDAO read paths, same queries and results."""
+
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+        # Query building and row shaping are shared with the sync DAO
+        self.account_dao = AccountDAO()
+
+    async def get_account_by_number(self, account_number: int) -> Optional[Account]:
+        async with get_async_cursor(row_factory=Account._make) as cursor:
+            query = ACCOUNT_SELECT + " WHERE a.number = %s"
+            self.sql_logger.info(f"Executing async query with account_number: {account_number}")
+            await cursor.execute(query, (account_number,))
+            return await cursor.fetchone()
+
+    async def get_account_version(self, account_number: int) -> Optional[int]:
+        async with get_async_cursor() as cursor:
+            await cursor.execute("SELECT version FROM accounts WHERE number = %s", (account_number,))
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+    async def search_accounts(self, search_term: str) -> List[Account]:
+        async with get_async_cursor(row_factory=Account._make) as cursor:
+            try:
+                try:
+                    query = ACCOUNT_SELECT + " WHERE a.number = %s"
+                    params = (int(search_term),)
+                except ValueError:
+                    query = ACCOUNT_SELECT + """
+                        WHERE LOWER(u.first_name) LIKE LOWER(%s)
+                        OR LOWER(u.last_name) LIKE LOWER(%s)
+                    """
+                    search_pattern = f"%{search_term}%"
+                    params = (search_pattern, search_pattern)
+                self.sql_logger.info(f"Executing async search query with term: {search_term}")
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+            except Exception as e:
+                self.sql_logger.error(f"Database error during async search: {str(e)}")
+                raise
+
+    async def get_bank_statement(self, account_number: int, start_date: datetime = None, end_date: datetime = None) -> Dict:
+        async with get_async_cursor() as cursor:
+            try:
+                await cursor.execute("SELECT value FROM job_watermarks WHERE name = %s", (ARCHIVE_WATERMARK,))
+                row = await cursor.fetchone()
+                horizon = row[0] if row else None
+                include_archive = horizon is not None and (start_date is None or start_date < horizon)
+                query, params = self.account_dao._opening_balance_query(account_number, start_date, include_archive)
+                await cursor.execute(query, params)
+                row = await cursor.fetchone()
+                opening_balance = row[0] if row else Decimal('0.00')
+                query, params = self.account_dao._build_statement_query(
+                    account_number, start_date, end_date, include_archive
+                )
+                self.sql_logger.info(f"Executing async bank statement query for account: {account_number}")
+                await cursor.execute(query, params)
+                transactions = list(self.account_dao._statement_rows(await cursor.fetchall(), opening_balance))
+                closing_balance = transactions[-1]['running_balance'] if transactions else opening_balance
+
+                await cursor.execute(ACCOUNT_SELECT + " WHERE a.number = %s", (account_number,))
+                row = await cursor.fetchone()
+                account = Account._make(row) if row else None
+                return {
+                    'account': account,
+                    'transactions': transactions,
+                    'start_date': start_date or transactions[0]['date'] if transactions else None,
+                    'end_date': end_date or transactions[-1]['date'] if transactions else None,
+                    'opening_balance': opening_balance,
+                    'closing_balance': closing_balance,
+                    'total_deposits': sum(t['transaction_amount'] for t in transactions if t['transaction_amount'] > 0),
+                    'total_withdrawals': abs(sum(t['transaction_amount'] for t in transactions if t['transaction_amount'] < 0))
+                }
+            except Exception as e:
+                self.sql_logger.error(f"Error generating async bank statement: {e}")
+                raise
@@ -0,0 +1,24 @@
+from contextlib import asynccontextmanager
+from app.dal.database import DB_CONFIG
+
+@asynccontextmanager
+async def get_async_cursor(row_factory=None):
+    # Imported here so only the async routes pay for loading psycopg 3
+    import psycopg
+    # Unpooled: every call opens and closes its own connection, which costs a
+    # connect round trip and counts against max_connections while it lasts.
+    # Flask runs every async view in a fresh event loop, and a psycopg
+    # AsyncConnectionPool is bound to the loop it was opened in, so there is
+    # no loop to keep one in under the WSGI server.
+    conn = await psycopg.AsyncConnection.connect(**{k: v for k, v in DB_CONFIG.items() if v is not None})
+    try:
+        # Same row_factory contract as get_cursor(): a callable taking the row tuple
+        cursor_kwargs = {'row_factory': lambda cursor: row_factory} if row_factory else {}
+        async with conn.cursor(**cursor_kwargs) as cursor:
+            yield cursor
+        await conn.commit()
+    except psycopg.DatabaseError as e:
+        await conn.rollback()
+        raise e
+    finally:
+        await conn.close()
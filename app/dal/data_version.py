@@ -0,0 +1,33 @@
+import os
+import random
+from datetime import datetime
+from typing import Optional, Tuple
+from app.dal.database import get_cursor
+
+# Rows of data_versions the writers spread over, by account number
+DATA_VERSION_SHARDS = int(os.getenv('DATA_VERSION_SHARDS', '16'))
+
+
+def bump_data_version(cursor, account_number: int = None) -> None:
+    """Records a change in the caller's transaction.
+
+    Run it last, just before the commit, so the counter row stays locked
+    only for the commit and never while the transaction waits on others.
+    """
+    if account_number is None:
+        shard = random.randrange(DATA_VERSION_SHARDS)
+    else:
+        shard = account_number % DATA_VERSION_SHARDS
+    cursor.execute("""
+        INSERT INTO data_versions (shard, version, changed_at) VALUES (%s, 1, clock_timestamp())
+        ON CONFLICT (shard) DO UPDATE
+        SET version = data_versions.version + 1, changed_at = EXCLUDED.changed_at""",
+        (shard,)
+    )
+
+
+def get_data_version() -> Tuple[int, Optional[datetime]]:
+    """Returns (version, changed_at) over the whole database"""
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COALESCE(SUM(version), 0)::bigint, MAX(changed_at) FROM data_versions")
+        return cursor.fetchone()
@@ -1,6 +1,11 @@
+import contextvars
 import os
+import tempfile
+import threading
 from dotenv import load_dotenv
 import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from contextlib import contextmanager
 
 load_dotenv()
@@ -13,19 +18,175 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD')
 }
 
+STREAM_ITERSIZE = int(os.getenv('DB_STREAM_ITERSIZE', '2000'))
+# fetch_frame keeps the COPY output in memory up to this size, then spills to disk
+FRAME_SPOOL_BYTES = int(os.getenv('DB_FRAME_SPOOL_BYTES', str(32 * 1024 * 1024)))
+# DB_POOL_MIN connections are opened up front and kept idle between calls;
+# connections above it are closed when returned
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '4'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+# Longest wait for a free connection before getconn raises PoolError
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+# Streamed downloads hold their connection for the whole transfer, so they
+# draw from a pool of their own: slow clients cannot starve other requests
+DB_STREAM_POOL_MAX = int(os.getenv('DB_STREAM_POOL_MAX', '4'))
+
+class ConnectionPool:
+    """Per-process pool of connections shared by get_cursor().
+
+    ThreadedConnectionPool fails when it is exhausted instead of waiting, so
+    a semaphore makes callers block until a connection is returned, for at
+    most timeout seconds. The pool is created lazily and again after a fork,
+    since connections cannot be shared between processes.
+    """
+
+    def __init__(self, minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX, timeout: float = DB_POOL_TIMEOUT):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._slots = None
+
+    def _ensure_pool(self) -> None:
+        if self._pool is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, **DB_CONFIG)
+                self._slots = threading.BoundedSemaphore(self.maxconn)
+                self._pid = os.getpid()
+
+    def getconn(self):
+        self._ensure_pool()
+        # Fails instead of hanging when every connection stays taken, e.g. by
+        # callers that wait for a second connection while holding one
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"No database connection available after {self.timeout}s")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close: bool = False) -> None:
+        try:
+            self._pool.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def warm_up(self) -> None:
+        # Opens the minconn connections and checks one round trip
+        conn = self.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+        finally:
+            self.putconn(conn)
+
+    def reset(self) -> None:
+        # Drops the pool inherited from a parent process without closing
+        # its sockets, which still belong to the parent
+        with self._lock:
+            self._pool = None
+            self._pid = None
+
+connection_pool = ConnectionPool()
+# Opened on demand and closed after each download
+stream_pool = ConnectionPool(0, DB_STREAM_POOL_MAX)
+
+# Set by statement_timeout(); applied to every transaction get_cursor opens
+_statement_timeout = contextvars.ContextVar('statement_timeout', default=None)
+
+
+@contextmanager
+def statement_timeout(seconds: float):
+    """Aborts the queries run inside the block after seconds, so a caller that
+    stopped waiting for them does not keep their connection busy"""
+    token = _statement_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _statement_timeout.reset(token)
+
+class RecordCursor(psycopg2.extensions.cursor):
+    """Cursor that hands every fetched row to row_factory, e.g. Account._make,
+    so models are built straight from the row tuple."""
+
+    row_factory = None
+
+    def fetchone(self):
+        row = super().fetchone()
+        return self.row_factory(row) if row is not None else None
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        return list(map(self.row_factory, rows))
+
+    def fetchall(self):
+        return list(map(self.row_factory, super().fetchall()))
+
+    def __next__(self):
+        return self.row_factory(super().__next__())
+
 @contextmanager
-def get_cursor():
-    conn = psycopg2.connect(**DB_CONFIG)
+def get_cursor(name: str = None, row_factory=None, pool: ConnectionPool = None):
+    # A named cursor is declared server-side: rows are fetched in batches of
+    # STREAM_ITERSIZE while iterating instead of being loaded all at once.
+    pool = pool or connection_pool
+    conn = pool.getconn()
+    broken = False
     try:
-        cursor = conn.cursor()
+        timeout = _statement_timeout.get()
+        if timeout:
+            with conn.cursor() as setup:
+                setup.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+        if row_factory:
+            cursor = conn.cursor(name=name, cursor_factory=RecordCursor)
+            cursor.row_factory = row_factory
+        else:
+            cursor = conn.cursor(name=name) if name else conn.cursor()
+        if name:
+            cursor.itersize = STREAM_ITERSIZE
         yield cursor
+        # Named cursors only live inside the transaction, close before commit
+        cursor.close()
         conn.commit()
-    except psycopg2.DatabaseError as e:
-        conn.rollback()
-        raise e
+    except BaseException:
+        # Any failure, not only database errors, must not hand a connection
+        # back to the pool in the middle of a transaction
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
     finally:
-        cursor.close()
-        conn.close()
+        pool.putconn(conn, close=broken)
+
+def fetch_frame(query: str, params=None, dtypes: dict = None):
+    """Runs a SELECT through COPY ... TO STDOUT and parses it into a DataFrame.
+
+    The CSV stream is parsed column-wise by pandas, so no Python object is
+    built per row. dtypes maps column names to pandas dtypes; datetime
+    columns are parsed as dates and other columns default to inference.
+    """
+    import pandas as pd
+
+    dtypes = dtypes or {}
+    dates = [column for column, dtype in dtypes.items() if dtype.startswith('datetime')]
+    types = {column: dtype for column, dtype in dtypes.items() if column not in dates}
+    with tempfile.SpooledTemporaryFile(max_size=FRAME_SPOOL_BYTES) as buffer:
+        with get_cursor() as cursor:
+            # COPY takes no bind parameters, so they are inlined by the driver
+            sql = query
+            if params:
+                encoding = psycopg2.extensions.encodings[cursor.connection.encoding]
+                sql = cursor.mogrify(query, params).decode(encoding)
+            cursor.copy_expert(f"COPY ({sql.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+        buffer.seek(0)
+        return pd.read_csv(buffer, dtype=types, parse_dates=dates)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000'))
+IDEMPOTENCY_CACHE_TTL = int(os.getenv('IDEMPOTENCY_CACHE_TTL', '3600'))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def idempotency_request(operation: str, account_id: int, amount: Decimal,
+                        recipient_account: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        'operation': operation,
+        'account_id': account_id,
+        # 100, 100.0 and 100.00 are the same request
+        'amount': str(Decimal(amount).quantize(Decimal('0.01'))),
+        'recipient_account': recipient_account
+    }
+
+
+class IdempotencyCache:
+    """In-process LRU of recently used keys.
+
+    A retry that lands on the same worker is answered from here without
+    touching the database; anything else falls through to the
+    idempotency_keys table.
+    """
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_CACHE_SIZE, ttl_seconds: int = IDEMPOTENCY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def replay(self, key: str, request: Dict[str, Any]) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            stored_request, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+        if stored_request != request:
+            raise ValueError("Idempotency key was already used for a different operation")
+        return True
+
+    def remember(self, key: str, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (request, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+idempotency_cache = IdempotencyCache()
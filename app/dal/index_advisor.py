@@ -0,0 +1,211 @@
+import argparse
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set, Tuple
+from psycopg2 import sql
+from app.dal.database import get_cursor
+from app.logger.sql_logging import setup_sql_logging
+
+# Indexes matching the DAO query shapes, name -> (table, definition)
+INDEXES = {
+    # Statement: account_id = %s [AND date range] ORDER BY date, covering
+    # every selected column but description. That one is unbounded TEXT and a
+    # long one would push the entry past the B-tree row size limit (about
+    # 2.7 kB) and fail the INSERT, so it is fetched from the heap instead.
+    'idx_transactions_account_ledger': (
+        'transactions', '(account_id, date) INCLUDE (id, type, amount, recipient_account)'
+    ),
+    # Statement, transfers received (the other UNION ALL side); deposits and
+    # withdrawals have no recipient
+    'idx_transactions_recipient_ledger': (
+        'transactions', '(recipient_account, date) INCLUDE (id, type, amount, account_id) '
+                        'WHERE recipient_account IS NOT NULL'
+    ),
+    # Trends and monthly growth scan a recent date range of append-ordered rows
+    'idx_transactions_date_brin': (
+        'transactions', 'USING brin (date) WITH (pages_per_range = 32)'
+    ),
+    # get_accounts_by_type: status = true ORDER BY type, number
+    'idx_accounts_active_type': (
+        'accounts', '(type, number) INCLUDE (user_id, balance, status, interest_rate, created_at) '
+                    'WHERE status = true'
+    ),
+    'idx_transactions_archive_account_ledger': (
+        'transactions_archive', '(account_id, date) INCLUDE (id, type, amount, recipient_account)'
+    ),
+    'idx_transactions_archive_recipient_ledger': (
+        'transactions_archive', '(recipient_account, date) INCLUDE (id, type, amount, account_id) '
+                                'WHERE recipient_account IS NOT NULL'
+    ),
+    'idx_transactions_archive_date_brin': (
+        'transactions_archive', 'USING brin (date) WITH (pages_per_range = 32)'
+    ),
+}
+
+# Superseded by the indexes above
+OBSOLETE_INDEXES = [
+    'idx_transactions_account',
+    'idx_transactions_recipient',
+    'idx_transactions_date',
+    'idx_transactions_archive_account',
+    'idx_transactions_archive_recipient',
+    'idx_transactions_archive_date',
+    # Did not cover the statement's id and description
+    'idx_transactions_account_date',
+    'idx_transactions_recipient_date',
+    'idx_transactions_archive_account_date',
+    'idx_transactions_archive_recipient_date',
+    # Included description, which can exceed the B-tree row size limit
+    'idx_transactions_account_statement',
+    'idx_transactions_recipient_statement',
+    'idx_transactions_archive_account_statement',
+    'idx_transactions_archive_recipient_statement',
+]
+
+# Representative query shapes and the indexes their plans are expected to use
+PLAN_CHECKS = {
+    'bank_statement': (
+        """
+        SELECT t.id, t.type, t.amount, t.recipient_account, t.description, t.date
+        FROM transactions t
+        WHERE t.account_id = %(account)s AND t.date >= %(since)s
+        UNION ALL
+        SELECT t.id, t.type, t.amount, t.recipient_account, t.description, t.date
+        FROM transactions t
+        WHERE t.recipient_account = %(account)s AND t.type = 'TRANSFER'
+          AND t.account_id <> %(account)s AND t.date >= %(since)s
+        ORDER BY date, id
+        """,
+        {'idx_transactions_account_ledger', 'idx_transactions_recipient_ledger'}
+    ),
+    'monthly_growth': (
+        """
+        SELECT DATE_TRUNC('month', date) AS month, COUNT(DISTINCT account_id), SUM(amount), COUNT(*)
+        FROM transactions
+        WHERE date >= %(since)s
+        GROUP BY DATE_TRUNC('month', date)
+        """,
+        {'idx_transactions_date_brin'}
+    ),
+    'accounts_by_type': (
+        """
+        SELECT number, user_id, type, balance, status, interest_rate, created_at
+        FROM accounts
+        WHERE status = true
+        ORDER BY type, number
+        """,
+        {'idx_accounts_active_type'}
+    ),
+}
+
+
+def index_statement(name: str) -> sql.Composed:
+    table, definition = INDEXES[name]
+    return sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} {}").format(
+        sql.Identifier(name), sql.Identifier(table), sql.SQL(definition)
+    )
+
+
+class IndexAdvisor:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def missing_indexes(self) -> List[str]:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", (list(INDEXES),))
+            existing = {row[0] for row in cursor.fetchall()}
+        return [name for name in INDEXES if name not in existing]
+
+    def apply(self, drop_obsolete: bool = True) -> Dict[str, List[str]]:
+        # Plain CREATE INDEX: CONCURRENTLY is not supported on partitioned tables
+        created = self.missing_indexes()
+        with get_cursor() as cursor:
+            try:
+                for name in created:
+                    self.sql_logger.info(f"Creating index {name}")
+                    cursor.execute(index_statement(name))
+                dropped = []
+                if drop_obsolete:
+                    cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", (OBSOLETE_INDEXES,))
+                    dropped = [row[0] for row in cursor.fetchall()]
+                    for name in dropped:
+                        self.sql_logger.info(f"Dropping index {name}")
+                        cursor.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+                for table in {INDEXES[name][0] for name in created}:
+                    cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+                return {'created': created, 'dropped': dropped}
+            except Exception as e:
+                self.sql_logger.error(f"Error applying indexes: {e}")
+                raise
+
+    def _plan_indexes(self, cursor, query: str, params: Dict[str, Any]) -> Tuple[Set[str], Any]:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        used = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if 'Index Name' in node:
+                used.add(node['Index Name'])
+            nodes.extend(node.get('Plans', []))
+
+        # Partition scans report the per-partition index; map it to the parent
+        roots = set()
+        for name in used:
+            cursor.execute("SELECT pg_partition_root(%s::regclass)::regclass::text", (name,))
+            roots.add(cursor.fetchone()[0] or name)
+        return roots, plan
+
+    def verify(self, force_index: bool = False) -> Dict[str, Dict[str, Any]]:
+        """EXPLAINs the representative query shapes and reports the indexes they use.
+
+        With force_index sequential scans are disabled for the check, which is
+        needed on small development datasets where a seq scan is always cheaper.
+        """
+        results = {}
+        with get_cursor() as cursor:
+            # Parameters taken from the data so the checks hit populated partitions
+            cursor.execute("""
+                SELECT recipient_account
+                FROM transactions
+                WHERE recipient_account IS NOT NULL
+                GROUP BY recipient_account
+                ORDER BY COUNT(*) DESC
+                LIMIT 1""")
+            row = cursor.fetchone()
+            cursor.execute("SELECT MAX(date) FROM transactions")
+            latest = cursor.fetchone()[0] or datetime.now()
+            params = {'account': row[0] if row else 0, 'since': latest - timedelta(days=45)}
+            if force_index:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for check, (query, expected) in PLAN_CHECKS.items():
+                used, _ = self._plan_indexes(cursor, query, params)
+                results[check] = {
+                    'expected': sorted(expected),
+                    'used': sorted(used),
+                    'ok': expected <= used
+                }
+                self.sql_logger.info(f"Plan check {check}: uses {sorted(used)}, expected {sorted(expected)}")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the query-shaped indexes and check the plans use them")
+    parser.add_argument('command', choices=('status', 'apply', 'verify'))
+    parser.add_argument('--keep-obsolete', action='store_true', help="Do not drop the superseded indexes")
+    parser.add_argument('--force-index', action='store_true', help="Disable seq scans while verifying")
+    args = parser.parse_args()
+
+    advisor = IndexAdvisor()
+    if args.command == 'status':
+        print({'missing': advisor.missing_indexes()})
+    elif args.command == 'apply':
+        print(advisor.apply(drop_obsolete=not args.keep_obsolete))
+    else:
+        results = advisor.verify(args.force_index)
+        for check, result in results.items():
+            print(f"{'OK  ' if result['ok'] else 'FAIL'} {check}: used {result['used']}, expected {result['expected']}")
+        raise SystemExit(0 if all(result['ok'] for result in results.values()) else 1)
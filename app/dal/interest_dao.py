@@ -0,0 +1,116 @@
+from typing import Dict, Any, Optional, Tuple
+from decimal import Decimal
+from datetime import date, datetime
+from app.dal.database import get_cursor
+from app.dal.data_version import bump_data_version
+from app.logger.sql_logging import setup_sql_logging
+
+# Simple interest on the current balance, ACT/365 day count. The balance is
+# taken as it stands when the job runs, not averaged over the period from
+# the ledger movements, so run the job right after the period closes.
+ACCRUAL_CTE = """
+    WITH accrual AS (
+        SELECT a.number,
+               ROUND(a.balance * a.interest_rate / 100 * %(days)s / 365, 2) AS amount
+        FROM accounts a
+        WHERE a.type = 'savings'
+          AND a.status = true
+          AND a.interest_rate > 0
+          AND a.balance > 0
+          AND a.number > %(after_account)s
+          AND a.number <= %(upto_account)s
+    )
+"""
+
+class InterestDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def get_account_range(self) -> Tuple[Optional[int], Optional[int]]:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT MIN(number), MAX(number) FROM accounts WHERE type = 'savings'")
+            return cursor.fetchone()
+
+    def preview_accruals(self, period_start: date, period_end: date,
+                         after_account: int, upto_account: int) -> Dict[str, Any]:
+        with get_cursor() as cursor:
+            query = ACCRUAL_CTE + """
+                SELECT COUNT(*), COALESCE(SUM(c.amount), 0)
+                FROM accrual c
+                WHERE c.amount > 0
+                  AND NOT EXISTS (
+                      SELECT 1 FROM interest_accruals i
+                      WHERE i.account_id = c.number
+                        AND daterange(i.period_start, i.period_end)
+                            && daterange(%(period_start)s, %(period_end)s)
+                  )
+            """
+            params = {
+                'days': (period_end - period_start).days,
+                'after_account': after_account,
+                'upto_account': upto_account,
+                'period_start': period_start,
+                'period_end': period_end
+            }
+            self.sql_logger.info(f"Previewing interest accruals for {period_start} - {period_end}")
+            cursor.execute(query, params)
+            count, total = cursor.fetchone()
+            return {'accounts': count, 'total_interest': Decimal(total)}
+
+    def post_accruals(self, period_start: date, period_end: date, after_account: int,
+                      upto_account: int, description: str) -> Dict[str, Any]:
+        # Claiming the (account, period) row first makes reruns skip accounts
+        # already credited for any overlapping period, so a monthly run does
+        # not credit the days a daily run already did; the ledger insert and
+        # balance update only see the rows that were actually claimed.
+        with get_cursor() as cursor:
+            # Accounts are locked before the ledger rows take their ids, as
+            # for any posting; holding the lock, the overlap check below also
+            # sees the claims of a concurrent run that locked them first
+            cursor.execute(
+                "SELECT number FROM accounts WHERE number > %s AND number <= %s ORDER BY number FOR UPDATE",
+                (after_account, upto_account)
+            )
+            query = ACCRUAL_CTE + """
+                , claimed AS (
+                    INSERT INTO interest_accruals (account_id, period_start, period_end, amount)
+                    SELECT number, %(period_start)s, %(period_end)s, amount
+                    FROM accrual c
+                    WHERE amount > 0
+                      AND NOT EXISTS (
+                          SELECT 1 FROM interest_accruals i
+                          WHERE i.account_id = c.number
+                            AND daterange(i.period_start, i.period_end)
+                                && daterange(%(period_start)s, %(period_end)s)
+                      )
+                    ON CONFLICT (account_id, period_start, period_end) DO NOTHING
+                    RETURNING account_id, amount
+                ), posted AS (
+                    INSERT INTO transactions (account_id, type, amount, description, date)
+                    SELECT account_id, 'DEPOSIT', amount, %(description)s, %(posted_at)s
+                    FROM claimed
+                ), credited AS (
+                    UPDATE accounts a
+                    SET balance = a.balance + c.amount, version = a.version + 1
+                    FROM claimed c
+                    WHERE a.number = c.account_id
+                    RETURNING c.amount
+                )
+                SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM credited
+            """
+            params = {
+                'days': (period_end - period_start).days,
+                'after_account': after_account,
+                'upto_account': upto_account,
+                'period_start': period_start,
+                'period_end': period_end,
+                'description': description,
+                'posted_at': datetime.combine(period_end, datetime.min.time())
+            }
+            self.sql_logger.info(f"Posting interest accruals for accounts {after_account + 1}-{upto_account}, "
+                                 f"period {period_start} - {period_end}")
+            cursor.execute(query, params)
+            count, total = cursor.fetchone()
+            if count:
+                bump_data_version(cursor)
+            return {'accounts': count, 'total_interest': Decimal(total)}
@@ -0,0 +1,38 @@
+import time
+from typing import Optional
+from app.dal.database import get_cursor
+
+
+def settled_transaction_id(timeout: float = 1.0) -> Optional[int]:
+    """Highest transaction id up to which every id is committed or rolled back.
+
+    Ids are taken before commit, so a lower id can become visible after a
+    higher one, and dates say nothing about commit order (interest is dated
+    at the period end). Postings write before they take an id, so every id
+    handed out so far belongs to a transaction that is either finished or
+    in the current snapshot's running list: once those end, the ids are
+    final. Returns None if they are still running after timeout seconds.
+    """
+    # Read only, so this transaction never gets an xid of its own to wait for
+    with get_cursor() as cursor:
+        cursor.execute("""
+            SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END
+            FROM transactions_id_seq""")
+        horizon = cursor.fetchone()[0]
+        cursor.execute("SELECT ARRAY(SELECT pg_snapshot_xip(pg_current_snapshot()))::text[]")
+        running = cursor.fetchone()[0]
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while running:
+            cursor.execute("""
+                SELECT ARRAY(SELECT x FROM unnest(%s::xid8[]) x
+                             WHERE pg_xact_status(x) = 'in progress')::text[]""",
+                (running,)
+            )
+            running = cursor.fetchone()[0]
+            if running and time.monotonic() >= deadline:
+                return None
+            if running:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+        return horizon
@@ -0,0 +1,162 @@
+import re
+from datetime import date
+from typing import List
+from psycopg2 import sql
+from app.dal.database import get_cursor
+from app.dal.index_advisor import INDEXES, OBSOLETE_INDEXES, index_statement
+from app.logger.sql_logging import setup_sql_logging
+
+PARENT_TABLE = 'transactions'
+DEFAULT_PARTITION = 'transactions_default'
+PARTITION_NAME = re.compile(r'^transactions_(\d{4})_(\d{2})$')
+
+TRANSACTION_INDEXES = [name for name, (table, _) in INDEXES.items() if table == PARENT_TABLE]
+LEGACY_INDEXES = [name for name in OBSOLETE_INDEXES if not name.startswith('idx_transactions_archive')]
+
+# Same layout as database.sql, but reusing the sequence of the table being
+# migrated instead of creating a new SERIAL
+CREATE_PARTITIONED_TABLE = """
+    CREATE TABLE transactions (
+      id INTEGER NOT NULL DEFAULT nextval('transactions_id_seq'),
+      account_id INTEGER NOT NULL,
+      type VARCHAR(20) NOT NULL CHECK (type IN ('DEPOSIT', 'WITHDRAW', 'TRANSFER')),
+      amount DECIMAL(10,2) NOT NULL CHECK (amount > 0),
+      recipient_account INTEGER,
+      description TEXT,
+      date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (id, date),
+      FOREIGN KEY (account_id) REFERENCES accounts(number) ON DELETE CASCADE,
+      FOREIGN KEY (recipient_account) REFERENCES accounts(number) ON DELETE SET NULL,
+      CONSTRAINT valid_transfer CHECK (
+          (type = 'TRANSFER' AND recipient_account IS NOT NULL) OR
+          (type IN ('DEPOSIT', 'WITHDRAW') AND recipient_account IS NULL)
+      )
+    ) PARTITION BY RANGE (date)
+"""
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+class PartitionDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def _is_partitioned(self, cursor) -> bool:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (PARENT_TABLE,))
+        row = cursor.fetchone()
+        return bool(row) and row[0] == 'p'
+
+    def is_partitioned(self) -> bool:
+        with get_cursor() as cursor:
+            return self._is_partitioned(cursor)
+
+    def list_partitions(self, parent: str = PARENT_TABLE) -> List[date]:
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(%s)""",
+                (parent,)
+            )
+            months = []
+            for (name,) in cursor.fetchall():
+                match = PARTITION_NAME.match(name)
+                if match:
+                    months.append(date(int(match.group(1)), int(match.group(2)), 1))
+            return sorted(months)
+
+    def _create_partition(self, cursor, month: date) -> bool:
+        name = partition_name(month)
+        cursor.execute("SELECT to_regclass(%s)", (name,))
+        if cursor.fetchone()[0]:
+            return False
+
+        next_month = add_months(month, 1)
+        # Rows that already landed in the default partition for this month
+        # would violate the new bounds: the default partition is detached,
+        # its rows moved, then attached again in the same transaction.
+        cursor.execute(
+            sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE date >= %s AND date < %s)").format(
+                sql.Identifier(DEFAULT_PARTITION)),
+            (month, next_month)
+        )
+        has_default_rows = cursor.fetchone()[0]
+        if has_default_rows:
+            cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                sql.Identifier(PARENT_TABLE), sql.Identifier(DEFAULT_PARTITION)))
+
+        cursor.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+            sql.Identifier(name), sql.Identifier(PARENT_TABLE),
+            sql.Literal(month.isoformat()), sql.Literal(next_month.isoformat())
+        ))
+
+        if has_default_rows:
+            cursor.execute(sql.SQL("""
+                WITH moved AS (
+                    DELETE FROM {} WHERE date >= %s AND date < %s RETURNING *
+                )
+                INSERT INTO {} SELECT * FROM moved""").format(
+                sql.Identifier(DEFAULT_PARTITION), sql.Identifier(name)),
+                (month, next_month)
+            )
+            cursor.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} DEFAULT").format(
+                sql.Identifier(PARENT_TABLE), sql.Identifier(DEFAULT_PARTITION)))
+
+        self.sql_logger.info(f"Created partition {name} for {month} - {next_month}")
+        return True
+
+    def create_partition(self, month: date) -> bool:
+        with get_cursor() as cursor:
+            return self._create_partition(cursor, month_start(month))
+
+    def migrate_to_partitioned(self, months_ahead: int = 3) -> bool:
+        # The copy runs in one transaction under an exclusive lock; the old
+        # heap is kept as transactions_unpartitioned until it is dropped by hand.
+        with get_cursor() as cursor:
+            if self._is_partitioned(cursor):
+                return False
+
+            cursor.execute("LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE")
+            cursor.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+            cursor.execute("ALTER INDEX IF EXISTS transactions_pkey RENAME TO transactions_unpartitioned_pkey")
+            for index_name in TRANSACTION_INDEXES + LEGACY_INDEXES:
+                cursor.execute(sql.SQL("ALTER INDEX IF EXISTS {} RENAME TO {}").format(
+                    sql.Identifier(index_name), sql.Identifier(f"{index_name}_unpartitioned")))
+
+            cursor.execute(CREATE_PARTITIONED_TABLE)
+            cursor.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+            cursor.execute(sql.SQL("CREATE TABLE {} PARTITION OF {} DEFAULT").format(
+                sql.Identifier(DEFAULT_PARTITION), sql.Identifier(PARENT_TABLE)))
+
+            cursor.execute("SELECT MIN(date), MAX(date) FROM transactions_unpartitioned")
+            first, last = cursor.fetchone()
+            month = month_start(first.date() if first else date.today())
+            until = add_months(month_start(max(last.date(), date.today()) if last else date.today()), months_ahead)
+            while month <= until:
+                self._create_partition(cursor, month)
+                month = add_months(month, 1)
+
+            cursor.execute("""
+                INSERT INTO transactions (id, account_id, type, amount, recipient_account, description, date)
+                SELECT id, account_id, type, amount, recipient_account, description,
+                       COALESCE(date, CURRENT_TIMESTAMP)
+                FROM transactions_unpartitioned
+            """)
+            copied = cursor.rowcount
+            for index_name in TRANSACTION_INDEXES:
+                cursor.execute(index_statement(index_name))
+
+            self.sql_logger.info(f"Migrated {copied} transactions to the partitioned table")
+            return True
@@ -0,0 +1,183 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from app.dal.archive_dao import LEDGER_SOURCE
+from app.dal.database import get_cursor
+from app.logger.sql_logging import setup_sql_logging
+
+# One set-based pass over a range of account numbers. Balances and ledger
+# rows are read in the same snapshot, and postings update both in a single
+# transaction, so a consistent account always reconciles. Each account only
+# adds the ledger rows past its own last reconciled transaction id, which
+# then moves to the highest id visible in the snapshot. That is only safe
+# because reconcile_chunk locks the accounts first (LOCK_CHUNK): no posting
+# on them is in flight, and later ones get higher ids.
+RECONCILE_CHUNK = f"""
+    WITH high_water AS (
+        SELECT COALESCE(MAX(id), 0) AS id FROM transactions
+    ),
+    prior AS (
+        SELECT a.number AS account_id,
+               a.balance,
+               COALESCE(r.opening_balance, 0) AS opening_balance,
+               CASE WHEN %(full)s THEN 0 ELSE COALESCE(r.ledger_total, 0) END AS ledger_total,
+               CASE WHEN %(full)s THEN 0 ELSE COALESCE(r.last_transaction_id, 0) END AS last_transaction_id
+        FROM accounts a
+        LEFT JOIN account_reconciliation r ON r.account_id = a.number
+        WHERE a.number > %(after)s AND a.number <= %(upto)s
+    ),
+    movements AS (
+        SELECT t.account_id, t.id,
+               CASE WHEN t.type = 'DEPOSIT' THEN t.amount ELSE -t.amount END AS delta
+        FROM {LEDGER_SOURCE} t
+        WHERE t.account_id > %(after)s AND t.account_id <= %(upto)s AND t.id > %(since_id)s
+        UNION ALL
+        SELECT t.recipient_account, t.id, t.amount
+        FROM {LEDGER_SOURCE} t
+        WHERE t.type = 'TRANSFER'
+          AND t.recipient_account > %(after)s AND t.recipient_account <= %(upto)s AND t.id > %(since_id)s
+    ),
+    deltas AS (
+        SELECT m.account_id, SUM(m.delta) AS delta
+        FROM movements m
+        JOIN prior p ON p.account_id = m.account_id
+        WHERE m.id > p.last_transaction_id
+        GROUP BY m.account_id
+    ),
+    reconciled AS (
+        INSERT INTO account_reconciliation
+            (account_id, opening_balance, ledger_total, last_transaction_id, balance, difference, reconciled_at)
+        SELECT p.account_id,
+               p.opening_balance,
+               p.ledger_total + COALESCE(d.delta, 0),
+               GREATEST(p.last_transaction_id, h.id),
+               p.balance,
+               p.balance - p.opening_balance - p.ledger_total - COALESCE(d.delta, 0),
+               CURRENT_TIMESTAMP
+        FROM prior p
+        CROSS JOIN high_water h
+        LEFT JOIN deltas d ON d.account_id = p.account_id
+        ON CONFLICT (account_id) DO UPDATE
+        SET ledger_total = EXCLUDED.ledger_total,
+            last_transaction_id = EXCLUDED.last_transaction_id,
+            balance = EXCLUDED.balance,
+            difference = EXCLUDED.difference,
+            reconciled_at = EXCLUDED.reconciled_at
+        RETURNING account_id, balance, difference
+    ),
+    mismatches AS (
+        INSERT INTO reconciliation_mismatches (run_id, account_id, expected_balance, actual_balance, difference)
+        SELECT %(run_id)s, account_id, balance - difference, balance, difference
+        FROM reconciled
+        WHERE difference <> 0
+        RETURNING difference
+    )
+    SELECT (SELECT COUNT(*) FROM reconciled),
+           (SELECT COUNT(*) FROM mismatches),
+           (SELECT COALESCE(SUM(ABS(difference)), 0) FROM mismatches)
+"""
+
+
+# Every posting locks its accounts before it takes a ledger id. Waiting here
+# for a share lock lets in-flight postings on the chunk commit before the
+# snapshot, and holds new ones until the chunk commits: the chunk size is
+# how many accounts cannot be posted to while it runs.
+LOCK_CHUNK = """
+    SELECT number FROM accounts
+    WHERE number > %s AND number <= %s
+    ORDER BY number
+    FOR SHARE
+"""
+
+
+class ReconciliationDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def get_account_range(self) -> Tuple[Optional[int], Optional[int]]:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT MIN(number), MAX(number) FROM accounts")
+            return cursor.fetchone()
+
+    def start_run(self, mode: str) -> int:
+        with get_cursor() as cursor:
+            cursor.execute("INSERT INTO reconciliation_runs (mode) VALUES (%s) RETURNING id", (mode,))
+            return cursor.fetchone()[0]
+
+    def finish_run(self, run_id: int, accounts: int, mismatches: int) -> None:
+        with get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE reconciliation_runs
+                SET finished_at = CURRENT_TIMESTAMP, accounts = %s, mismatches = %s
+                WHERE id = %s""",
+                (accounts, mismatches, run_id)
+            )
+
+    def reconcile_chunk(self, run_id: int, after_account: int, upto_account: int,
+                        full: bool = False, accept: bool = False) -> Dict[str, Any]:
+        with get_cursor() as cursor:
+            try:
+                cursor.execute(LOCK_CHUNK, (after_account, upto_account))
+                since_id = 0
+                if not full:
+                    # Lower bound on the ids to scan; an account reconciled for
+                    # the first time needs its whole history.
+                    cursor.execute("""
+                        SELECT CASE WHEN COUNT(r.account_id) < COUNT(*) THEN 0
+                                    ELSE COALESCE(MIN(r.last_transaction_id), 0) END
+                        FROM accounts a
+                        LEFT JOIN account_reconciliation r ON r.account_id = a.number
+                        WHERE a.number > %s AND a.number <= %s""",
+                        (after_account, upto_account)
+                    )
+                    since_id = cursor.fetchone()[0]
+
+                cursor.execute(RECONCILE_CHUNK, {
+                    'run_id': run_id,
+                    'after': after_account,
+                    'upto': upto_account,
+                    'since_id': since_id,
+                    'full': full
+                })
+                accounts, mismatches, total_difference = cursor.fetchone()
+
+                if accept:
+                    # Baseline: the current balances become the opening balances
+                    cursor.execute("""
+                        UPDATE account_reconciliation
+                        SET opening_balance = opening_balance + difference, difference = 0
+                        WHERE account_id > %s AND account_id <= %s AND difference <> 0""",
+                        (after_account, upto_account)
+                    )
+
+                self.sql_logger.info(f"Reconciled accounts {after_account + 1}-{upto_account} from transaction "
+                                     f"{since_id}: {accounts} accounts, {mismatches} mismatches")
+                return {
+                    'accounts': accounts,
+                    'mismatches': mismatches,
+                    'total_difference': Decimal(str(total_difference))
+                }
+            except Exception as e:
+                self.sql_logger.error(f"Error reconciling accounts {after_account + 1}-{upto_account}: {e}")
+                raise
+
+    def get_mismatches(self, run_id: int = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with get_cursor() as cursor:
+            if run_id is None:
+                cursor.execute("SELECT MAX(id) FROM reconciliation_runs WHERE finished_at IS NOT NULL")
+                run_id = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT account_id, expected_balance, actual_balance, difference
+                FROM reconciliation_mismatches
+                WHERE run_id = %s
+                ORDER BY ABS(difference) DESC, account_id
+                LIMIT %s""",
+                (run_id, limit)
+            )
+            return [
+                {
+                    'account_id': row[0],
+                    'expected_balance': row[1],
+                    'actual_balance': row[2],
+                    'difference': row[3]
+                } for row in cursor.fetchall()
+            ]
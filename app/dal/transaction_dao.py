@@ -1,7 +1,11 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 from datetime import datetime
+from collections import defaultdict
+from psycopg2.extras import execute_values, Json
 from app.dal.database import get_cursor
+from app.dal.data_version import bump_data_version
+from app.dal.idempotency import idempotency_request
 from app.logger.sql_logging import setup_sql_logging
 
 class TransactionDAO:
@@ -24,9 +28,14 @@ class TransactionDAO:
                 data.get('description')
             )
             
+            # The account is locked before the ledger id is taken, like every
+            # posting (the balance reconciliation relies on it)
+            cursor.execute("UPDATE accounts SET version = version + 1 WHERE number = %s", (data['account_id'],))
             self.sql_logger.info(f"Executing query: {query} with values: {values}")
             cursor.execute(query, values)
-            return cursor.fetchone()[0]
+            transaction_id = cursor.fetchone()[0]
+            bump_data_version(cursor, data['account_id'])
+            return transaction_id
 
     def get_account_transactions(self, account_number: int) -> List[Dict]:
         with get_cursor() as cursor:
@@ -44,101 +53,275 @@ class TransactionDAO:
                 transactions.append({
                     'id': row[0],
                     'type': row[1],
-                    'amount': Decimal(str(row[2])),
+                    'amount': row[2],
                     'recipient_account': row[3],
                     'description': row[4],
                     'date': row[5]
                 })
             return transactions
 
-    def deposit(self, account_number: int, amount: Decimal, description: str = None) -> bool:
+    def _claim_idempotency_key(self, cursor, key: str, request: Dict[str, Any]) -> bool:
+        # Runs inside the posting transaction: the key only becomes visible
+        # if the posting commits, and a concurrent duplicate blocks on the
+        # unique index until the first one finishes.
+        cursor.execute("""
+            INSERT INTO idempotency_keys (key, operation, request)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (key) DO NOTHING
+            RETURNING key""",
+            (key, request['operation'], Json(request))
+        )
+        if cursor.fetchone():
+            return True
+
+        cursor.execute("SELECT request FROM idempotency_keys WHERE key = %s", (key,))
+        if cursor.fetchone()[0] != request:
+            raise ValueError("Idempotency key was already used for a different operation")
+        self.sql_logger.info(f"Replaying {request['operation']} for idempotency key {key}")
+        return False
+
+    def _apply_deposit(self, cursor, account_number: int, amount: Decimal, description: str = None,
+                       idempotency_key: str = None) -> bool:
+        if idempotency_key and not self._claim_idempotency_key(
+                cursor, idempotency_key, idempotency_request('DEPOSIT', account_number, amount)):
+            return True
+
+        cursor.execute("""
+            UPDATE accounts 
+            SET balance = balance + %s, version = version + 1
+            WHERE number = %s 
+            RETURNING balance""", 
+            (amount, account_number)
+        )
+        new_balance = cursor.fetchone()[0]
+        
+        cursor.execute("""
+            INSERT INTO transactions (account_id, type, amount, description)
+            VALUES (%s, 'DEPOSIT', %s, %s)""",
+            (account_number, amount, description)
+        )
+        
+        self.sql_logger.info(f"Deposit processed: Account={account_number}, Amount={amount}, NewBalance={new_balance}")
+        return True
+
+    def _apply_withdraw(self, cursor, account_number: int, amount: Decimal, description: str = None,
+                        idempotency_key: str = None) -> bool:
+        if idempotency_key and not self._claim_idempotency_key(
+                cursor, idempotency_key, idempotency_request('WITHDRAW', account_number, amount)):
+            return True
+
+        cursor.execute("SELECT balance FROM accounts WHERE number = %s", (account_number,))
+        current_balance = cursor.fetchone()[0]
+        
+        if current_balance < amount:
+            raise ValueError("Insufficient funds")
+        
+        cursor.execute("""
+            UPDATE accounts 
+            SET balance = balance - %s, version = version + 1
+            WHERE number = %s 
+            RETURNING balance""", 
+            (amount, account_number)
+        )
+        new_balance = cursor.fetchone()[0]
+        
+        cursor.execute("""
+            INSERT INTO transactions (account_id, type, amount, description)
+            VALUES (%s, 'WITHDRAW', %s, %s)""",
+            (account_number, amount, description)
+        )
+        
+        self.sql_logger.info(f"Withdrawal processed: Account={account_number}, Amount={amount}, NewBalance={new_balance}")
+        return True
+
+    def _apply_transfer(self, cursor, from_account: int, to_account: int, amount: Decimal,
+                        description: str = None, idempotency_key: str = None) -> bool:
+        if idempotency_key and not self._claim_idempotency_key(
+                cursor, idempotency_key, idempotency_request('TRANSFER', from_account, amount, to_account)):
+            return True
+
+        cursor.execute("SELECT balance FROM accounts WHERE number = %s", (from_account,))
+        from_balance = cursor.fetchone()
+        if not from_balance:
+            raise ValueError(f"Source account {from_account} not found")
+        
+        cursor.execute("SELECT number FROM accounts WHERE number = %s", (to_account,))
+        if not cursor.fetchone():
+            raise ValueError(f"Destination account {to_account} not found")
+        
+        if from_balance[0] < amount:
+            raise ValueError("Insufficient funds")
+        
+        cursor.execute("""
+            UPDATE accounts SET balance = balance - %s, version = version + 1 WHERE number = %s;
+            UPDATE accounts SET balance = balance + %s, version = version + 1 WHERE number = %s;
+            """, 
+            (amount, from_account, amount, to_account)
+        )
+        
+        cursor.execute("""
+            INSERT INTO transactions (account_id, type, amount, recipient_account, description)
+            VALUES (%s, 'TRANSFER', %s, %s, %s)""",
+            (from_account, amount, to_account, description)
+        )
+        
+        self.sql_logger.info(f"Transfer processed: From={from_account}, To={to_account}, Amount={amount}")
+        return True
+
+    def deposit(self, account_number: int, amount: Decimal, description: str = None,
+                idempotency_key: str = None) -> bool:
         with get_cursor() as cursor:
             try:
-                cursor.execute("""
-                    UPDATE accounts 
-                    SET balance = balance + %s 
-                    WHERE number = %s 
-                    RETURNING balance""", 
-                    (amount, account_number)
-                )
-                new_balance = cursor.fetchone()[0]
-                
-                cursor.execute("""
-                    INSERT INTO transactions (account_id, type, amount, description)
-                    VALUES (%s, 'DEPOSIT', %s, %s)""",
-                    (account_number, amount, description)
-                )
-                
-                self.sql_logger.info(f"Deposit processed: Account={account_number}, Amount={amount}, NewBalance={new_balance}")
-                return True
-                
+                applied = self._apply_deposit(cursor, account_number, amount, description, idempotency_key)
+                bump_data_version(cursor, account_number)
+                return applied
             except Exception as e:
                 self.sql_logger.error(f"Error processing deposit: {e}")
                 raise
 
-    def withdraw(self, account_number: int, amount: Decimal, description: str = None) -> bool:
+    def withdraw(self, account_number: int, amount: Decimal, description: str = None,
+                 idempotency_key: str = None) -> bool:
         with get_cursor() as cursor:
             try:
-                cursor.execute("SELECT balance FROM accounts WHERE number = %s", (account_number,))
-                current_balance = cursor.fetchone()[0]
-                
-                if current_balance < amount:
-                    raise ValueError("Insufficient funds")
-                
-                cursor.execute("""
-                    UPDATE accounts 
-                    SET balance = balance - %s 
-                    WHERE number = %s 
-                    RETURNING balance""", 
-                    (amount, account_number)
-                )
-                new_balance = cursor.fetchone()[0]
-                
-                cursor.execute("""
-                    INSERT INTO transactions (account_id, type, amount, description)
-                    VALUES (%s, 'WITHDRAW', %s, %s)""",
-                    (account_number, amount, description)
-                )
-                
-                self.sql_logger.info(f"Withdrawal processed: Account={account_number}, Amount={amount}, NewBalance={new_balance}")
-                return True
-                
+                applied = self._apply_withdraw(cursor, account_number, amount, description, idempotency_key)
+                bump_data_version(cursor, account_number)
+                return applied
             except Exception as e:
                 self.sql_logger.error(f"Error processing withdrawal: {e}")
                 raise
 
-    def transfer(self, from_account: int, to_account: int, amount: Decimal, description: str = None) -> bool:
+    def transfer(self, from_account: int, to_account: int, amount: Decimal, description: str = None,
+                 idempotency_key: str = None) -> bool:
         with get_cursor() as cursor:
             try:
-                cursor.execute("SELECT balance FROM accounts WHERE number = %s", (from_account,))
-                from_balance = cursor.fetchone()
-                if not from_balance:
-                    raise ValueError(f"Source account {from_account} not found")
-                
-                cursor.execute("SELECT number FROM accounts WHERE number = %s", (to_account,))
-                if not cursor.fetchone():
-                    raise ValueError(f"Destination account {to_account} not found")
-                
-                if from_balance[0] < amount:
-                    raise ValueError("Insufficient funds")
-                
-                cursor.execute("""
-                    UPDATE accounts SET balance = balance - %s WHERE number = %s;
-                    UPDATE accounts SET balance = balance + %s WHERE number = %s;
-                    """, 
-                    (amount, from_account, amount, to_account)
-                )
-                
-                cursor.execute("""
-                    INSERT INTO transactions (account_id, type, amount, recipient_account, description)
-                    VALUES (%s, 'TRANSFER', %s, %s, %s)""",
-                    (from_account, amount, to_account, description)
-                )
-                
-                self.sql_logger.info(f"Transfer processed: From={from_account}, To={to_account}, Amount={amount}")
-                return True
-                
+                applied = self._apply_transfer(cursor, from_account, to_account, amount, description, idempotency_key)
+                bump_data_version(cursor, from_account)
+                return applied
             except Exception as e:
                 self.sql_logger.error(f"Error processing transfer: {e}")
                 raise
 
+    def post_batch(self, operations: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        # Several independent postings share one commit. Each runs under its
+        # own savepoint so a failed one is rolled back alone and reported as
+        # its exception, while the others still commit together.
+        handlers = {
+            'deposit': self._apply_deposit,
+            'withdraw': self._apply_withdraw,
+            'transfer': self._apply_transfer
+        }
+        outcomes = []
+        with get_cursor() as cursor:
+            # Every account of the batch is locked up front in number order,
+            # like bulk_post, so concurrent batches cannot deadlock each other
+            accounts = set()
+            for operation, kwargs in operations:
+                accounts.update(kwargs[key] for key in ('account_number', 'from_account', 'to_account') if key in kwargs)
+            cursor.execute("SELECT number FROM accounts WHERE number = ANY(%s) ORDER BY number FOR UPDATE",
+                           (sorted(accounts),))
+            for operation, kwargs in operations:
+                cursor.execute("SAVEPOINT posting")
+                try:
+                    outcomes.append(handlers[operation](cursor, **kwargs))
+                    cursor.execute("RELEASE SAVEPOINT posting")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT posting")
+                    self.sql_logger.error(f"Error processing {operation} in batch: {e}")
+                    outcomes.append(e)
+            bump_data_version(cursor)
+            self.sql_logger.info(f"Posting batch committed: {len(operations)} operations")
+        return outcomes
+
+    def bulk_post(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # The whole chunk is one transaction: balances are locked once, every
+        # operation is checked in order against the running balances, then the
+        # net balance changes and ledger rows are written in two statements.
+        account_numbers = sorted({op['account_id'] for op in operations} |
+                                 {op['recipient_account'] for op in operations if op.get('recipient_account')})
+        with get_cursor() as cursor:
+            try:
+                cursor.execute(
+                    "SELECT number, balance FROM accounts WHERE number = ANY(%s) ORDER BY number FOR UPDATE",
+                    (account_numbers,)
+                )
+                balances = dict(cursor.fetchall())
+
+                keys = [op['idempotency_key'] for op in operations if op.get('idempotency_key')]
+                used_keys = {}
+                if keys:
+                    cursor.execute("SELECT key, request FROM idempotency_keys WHERE key = ANY(%s)", (keys,))
+                    used_keys = dict(cursor.fetchall())
+
+                deltas = defaultdict(Decimal)
+                ledger = []
+                claimed_keys = []
+                results = []
+
+                for op in operations:
+                    account_id, amount = op['account_id'], op['amount']
+                    recipient = op.get('recipient_account')
+                    key = op.get('idempotency_key')
+                    if key in used_keys:
+                        if used_keys[key] != idempotency_request(op['type'], account_id, amount, recipient):
+                            results.append({'index': op['index'], 'status': 'error',
+                                            'error': "Idempotency key was already used for a different operation"})
+                        else:
+                            results.append({'index': op['index'], 'status': 'ok', 'replayed': True})
+                        continue
+                    if account_id not in balances or (recipient and recipient not in balances):
+                        missing = account_id if account_id not in balances else recipient
+                        results.append({'index': op['index'], 'status': 'error', 'error': f"Account {missing} not found"})
+                        continue
+                    if op['type'] in ('WITHDRAW', 'TRANSFER') and balances[account_id] < amount:
+                        results.append({'index': op['index'], 'status': 'error', 'error': "Insufficient funds"})
+                        continue
+
+                    if op['type'] == 'DEPOSIT':
+                        balances[account_id] += amount
+                        deltas[account_id] += amount
+                    else:
+                        balances[account_id] -= amount
+                        deltas[account_id] -= amount
+                        if recipient:
+                            balances[recipient] += amount
+                            deltas[recipient] += amount
+
+                    ledger.append((account_id, op['type'], amount, recipient, op.get('description')))
+                    if key:
+                        request = idempotency_request(op['type'], account_id, amount, recipient)
+                        claimed_keys.append((key, op['type'], Json(request)))
+                    results.append({'index': op['index'], 'status': 'ok', 'new_balance': balances[account_id]})
+
+                changed = [(number, delta) for number, delta in deltas.items() if delta]
+                if changed:
+                    execute_values(cursor, """
+                        UPDATE accounts a
+                        SET balance = a.balance + v.delta, version = a.version + 1
+                        FROM (VALUES %s) AS v(number, delta)
+                        WHERE a.number = v.number""",
+                        changed, template="(%s, %s::numeric)", page_size=1000
+                    )
+                if ledger:
+                    execute_values(cursor, """
+                        INSERT INTO transactions (account_id, type, amount, recipient_account, description)
+                        VALUES %s""",
+                        ledger, page_size=1000
+                    )
+
+                if claimed_keys:
+                    # A key claimed concurrently by another request violates the
+                    # primary key and rolls the chunk back rather than posting twice
+                    execute_values(cursor, """
+                        INSERT INTO idempotency_keys (key, operation, request)
+                        VALUES %s""",
+                        claimed_keys, page_size=1000
+                    )
+                if changed or ledger:
+                    bump_data_version(cursor)
+
+                self.sql_logger.info(f"Bulk posting processed: {len(ledger)} posted, {len(operations) - len(ledger)} rejected")
+                return results
+
+            except Exception as e:
+                self.sql_logger.error(f"Error processing bulk posting: {e}")
+                raise
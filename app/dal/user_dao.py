@@ -1,5 +1,6 @@
 from typing import Optional, Dict, Any
 from app.dal.database import get_cursor
+from app.dal.data_version import bump_data_version
 from app.logger.sql_logging import setup_sql_logging
 
 class UserDAO:
@@ -27,4 +28,6 @@ class UserDAO:
             
             self.sql_logger.info(f"Creating new user: {values}")
             cursor.execute(query, values)
-            return cursor.fetchone()[0]
\ No newline at end of file
+            user_id = cursor.fetchone()[0]
+            bump_data_version(cursor)
+            return user_id
\ No newline at end of file
@@ -0,0 +1,114 @@
+from typing import Tuple
+from app.dal.archive_dao import LEDGER_SOURCE
+from app.dal.database import get_cursor, fetch_frame
+from app.dal.ledger_horizon import settled_transaction_id
+from app.logger.sql_logging import setup_sql_logging
+
+ROLLUP_WATERMARK = 'analytics_rollup'
+
+# Folds the transactions with id in (after, upto] into their daily buckets.
+# Counts and totals add up, min/max merge, so a bucket can be extended by
+# any number of batches.
+ROLLUP_BATCH = """
+    INSERT INTO daily_transaction_stats
+        (day, type, account_type, transaction_count, total_amount, min_amount, max_amount)
+    SELECT t.date::date, t.type, COALESCE(a.type, 'unknown'),
+           COUNT(*), SUM(t.amount), MIN(t.amount), MAX(t.amount)
+    FROM {source} t
+    LEFT JOIN accounts a ON a.number = t.account_id
+    WHERE t.id > %s AND t.id <= %s
+    GROUP BY t.date::date, t.type, COALESCE(a.type, 'unknown')
+    ON CONFLICT (day, type, account_type) DO UPDATE
+    SET transaction_count = daily_transaction_stats.transaction_count + EXCLUDED.transaction_count,
+        total_amount = daily_transaction_stats.total_amount + EXCLUDED.total_amount,
+        min_amount = LEAST(daily_transaction_stats.min_amount, EXCLUDED.min_amount),
+        max_amount = GREATEST(daily_transaction_stats.max_amount, EXCLUDED.max_amount)
+"""
+
+
+class WindowStatsDAO:
+    def __init__(self):
+        self.sql_logger = setup_sql_logging()
+
+    def get_watermark(self) -> int:
+        with get_cursor() as cursor:
+            cursor.execute("SELECT last_id FROM job_watermarks WHERE name = %s", (ROLLUP_WATERMARK,))
+            row = cursor.fetchone()
+            return (row[0] or 0) if row else 0
+
+    def roll_up(self, batch_size: int = 100000, settle_timeout: float = 1.0) -> Tuple[int, int]:
+        """Rolls up the next batch of settled transactions; returns (last_id, transactions)."""
+        # Same horizon as the anomaly scoring: ids below it are all final,
+        # whatever their date
+        horizon = settled_transaction_id(settle_timeout)
+        with get_cursor() as cursor:
+            try:
+                # The watermark row lock serializes concurrent roll-ups, so a
+                # batch is never counted twice
+                cursor.execute("""
+                    INSERT INTO job_watermarks (name, last_id) VALUES (%s, 0)
+                    ON CONFLICT (name) DO NOTHING""", (ROLLUP_WATERMARK,))
+                cursor.execute("SELECT last_id FROM job_watermarks WHERE name = %s FOR UPDATE", (ROLLUP_WATERMARK,))
+                after = cursor.fetchone()[0] or 0
+                if horizon is None or horizon <= after:
+                    return after, 0
+
+                cursor.execute("""
+                    SELECT COUNT(*), MAX(id) FROM (
+                        SELECT id FROM transactions
+                        WHERE id > %s AND id <= %s
+                        ORDER BY id
+                        LIMIT %s
+                    ) batch""",
+                    (after, horizon, batch_size)
+                )
+                count, last_id = cursor.fetchone()
+                # A short batch reached the horizon: the ids left in between
+                # were rolled back
+                upto = last_id if count == batch_size else horizon
+                if count:
+                    cursor.execute(ROLLUP_BATCH.format(source='transactions'), (after, upto))
+                cursor.execute("""
+                    UPDATE job_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = %s""", (upto, ROLLUP_WATERMARK))
+                self.sql_logger.info(f"Rolled up {count} transactions into daily buckets up to {upto}")
+                return upto, count
+            except Exception as e:
+                self.sql_logger.error(f"Error rolling up daily transaction stats: {e}")
+                raise
+
+    def rebuild(self, settle_timeout: float = 1.0) -> int:
+        """Recomputes every bucket from the hot and archived ledger."""
+        upto = settled_transaction_id(settle_timeout)
+        if upto is None:
+            raise RuntimeError("Postings still in flight after the settle timeout, rerun the rebuild")
+        with get_cursor() as cursor:
+            try:
+                cursor.execute("""
+                    INSERT INTO job_watermarks (name, last_id) VALUES (%s, 0)
+                    ON CONFLICT (name) DO NOTHING""", (ROLLUP_WATERMARK,))
+                cursor.execute("SELECT last_id FROM job_watermarks WHERE name = %s FOR UPDATE", (ROLLUP_WATERMARK,))
+                cursor.execute("DELETE FROM daily_transaction_stats")
+                cursor.execute(ROLLUP_BATCH.format(source=LEDGER_SOURCE), (0, upto))
+                cursor.execute("""
+                    UPDATE job_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = %s""", (upto, ROLLUP_WATERMARK))
+                self.sql_logger.info(f"Rebuilt daily transaction stats up to transaction {upto}")
+                return upto
+            except Exception as e:
+                self.sql_logger.error(f"Error rebuilding daily transaction stats: {e}")
+                raise
+
+    def get_buckets(self):
+        query = """
+            SELECT day, type, account_type, transaction_count, total_amount, min_amount, max_amount
+            FROM daily_transaction_stats
+            ORDER BY day"""
+        self.sql_logger.info(f"Executing query: {query}")
+        return fetch_frame(query, dtypes={
+            'day': 'datetime64[ns]',
+            'transaction_count': 'int64',
+            'total_amount': 'float64',
+            'min_amount': 'float64',
+            'max_amount': 'float64'
+        })
@@ -1,5 +1,5 @@
 from flask import jsonify, render_template, request
-from werkzeug.exceptions import HTTPException, Forbidden, Unauthorized, NotFound
+from werkzeug.exceptions import HTTPException, Forbidden, Unauthorized, NotFound, TooManyRequests
 from app.logger.app_logging import setup_logging
 
 logger = setup_logging()
@@ -74,6 +74,22 @@ def handle_401(e):
         return jsonify(response), 401
     return render_template('errors/401.html', error=e), 401
 
+def handle_429(retry_after):
+    
+    logger.warning(f"429 Too many requests for path: {request.path} - Retry after {retry_after:.0f}s")
+    headers = {'Retry-After': str(max(1, int(retry_after + 0.999)))}
+    if request.accept_mimetypes.accept_json and \
+       not request.accept_mimetypes.accept_html:
+        response = {
+            "error": "Too many failed attempts, try again later",
+            "code": 429,
+            "status": "error",
+            "path": request.path
+        }
+        return jsonify(response), 429, headers
+    error = TooManyRequests(f"Trop de tentatives échouées. Réessayez dans {retry_after:.0f} secondes.")
+    return render_template('errors/error.html', error=error), 429, headers
+
 def register_error_handlers(app):
     
     app.register_error_handler(HTTPException, handle_http_exception)
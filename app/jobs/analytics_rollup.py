@@ -0,0 +1,29 @@
+import argparse
+import time
+from app.dal.window_stats_dao import WindowStatsDAO
+from app.logger.app_logging import setup_logging
+from app.services.analytics_windows import ROLLUP_INTERVAL, ROLLUP_SETTLE_TIMEOUT, WindowAnalyticsService
+
+logger = setup_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll settled transactions up into the daily analytics buckets")
+    parser.add_argument('--rebuild', action='store_true', help="Drop the buckets and rebuild them from the full ledger")
+    parser.add_argument('--follow', action='store_true', help="Keep polling for new transactions")
+    parser.add_argument('--interval', type=float, default=ROLLUP_INTERVAL, help="Polling interval in seconds with --follow")
+    args = parser.parse_args()
+
+    service = WindowAnalyticsService()
+    if args.rebuild:
+        print(WindowStatsDAO().rebuild(ROLLUP_SETTLE_TIMEOUT))
+    elif not args.follow:
+        print(service.catch_up())
+    else:
+        logger.info(f"Analytics roll-up following new transactions every {args.interval}s")
+        try:
+            while True:
+                service.catch_up()
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            logger.info("Analytics roll-up stopped")
@@ -0,0 +1,28 @@
+import argparse
+import time
+from app.logger.app_logging import setup_logging
+from app.services.anomaly_scoring import AnomalyScoringService
+
+logger = setup_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score new transactions and raise anomaly alerts")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--settle-timeout', type=float, default=1.0,
+                        help="Longest wait in seconds for postings in flight before leaving them for the next pass")
+    parser.add_argument('--follow', action='store_true', help="Keep polling for new transactions")
+    parser.add_argument('--interval', type=float, default=2.0, help="Polling interval in seconds with --follow")
+    args = parser.parse_args()
+
+    service = AnomalyScoringService(args.batch_size, args.settle_timeout)
+    if not args.follow:
+        print(service.catch_up())
+    else:
+        logger.info(f"Anomaly scoring following new transactions every {args.interval}s")
+        try:
+            while True:
+                service.catch_up()
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            logger.info("Anomaly scoring stopped")
@@ -0,0 +1,24 @@
+import argparse
+from app.logger.app_logging import setup_logging
+from app.services.dashboard_snapshots import SNAPSHOT_INTERVAL, SNAPSHOT_JITTER, SnapshotScheduler
+
+logger = setup_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the analytics dashboard snapshots")
+    parser.add_argument('--follow', action='store_true', help="Keep refreshing on the configured cadence")
+    parser.add_argument('--interval', type=float, default=SNAPSHOT_INTERVAL, help="Seconds between refreshes with --follow")
+    parser.add_argument('--jitter', type=float, default=SNAPSHOT_JITTER, help="Random spread, in seconds, around the interval")
+    args = parser.parse_args()
+
+    scheduler = SnapshotScheduler(interval=args.interval, jitter=args.jitter)
+    if not args.follow:
+        print(scheduler.service.refresh())
+    else:
+        logger.info(f"Dashboard snapshots refreshed every {args.interval}s (±{args.jitter}s)")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            logger.info("Dashboard snapshot scheduler stopped")
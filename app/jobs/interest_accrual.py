@@ -0,0 +1,99 @@
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+from app.dal.interest_dao import InterestDAO
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+PERIODS = ('daily', 'monthly')
+
+
+def accrual_period(frequency: str, day: date) -> Tuple[date, date]:
+    if frequency == 'daily':
+        return day, day + timedelta(days=1)
+    if frequency == 'monthly':
+        start = day.replace(day=1)
+        end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return start, end
+    raise ValueError(f"Invalid accrual frequency. Must be one of: {', '.join(PERIODS)}")
+
+
+def last_closed_period(frequency: str, today: date) -> Tuple[date, date]:
+    # The period just before the one today falls in: yesterday, or last month
+    current_start, _ = accrual_period(frequency, today)
+    return accrual_period(frequency, current_start - timedelta(days=1))
+
+
+class InterestAccrualJob:
+    def __init__(self, frequency: str, day: date, chunk_size: int = 50000, dry_run: bool = False):
+        self.period_start, self.period_end = accrual_period(frequency, day)
+        # Interest is only earned once the period is over; posting an open
+        # one would credit days still to come, dated in the future
+        if self.period_end > date.today():
+            raise ValueError(f"Period {self.period_start} - {self.period_end} is not closed yet")
+        self.frequency = frequency
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.interest_dao = InterestDAO()
+
+    def run(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        first_account, last_account = self.interest_dao.get_account_range()
+        result = {
+            'period_start': self.period_start,
+            'period_end': self.period_end,
+            'dry_run': self.dry_run,
+            'accounts': 0,
+            'total_interest': Decimal('0.00')
+        }
+        if first_account is None:
+            logger.info("No savings accounts to accrue interest on")
+            return result
+
+        if self.dry_run:
+            preview = self.interest_dao.preview_accruals(
+                self.period_start, self.period_end, first_account - 1, last_account
+            )
+            result.update(preview)
+            logger.info(f"Dry run {self.period_start} - {self.period_end}: {preview['accounts']} accounts, "
+                        f"total interest MAD{preview['total_interest']}")
+            return result
+
+        # Each chunk of account numbers is its own transaction so a run over
+        # millions of accounts never holds long locks; a failed run is simply
+        # rerun and the already-claimed accounts are skipped.
+        description = f"Interest {self.frequency} {self.period_start.isoformat()}"
+        after_account = first_account - 1
+        while after_account < last_account:
+            upto_account = after_account + self.chunk_size
+            posted = self.interest_dao.post_accruals(
+                self.period_start, self.period_end, after_account, upto_account, description
+            )
+            result['accounts'] += posted['accounts']
+            result['total_interest'] += posted['total_interest']
+            logger.info(f"Accrued interest up to account {min(upto_account, last_account)}: "
+                        f"{result['accounts']} accounts, MAD{result['total_interest']}")
+            after_account = upto_account
+
+        result['elapsed_seconds'] = time.monotonic() - started
+        logger.info(f"Interest accrual {self.period_start} - {self.period_end} posted for "
+                    f"{result['accounts']} accounts, total MAD{result['total_interest']}")
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accrue and post interest on savings accounts")
+    parser.add_argument('--frequency', default='monthly', choices=PERIODS)
+    parser.add_argument('--date', default=None, help="Any day inside the period, YYYY-MM-DD (default: the last closed period)")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if args.date:
+        day = datetime.strptime(args.date, '%Y-%m-%d').date()
+    else:
+        day, _ = last_closed_period(args.frequency, date.today())
+    print(InterestAccrualJob(args.frequency, day, args.chunk_size, args.dry_run).run())
@@ -0,0 +1,56 @@
+import argparse
+from datetime import date
+from typing import Any, Dict
+from app.dal.partition_dao import PartitionDAO, add_months, month_start, partition_name
+from app.jobs.transaction_archive import TransactionArchiveJob
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+MONTHS_AHEAD = 3
+
+
+def ensure_partitions(months_ahead: int = MONTHS_AHEAD) -> Dict[str, Any]:
+    partition_dao = PartitionDAO()
+    if not partition_dao.is_partitioned():
+        raise ValueError("transactions is not partitioned, run the migrate command first")
+
+    current = month_start(date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if partition_dao.create_partition(month):
+            created.append(partition_name(month))
+    logger.info(f"Partition maintenance: created {len(created)} partitions up to {add_months(current, months_ahead)}")
+    return {'created': created}
+
+
+def archive_partitions(retention_months: int) -> Dict[str, Any]:
+    # Expired months go to transactions_archive and the archive horizon moves
+    # with them, so statements, reconciliation and the other full-ledger
+    # readers still see them. Ledger partitions are never dropped.
+    return TransactionArchiveJob(retention_months).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of the transactions table")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help="Convert an unpartitioned transactions table")
+    migrate_parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+
+    ensure_parser = subparsers.add_parser('ensure', help="Create the current and upcoming partitions")
+    ensure_parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+
+    archive_parser = subparsers.add_parser('archive', help="Move partitions older than the retention to the archive")
+    archive_parser.add_argument('--retention-months', type=int, required=True,
+                                help="Number of months (including the current one) kept in the hot table")
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrated = PartitionDAO().migrate_to_partitioned(args.months_ahead)
+        print({'migrated': migrated})
+    elif args.command == 'ensure':
+        print(ensure_partitions(args.months_ahead))
+    else:
+        print(archive_partitions(args.retention_months))
@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from decimal import Decimal
+from itertools import accumulate, groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Tuple
+from app.dal.account_dao import AccountDAO
+from app.logger.app_logging import setup_logging
+from app.models.account import Account
+from app.services.statement_export import EXPORTERS, EXPORT_FORMATS
+
+logger = setup_logging()
+
+CHECKPOINT_FILE = '_checkpoint.json'
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    start = datetime.strptime(month, '%Y-%m')
+    end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+
+def build_statement_rows(rows: List[tuple], opening_balance: Decimal = Decimal('0.00')) -> List[Dict]:
+    balances = accumulate((row[7] for row in rows), initial=opening_balance)
+    next(balances)
+    return [
+        {
+            'id': row[1],
+            'type': row[2],
+            'amount': abs(row[3]),
+            'recipient_account': row[4],
+            'description': row[5],
+            'date': row[6],
+            'transaction_amount': row[7],
+            'running_balance': running_balance
+        }
+        for row, running_balance in zip(rows, balances)
+    ]
+
+
+def write_statement(path: str, export_format: str, account: Account, transactions: List[Dict],
+                    opening_balance: Decimal) -> int:
+    # Written to a temporary file first so an interrupted run never leaves a
+    # truncated statement behind.
+    tmp_path = f"{path}.tmp"
+    if export_format == 'pdf':
+        handle = open(tmp_path, 'wb')
+    else:
+        handle = open(tmp_path, 'w', encoding='utf-8', newline='')
+    with handle:
+        for chunk in EXPORTERS[export_format](account, transactions, opening_balance):
+            handle.write(chunk)
+    os.replace(tmp_path, path)
+    return account.account_number
+
+
+class StatementBatchJob:
+    def __init__(self, output_dir: str, start_date: datetime, end_date: datetime,
+                 export_format: str = 'csv', workers: int = None, progress_every: int = 500):
+        if export_format not in EXPORTERS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        self.output_dir = output_dir
+        self.start_date = start_date
+        self.end_date = end_date
+        self.export_format = export_format
+        self.workers = workers or os.cpu_count() or 1
+        self.progress_every = progress_every
+        self.account_dao = AccountDAO()
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+
+    def _period(self) -> List[str]:
+        return [self.start_date.isoformat(), self.end_date.isoformat()]
+
+    def _statement_path(self, account_number: int) -> str:
+        # The period is part of the name: a file left by another month is
+        # never taken for this month's statement
+        extension = EXPORT_FORMATS[self.export_format][1]
+        period = f"{self.start_date:%Y%m%d}-{self.end_date:%Y%m%d}"
+        return os.path.join(self.output_dir, f"statement_{account_number}_{period}.{extension}")
+
+    def _load_checkpoint(self) -> int:
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('period') != self._period() or checkpoint.get('format') != self.export_format:
+            raise ValueError(
+                f"{self.checkpoint_path} belongs to the run for {checkpoint.get('period')} "
+                f"as {checkpoint.get('format')}: use another output directory or remove it"
+            )
+        return checkpoint['last_account']
+
+    def _save_checkpoint(self, last_account: int) -> None:
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'period': self._period(),
+                'format': self.export_format,
+                'last_account': last_account,
+                'updated_at': datetime.now().isoformat()
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _statements(self, after_account: int) -> Iterator[Tuple[Account, Decimal, List[Dict]]]:
+        # Accounts and ledger rows are both ordered by account number, so the
+        # two streams are merged without holding more than one account in memory.
+        book = groupby(
+            self.account_dao.iter_statement_book(self.start_date, self.end_date, after_account),
+            key=itemgetter(0)
+        )
+        group = next(book, None)
+        for account, opening_balance in self.account_dao.iter_opening_balances(self.start_date, after_account):
+            while group is not None and group[0] < account.account_number:
+                group = next(book, None)
+            rows = []
+            if group is not None and group[0] == account.account_number:
+                rows = list(group[1])
+                group = next(book, None)
+            yield account, opening_balance, build_statement_rows(rows, opening_balance)
+
+    def run(self) -> Dict[str, Any]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        after_account = self._load_checkpoint()
+        total = self.account_dao.count_accounts(after_account)
+        logger.info(f"Generating {total} statements from {self.start_date} to {self.end_date} "
+                    f"after account {after_account} with {self.workers} workers")
+
+        started = time.monotonic()
+        written = skipped = 0
+        submitted = deque()
+        done = set()
+        watermark = after_account
+
+        def collect(futures):
+            nonlocal written, watermark
+            for future in futures:
+                done.add(future.result())
+                written += 1
+            # Only advance the checkpoint over a contiguous run of finished accounts
+            while submitted and submitted[0] in done:
+                watermark = submitted.popleft()
+                done.discard(watermark)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for account, opening_balance, transactions in self._statements(after_account):
+                path = self._statement_path(account.account_number)
+                submitted.append(account.account_number)
+                if os.path.exists(path):
+                    skipped += 1
+                    done.add(account.account_number)
+                else:
+                    pending.add(executor.submit(write_statement, path, self.export_format, account,
+                                                 transactions, opening_balance))
+
+                # Bounded number of in-flight statements keeps memory flat
+                if len(pending) >= self.workers * 4:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+                processed = written + skipped + len(pending)
+                if processed % self.progress_every == 0:
+                    elapsed = time.monotonic() - started
+                    rate = processed / elapsed if elapsed else 0
+                    remaining = (total - processed) / rate if rate else 0
+                    logger.info(f"Statements: {processed}/{total} ({rate:.0f}/s, ~{remaining:.0f}s remaining)")
+                    self._save_checkpoint(watermark)
+
+            finished, _ = wait(pending)
+            collect(finished)
+
+        self._save_checkpoint(watermark)
+        elapsed = time.monotonic() - started
+        logger.info(f"Statement batch finished: {written} written, {skipped} already present in {elapsed:.1f}s")
+        return {
+            'written': written,
+            'skipped': skipped,
+            'last_account': watermark,
+            'elapsed_seconds': elapsed
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate month-end statements for every account")
+    parser.add_argument('--month', required=True, help="Statement month, YYYY-MM")
+    parser.add_argument('--output', required=True, help="Directory for the statement files")
+    parser.add_argument('--format', default='csv', choices=sorted(EXPORTERS))
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    start_date, end_date = month_range(args.month)
+    result = StatementBatchJob(args.output, start_date, end_date, args.format, args.workers).run()
+    print(result)
@@ -0,0 +1,49 @@
+import argparse
+import os
+import time
+from datetime import date
+from typing import Any, Dict
+from app.dal.archive_dao import ArchiveDAO
+from app.dal.partition_dao import add_months, month_start
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+ARCHIVE_AFTER_MONTHS = int(os.getenv('ARCHIVE_AFTER_MONTHS', '12'))
+
+
+class TransactionArchiveJob:
+    def __init__(self, keep_months: int = ARCHIVE_AFTER_MONTHS, today: date = None):
+        if keep_months < 1:
+            raise ValueError("At least the current month must stay in the hot table")
+        self.horizon = add_months(month_start(today or date.today()), -keep_months)
+        self.archive_dao = ArchiveDAO()
+
+    def run(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        result = {'horizon': self.horizon, 'months': 0, 'transactions': 0}
+        oldest = self.archive_dao.get_oldest_hot_date()
+        if oldest is None or oldest.date() >= self.horizon:
+            logger.info(f"Nothing to archive before {self.horizon}")
+            return result
+
+        # Oldest month first, one transaction per month: an interrupted run
+        # leaves the horizon at the last fully archived month.
+        month = month_start(oldest.date())
+        while month < self.horizon:
+            result['transactions'] += self.archive_dao.archive_month(month)
+            result['months'] += 1
+            month = add_months(month, 1)
+
+        result['elapsed_seconds'] = time.monotonic() - started
+        logger.info(f"Archived {result['transactions']} transactions from {result['months']} months "
+                    f"before {self.horizon} in {result['elapsed_seconds']:.1f}s")
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move transactions older than the horizon to the archive")
+    parser.add_argument('--keep-months', type=int, default=ARCHIVE_AFTER_MONTHS,
+                        help="Number of months (including the current one) kept in the hot table")
+    args = parser.parse_args()
+    print(TransactionArchiveJob(args.keep_months).run())
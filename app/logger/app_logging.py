@@ -1,24 +1,34 @@
 import logging
 import os
+import threading
 from datetime import datetime
 
+# Modules call setup_logging() at import; only the first call configures the
+# root handlers, later ones just return the logger.
+_configured = False
+_lock = threading.Lock()
+
 def setup_logging():
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    log_filename = os.path.join(log_dir, 'bank_app.log')
-    
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename),
-            logging.StreamHandler()
-        ]
-    )
+    global _configured
+    with _lock:
+        if not _configured:
+            log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+            if not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+
+            log_filename = os.path.join(log_dir, 'bank_app.log')
+
+            for handler in logging.root.handlers[:]:
+                logging.root.removeHandler(handler)
+
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler(log_filename),
+                    logging.StreamHandler()
+                ]
+            )
+            _configured = True
 
     return logging.getLogger(__name__)
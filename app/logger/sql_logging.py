@@ -3,6 +3,11 @@ import os
 from datetime import datetime
 
 def setup_sql_logging():
+    sql_logger = logging.getLogger('sql_logger')
+    # Every DAO calls this on construction; the handlers are only added once
+    if sql_logger.handlers:
+        return sql_logger
+
     log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
     
     if not os.path.exists(log_dir):
@@ -10,7 +15,6 @@ def setup_sql_logging():
     
     log_filename = os.path.join(log_dir, 'sql.log')
     
-    sql_logger = logging.getLogger('sql_logger')
     sql_logger.setLevel(logging.INFO)
     
     formatter = logging.Formatter('%(asctime)s - SQL - %(levelname)s - Query: %(message)s')
@@ -21,8 +25,6 @@ def setup_sql_logging():
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(formatter)
     
-    sql_logger.handlers.clear()
-    
     sql_logger.addHandler(file_handler)
     sql_logger.addHandler(stream_handler)
     
@@ -1,10 +1,9 @@
-from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import NamedTuple, Optional
 
-@dataclass
-class Account:
+class Account(NamedTuple):
+    # Field order matches ACCOUNT_SELECT so rows map with Account._make
     account_number: int
     user_id: int
     account_type: str
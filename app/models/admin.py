@@ -1,8 +1,7 @@
-from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple
 
-@dataclass
-class Admin:
+class Admin(NamedTuple):
     id: int
     username: str
     password: str
@@ -10,4 +9,4 @@ class Admin:
     role: str
     is_active: bool
     last_login: datetime = None
-    created_at: datetime = None
\ No newline at end of file
+    created_at: datetime = None
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+@dataclass
+class AccountRiskState:
+    account_id: int
+    ewma_amount: float = 0.0
+    ewma_variance: float = 0.0
+    outgoing_count: int = 0
+    burst_start: datetime = None
+    burst_count: int = 0
+    round_streak: int = 0
+    last_transaction_id: int = 0
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from typing import NamedTuple
 
-@dataclass
-class Transaction:
+class Transaction(NamedTuple):
     id: int
     account_number: int
     operation_type: str
@@ -1,8 +1,7 @@
-from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple
 
-@dataclass
-class User:
+class User(NamedTuple):
     id: int
     first_name: str
     last_name: str
@@ -17,4 +16,4 @@ class User:
 
     @property
     def full_name(self):
-        return f"{self.first_name} {self.last_name}"
\ No newline at end of file
+        return f"{self.first_name} {self.last_name}"
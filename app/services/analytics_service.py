@@ -1,27 +1,90 @@
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import numpy as np
+from __future__ import annotations
 from decimal import Decimal
 from datetime import datetime, timedelta
 import io
 import base64
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Any, Optional, List
 from app.dal.analytics_dao import AnalyticsDAO
+from app.dal.database import statement_timeout
+from app.logger.app_logging import setup_logging
+from app.services.anomaly_scoring import AnomalyScoringService
+from app.services.analytics_windows import AnalyticsWindow, WindowAnalyticsService, parse_window
+from app.services.render_profiles import WEBP_QUALITY, RenderProfile
+
+logger = setup_logging()
+
+# pandas, numpy and matplotlib cost most of the app's import time and are only
+# needed to build the dashboard; they are imported on first use.
+pd = plt = matplotlib = Figure = FigureCanvasAgg = None
+_stack_lock = threading.Lock()
+
+def load_analytics_stack() -> None:
+    global pd, plt, matplotlib, Figure, FigureCanvasAgg
+    with _stack_lock:
+        if plt is not None:
+            return
+        started = time.perf_counter()
+        import pandas
+        import matplotlib as mpl
+        mpl.use('Agg')
+        import matplotlib.pyplot as pyplot
+        from matplotlib.figure import Figure as figure_class
+        from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas_class
+        pd, matplotlib, plt = pandas, mpl, pyplot
+        Figure, FigureCanvasAgg = figure_class, canvas_class
+        logger.info(f"Analytics stack loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', '6'))
+DASHBOARD_QUERY_TIMEOUT = float(os.getenv('DASHBOARD_QUERY_TIMEOUT', '10'))
+
+EMPTY_SUMMARY = {
+    'total_accounts': 0,
+    'total_balance': 0,
+    'avg_balance': 0,
+    'savings_count': 0,
+    'checking_count': 0,
+    'avg_savings_rate': 0,
+    'avg_checking_rate': 0,
+    'min_balance': 0,
+    'max_balance': 0,
+    'inactive_accounts': 0
+}
 
 class AnalyticsService:
     def __init__(self):
         self.analytics_dao = AnalyticsDAO()
-        self.setup_style()
-
-    def setup_style(self):
-        """Setup matplotlib style configuration"""
+        self.anomaly_service = AnomalyScoringService()
+        self.window_service = WindowAnalyticsService()
+        self.executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix='dashboard')
         self.colors = ['#4e6e6e', '#acbccc', '#0f323b', '#6b888f', '#2c4f59']
         self.background_color = '#ffffff'
         self.text_color = '#0f323b'
         self.figure_size = (12, 6)
-        
+        self._style_ready = False
+        # Styled figures kept per thread and per layout, cleared between charts
+        self._figures = threading.local()
+
+    def warm_up(self) -> None:
+        """Loads the plotting stack and style ahead of the first dashboard request"""
+        if not self._style_ready:
+            load_analytics_stack()
+            with _stack_lock:
+                if not self._style_ready:
+                    self.setup_style()
+                    # Drawing once builds the font cache the charts need
+                    fig = plt.figure(figsize=(1, 1))
+                    fig.text(0.5, 0.5, 'MAD')
+                    fig.canvas.draw()
+                    plt.close(fig)
+                    self._style_ready = True
+
+    def setup_style(self):
+        """Setup matplotlib style configuration"""
         plt.style.use('default')
         matplotlib.rcParams.update({
             'text.color': self.text_color,
@@ -40,167 +103,228 @@ class AnalyticsService:
             'ytick.labelsize': 10
         })
 
-    def generate_dashboard_data(self) -> Dict[str, Any]:
-        try:
-            # Fetch all data
-            summary = self.analytics_dao.get_accounts_summary()
-            trends = self.analytics_dao.get_transaction_trends(days=90)
-            demographics = self.analytics_dao.get_user_demographics()
-            account_types = self.analytics_dao.get_account_type_distribution()
-            monthly_growth = self.analytics_dao.get_monthly_growth()
-
-            # Convert data to DataFrames for analysis
-            trends_df = pd.DataFrame(trends) if trends else pd.DataFrame()
-            if not trends_df.empty:
-                trends_df['total_amount'] = trends_df['total_amount'].astype(float)
-                trends_df['avg_amount'] = trends_df['avg_amount'].astype(float)
-
-            # Calculate metrics
-            metrics = self._calculate_metrics(trends_df, demographics, account_types, monthly_growth)
-
-            # Generate charts
-            charts = {
-                'trends_chart': self._generate_trends_chart(trends_df),
-                'volume_chart': self._generate_volume_chart(trends_df),
-                'demographics_chart': self._generate_demographics_chart(demographics),
-                'account_type_chart': self._generate_account_type_chart(account_types),
-                'growth_chart': self._generate_growth_chart(monthly_growth)
-            }
-
-            return {
-                'summary': summary,
-                'metrics': metrics,
-                **charts
-            }
-
-        except Exception as e:
-            import traceback
-            print(f"Error generating dashboard data: {str(e)}")
-            print(traceback.format_exc())
-            return self._get_error_response()
-
-    def _calculate_metrics(self, trends_df: pd.DataFrame, demographics: List[Dict], 
-                         account_types: List[Dict], monthly_growth: List[Dict]) -> Dict[str, Dict]:
+    def _dataset_queries(self, window: AnalyticsWindow) -> Dict[str, Any]:
         return {
-            'transaction_metrics': self._calculate_transaction_metrics(trends_df),
-            'user_metrics': self._calculate_user_metrics(demographics),
-            'account_metrics': self._calculate_account_metrics(account_types),
-            'growth_metrics': self._calculate_growth_metrics(monthly_growth)
+            'summary': self.analytics_dao.get_accounts_summary,
+            'trends': lambda: self.window_service.trends(window),
+            'demographics': self.analytics_dao.get_user_demographics,
+            'account_types': self.analytics_dao.get_account_type_distribution,
+            'monthly_growth': lambda: self.analytics_dao.get_monthly_growth(window.growth_start, window.end),
+            'alerts': self.anomaly_service.get_dashboard_alerts
         }
 
-    def _calculate_transaction_metrics(self, df: pd.DataFrame) -> Dict[str, float]:
-        if df.empty:
-            return {
-                'total_volume': 0,
-                'total_volume_90days': 0,
-                'avg_transaction_size': 0,
-                'max_daily_volume': 0,
-                'transaction_growth': 0
-            }
-
+    def _dataset_fallbacks(self) -> Dict[str, Any]:
         return {
-            'total_volume': float(df['total_amount'].sum()),
-            'total_volume_90days': float(df['total_amount'].sum()),
-            'avg_transaction_size': float(df['avg_amount'].mean()),
-            'max_daily_volume': int(df.groupby('trans_date')['transaction_count'].sum().max()),
-            'transaction_growth': float(df.groupby('trans_date')['transaction_count'].sum().pct_change().mean() * 100)
+            'summary': dict(EMPTY_SUMMARY),
+            # Frame datasets; None becomes an empty DataFrame in _build_dashboard
+            'trends': None,
+            'demographics': None,
+            'account_types': None,
+            'monthly_growth': None,
+            'alerts': {'open_count': 0, 'recent': []}
         }
 
-    def _calculate_user_metrics(self, demographics: List[Dict]) -> Dict[str, Any]:
-        if not demographics:
-            return {
-                'total_users': 0,
-                'active_users': 0,
-                'inactive_users': 0,
-                'avg_user_age': 0,
-                'total_unique_jobs': 0
+    def _run_query(self, name: str, query) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            # Past the timeout nobody waits for the result any more
+            with statement_timeout(DASHBOARD_QUERY_TIMEOUT):
+                result, error = query(), None
+        except Exception as e:
+            logger.error(f"Dashboard query {name} failed: {str(e)}")
+            result, error = None, str(e)
+        return {'result': result, 'error': error, 'ms': (time.perf_counter() - started) * 1000}
+
+    def _collect(self, outcomes: Dict[str, Optional[Dict[str, Any]]], window: AnalyticsWindow,
+                 profile: RenderProfile) -> Dict[str, Any]:
+        # A failed or timed out query falls back to its empty dataset; the
+        # rest of the dashboard is still rendered.
+        datasets = self._dataset_fallbacks()
+        timings, errors = {}, {}
+        for name, outcome in outcomes.items():
+            if outcome is None:
+                errors[name] = f"timed out after {DASHBOARD_QUERY_TIMEOUT:.0f}s"
+                continue
+            timings[name] = round(outcome['ms'], 1)
+            if outcome['error']:
+                errors[name] = outcome['error']
+            else:
+                datasets[name] = outcome['result']
+        logger.info(f"Dashboard queries: {timings}" + (f", failed: {sorted(errors)}" if errors else ""))
+        dashboard = self._build_dashboard(datasets, window, profile)
+        dashboard['timings'] = timings
+        dashboard['dataset_errors'] = errors
+        return dashboard
+
+    def generate_dashboard_data(self, window: AnalyticsWindow = None,
+                                profile: RenderProfile = None) -> Dict[str, Any]:
+        window = window or parse_window({})
+        profile = profile or RenderProfile()
+        try:
+            # The queries are independent: each runs on the pool with its own connection
+            futures = {
+                name: self.executor.submit(self._run_query, name, query)
+                for name, query in self._dataset_queries(window).items()
             }
+            wait(futures.values(), timeout=DASHBOARD_QUERY_TIMEOUT)
+            return self._collect({
+                name: future.result() if future.done() else None
+                for name, future in futures.items()
+            }, window, profile)
+        except Exception as e:
+            logger.exception(f"Error generating dashboard data: {str(e)}")
+            return self._get_error_response(window, profile)
 
-        df = pd.DataFrame(demographics)
-        return {
-            'total_users': int(df['count'].sum()),
-            'active_users': int(df['active_users'].sum()),
-            'inactive_users': int(df['inactive_users'].sum()),
-            'avg_user_age': float(df['avg_age'].mean()),
-            'total_unique_jobs': int(df['unique_jobs'].sum())
-        }
-
-    def _calculate_account_metrics(self, account_types: List[Dict]) -> Dict[str, Any]:
-        if not account_types:
-            return {
-                'total_active_accounts': 0,
-                'total_inactive_accounts': 0,
-                'avg_balance_active': 0,
-                'highest_balance_type': 'N/A'
+    async def generate_dashboard_data_async(self, window: AnalyticsWindow = None,
+                                            profile: RenderProfile = None) -> Dict[str, Any]:
+        window = window or parse_window({})
+        profile = profile or RenderProfile()
+        try:
+            queries = self._dataset_queries(window)
+            tasks = {
+                name: asyncio.ensure_future(asyncio.to_thread(self._run_query, name, query))
+                for name, query in queries.items()
             }
+            _, pending = await asyncio.wait(tasks.values(), timeout=DASHBOARD_QUERY_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            return self._collect({
+                name: task.result() if task.done() else None
+                for name, task in tasks.items()
+            }, window, profile)
+        except Exception as e:
+            logger.exception(f"Error generating dashboard data: {str(e)}")
+            return self._get_error_response(window, profile)
 
-        df = pd.DataFrame(account_types)
+    def get_window_trends(self, window: AnalyticsWindow) -> Dict[str, Any]:
+        trends = self.window_service.trends(window)
         return {
-            'total_active_accounts': int(df['active_accounts'].sum()),
-            'total_inactive_accounts': int(df['inactive_accounts'].sum()),
-            'avg_balance_active': float(df['avg_active_balance'].mean()),
-            'highest_balance_type': df.loc[df['avg_balance'].idxmax(), 'type'] if not df.empty else 'N/A'
+            'window': window.to_dict(),
+            'totals': self.window_service.totals(window),
+            'series': [
+                {
+                    'date': row['trans_date'].date().isoformat(),
+                    'type': row['type'],
+                    'transaction_count': int(row['transaction_count']),
+                    'total_amount': round(float(row['total_amount']), 2),
+                    'avg_amount': round(float(row['avg_amount']), 2),
+                    'min_amount': float(row['min_amount']),
+                    'max_amount': float(row['max_amount'])
+                }
+                for row in trends.to_dict('records')
+            ]
         }
 
-    def _calculate_growth_metrics(self, monthly_growth: List[Dict]) -> Dict[str, float]:
-        if not monthly_growth:
-            return {
-                'avg_monthly_growth': 0,
-                'latest_growth': 0,
-                'active_accounts_trend': 0
-            }
+    def _build_dashboard(self, datasets: Dict[str, Any], window: AnalyticsWindow,
+                         profile: RenderProfile) -> Dict[str, Any]:
+        self.warm_up()
+        # The DAO returns typed DataFrames, ready for the metrics and charts
+        trends_df, demographics, account_types, monthly_growth = (
+            datasets[name] if datasets[name] is not None else pd.DataFrame()
+            for name in ('trends', 'demographics', 'account_types', 'monthly_growth')
+        )
+
+        # Part of the analytics stack, so only imported once it is needed
+        from app.services.metrics_engine import build_metrics_bundle
+        bundle = build_metrics_bundle(trends_df, demographics, account_types, monthly_growth)
+
+        charts, render_stats = self._render_charts({
+            'trends_chart': lambda: self._generate_trends_chart(bundle, window.label, profile),
+            'volume_chart': lambda: self._generate_volume_chart(bundle, profile),
+            'demographics_chart': lambda: self._generate_demographics_chart(bundle.demographics, profile),
+            'account_type_chart': lambda: self._generate_account_type_chart(bundle.account_types, profile),
+            'growth_chart': lambda: self._generate_growth_chart(bundle.monthly_growth, profile)
+        })
 
-        df = pd.DataFrame(monthly_growth)
         return {
-            'avg_monthly_growth': float(df['growth_rate'].mean()),
-            'latest_growth': float(df['growth_rate'].iloc[-1]) if not df.empty else 0,
-            'active_accounts_trend': float(df['active_accounts'].pct_change().mean() * 100)
+            'summary': datasets['summary'],
+            'metrics': bundle.metrics,
+            'alerts': datasets['alerts'],
+            'window': window.to_dict(),
+            'render': profile.to_dict(),
+            'render_stats': render_stats,
+            **charts
         }
 
-    def _generate_trends_chart(self, df: pd.DataFrame) -> str:
-        if df.empty:
-            return self._get_empty_chart("No Transaction Data Available")
-
-        fig, ax = plt.subplots(figsize=self.figure_size)
-        
-        for i, trans_type in enumerate(df['type'].unique()):
-            type_data = df[df['type'] == trans_type]
-            dates = pd.to_datetime(type_data['trans_date'])
-            amounts = type_data['total_amount'].values
-
+    def _render_charts(self, renderers: Dict[str, Any]):
+        charts, stats = {}, {}
+        for name, render in renderers.items():
+            started = time.perf_counter()
+            charts[name] = render()
+            stats[name] = {
+                'ms': round((time.perf_counter() - started) * 1000, 1),
+                # Size of the image itself, before base64
+                'bytes': len(charts[name]) * 3 // 4 - charts[name][-2:].count('=')
+            }
+        logger.info(f"Dashboard charts rendered in {sum(s['ms'] for s in stats.values()):.0f}ms, "
+                    f"{sum(s['bytes'] for s in stats.values()) // 1024}KB: {stats}")
+        return charts, stats
+
+    def _figure(self, profile: RenderProfile, size, nrows: int = 1, ncols: int = 1):
+        """This thread's styled figure for the layout, cleared and resized.
+
+        Figures are reused rather than created through pyplot for every
+        chart, which also keeps chart rendering off pyplot's global state.
+        """
+        figures = self._figures.__dict__
+        fig = figures.get((nrows, ncols))
+        if fig is None:
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            figures[(nrows, ncols)] = fig
+        else:
+            fig.clear()
+        fig.set_size_inches(profile.figure_size(size))
+        fig.set_dpi(profile.dpi)
+        return fig, fig.subplots(nrows, ncols)
+
+    def _downsample(self, profile: RenderProfile, x, *series):
+        from app.services.metrics_engine import lttb
+        kept = lttb(x, series[0], profile.max_points)
+        if len(kept) == len(x):
+            return (x, *series)
+        return (x[kept], *(None if values is None else values[kept] for values in series))
+
+    def _generate_trends_chart(self, bundle, label: str, profile: RenderProfile) -> str:
+        if bundle.trends.empty:
+            return self._get_empty_chart("No Transaction Data Available", profile)
+
+        fig, ax = self._figure(profile, self.figure_size)
+
+        for i, (trans_type, series) in enumerate(bundle.by_type.items()):
+            dates, amounts, trend = self._downsample(profile, series.dates, series.amounts, series.trend)
             # Plot actual data
             ax.plot(dates, amounts, label=trans_type,
                    color=self.colors[i % len(self.colors)],
                    linewidth=2.5, marker='o', markersize=4)
 
             # Add trend line
-            if len(dates) > 1:
-                x = np.arange(len(dates))
-                z = np.polyfit(x, amounts, 1)
-                p = np.poly1d(z)
-                ax.plot(dates, p(x), linestyle='--',
+            if trend is not None:
+                ax.plot(dates, trend, linestyle='--',
                        color=self.colors[i % len(self.colors)],
                        alpha=0.5, label=f'{trans_type} Trend')
 
-        ax.set_title('Transaction Trends (90 Days)', pad=20, fontweight='bold')
+        ax.set_title(f'Transaction Trends ({label})', pad=20, fontweight='bold')
         ax.set_xlabel('Date')
         ax.set_ylabel('Amount (MAD)')
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        return self._get_plot_image()
+        fig.tight_layout()
+        return self._get_plot_image(fig, profile)
 
-    def _generate_volume_chart(self, df: pd.DataFrame) -> str:
-        if df.empty:
-            return self._get_empty_chart("No Volume Data Available")
+    def _generate_volume_chart(self, bundle, profile: RenderProfile) -> str:
+        if bundle.trends.empty:
+            return self._get_empty_chart("No Volume Data Available", profile)
 
-        daily_volume = df.groupby('trans_date')['transaction_count'].sum()
-        rolling_avg = daily_volume.rolling(window=7, min_periods=1).mean()
+        volume_dates, daily_volume = self._downsample(
+            profile, bundle.daily_volume.index.to_numpy(), bundle.daily_volume.to_numpy())
+        rolling_dates, rolling_avg = self._downsample(
+            profile, bundle.rolling_volume.index.to_numpy(), bundle.rolling_volume.to_numpy())
 
-        fig, ax = plt.subplots(figsize=self.figure_size)
-        ax.plot(daily_volume.index, daily_volume.values,
+        fig, ax = self._figure(profile, self.figure_size)
+        ax.plot(volume_dates, daily_volume,
                color=self.colors[0], linewidth=2.5,
                marker='o', markersize=4, label='Daily Volume')
-        ax.plot(rolling_avg.index, rolling_avg.values,
+        ax.plot(rolling_dates, rolling_avg,
                color=self.colors[1], linewidth=2,
                linestyle='--', label='7-Day Average')
 
@@ -208,15 +332,14 @@ class AnalyticsService:
         ax.set_xlabel('Date')
         ax.set_ylabel('Number of Transactions')
         ax.legend()
-        plt.tight_layout()
-        return self._get_plot_image()
+        fig.tight_layout()
+        return self._get_plot_image(fig, profile)
 
-    def _generate_demographics_chart(self, demographics: List[Dict]) -> str:
-        if not demographics:
-            return self._get_empty_chart("No Demographics Data Available")
+    def _generate_demographics_chart(self, df: pd.DataFrame, profile: RenderProfile) -> str:
+        if df.empty:
+            return self._get_empty_chart("No Demographics Data Available", profile)
 
-        df = pd.DataFrame(demographics)
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
+        fig, (ax1, ax2) = self._figure(profile, (15, 7), 1, 2)
         
         # Gender distribution
         ax1.pie(df['count'], labels=df['gender'],
@@ -238,15 +361,14 @@ class AnalyticsService:
                     f'Range: {int(row["min_age"])}-{int(row["max_age"])}',
                     ha='center', va='bottom')
 
-        plt.tight_layout()
-        return self._get_plot_image()
+        fig.tight_layout()
+        return self._get_plot_image(fig, profile)
 
-    def _generate_account_type_chart(self, account_types: List[Dict]) -> str:
-        if not account_types:
-            return self._get_empty_chart("No Account Type Data Available")
+    def _generate_account_type_chart(self, df: pd.DataFrame, profile: RenderProfile) -> str:
+        if df.empty:
+            return self._get_empty_chart("No Account Type Data Available", profile)
 
-        df = pd.DataFrame(account_types)
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
+        fig, (ax1, ax2) = self._figure(profile, (15, 7), 1, 2)
         
         # Account type distribution
         ax1.pie(df['count'], labels=df['type'],
@@ -268,15 +390,14 @@ class AnalyticsService:
                     f'MAD{height:,.0f}',
                     ha='center', va='bottom')
 
-        plt.tight_layout()
-        return self._get_plot_image()
+        fig.tight_layout()
+        return self._get_plot_image(fig, profile)
 
-    def _generate_growth_chart(self, monthly_growth: List[Dict]) -> str:
-        if not monthly_growth:
-            return self._get_empty_chart("No Growth Data Available")
+    def _generate_growth_chart(self, df: pd.DataFrame, profile: RenderProfile) -> str:
+        if df.empty:
+            return self._get_empty_chart("No Growth Data Available", profile)
 
-        df = pd.DataFrame(monthly_growth)
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
+        fig, (ax1, ax2) = self._figure(profile, (15, 7), 1, 2)
         
         # Monthly growth rate
         ax1.plot(df['month'], df['growth_rate'],
@@ -296,41 +417,41 @@ class AnalyticsService:
         ax2.set_ylabel('Number of Active Accounts')
         ax2.tick_params(axis='x', rotation=45)
 
-        plt.tight_layout()
-        return self._get_plot_image()
+        fig.tight_layout()
+        return self._get_plot_image(fig, profile)
 
-    def _get_empty_chart(self, message: str) -> str:
-        fig, ax = plt.subplots(figsize=(10, 6))
+    def _get_empty_chart(self, message: str, profile: RenderProfile) -> str:
+        fig, ax = self._figure(profile, (10, 6))
         ax.text(0.5, 0.5, message,
                 ha='center', va='center',
                 fontsize=14, color=self.text_color)
         ax.set_axis_off()
-        return self._get_plot_image()
+        return self._get_plot_image(fig, profile)
 
-    def _get_plot_image(self) -> str:
+    def _get_plot_image(self, fig, profile: RenderProfile) -> str:
+        # tight_layout already fits the labels and legends, so the figure is
+        # saved as is instead of paying bbox_inches='tight' an extra draw
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        image_png = buffer.getvalue()
+        if profile.format == 'webp':
+            # Encoded by Pillow from the Agg buffer (matplotlib's own WebP
+            # output needs a newer release than the pinned one)
+            from PIL import Image
+            fig.canvas.draw()
+            image = Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+        else:
+            fig.savefig(buffer, format=profile.format, dpi=profile.dpi)
+        image_bytes = buffer.getvalue()
         buffer.close()
-        plt.close('all')
-        return base64.b64encode(image_png).decode()
+        return base64.b64encode(image_bytes).decode()
 
-    def _get_error_response(self) -> Dict[str, Any]:
+    def _get_error_response(self, window: AnalyticsWindow, profile: RenderProfile) -> Dict[str, Any]:
+        self.warm_up()
         return {
             'error': 'Error generating dashboard data',
-            'summary': {
-                'total_accounts': 0,
-                'total_balance': 0,
-                'avg_balance': 0,
-                'savings_count': 0,
-                'checking_count': 0,
-                'avg_savings_rate': 0,
-                'avg_checking_rate': 0,
-                'min_balance': 0,
-                'max_balance': 0,
-                'inactive_accounts': 0
-            },
+            'window': window.to_dict(),
+            'render': profile.to_dict(),
+            'summary': dict(EMPTY_SUMMARY),
             'metrics': {
                 'transaction_metrics': {
                     'total_volume': 0,
@@ -358,9 +479,10 @@ class AnalyticsService:
                     'active_accounts_trend': 0
                 }
             },
-            'trends_chart': self._get_empty_chart("No Data Available"),
-            'volume_chart': self._get_empty_chart("No Data Available"),
-            'demographics_chart': self._get_empty_chart("No Data Available"),
-            'account_type_chart': self._get_empty_chart("No Data Available"),
-            'growth_chart': self._get_empty_chart("No Data Available")
+            'trends_chart': self._get_empty_chart("No Data Available", profile),
+            'volume_chart': self._get_empty_chart("No Data Available", profile),
+            'demographics_chart': self._get_empty_chart("No Data Available", profile),
+            'account_type_chart': self._get_empty_chart("No Data Available", profile),
+            'growth_chart': self._get_empty_chart("No Data Available", profile),
+            'alerts': {'open_count': 0, 'recent': []}
         }
\ No newline at end of file
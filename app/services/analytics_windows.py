@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Mapping, Optional
+from app.dal.window_stats_dao import WindowStatsDAO
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+WINDOW_PRESETS = {'7d': 7, '30d': 30, '90d': 90, '365d': 365}
+DEFAULT_WINDOW = '90d'
+GRANULARITIES = ('day', 'week', 'month')
+ACCOUNT_TYPES = ('savings', 'checking')
+MAX_WINDOW_DAYS = int(os.getenv('ANALYTICS_MAX_WINDOW_DAYS', '3660'))
+# Monthly growth always looks back at least this far from the window end
+GROWTH_MIN_DAYS = 365
+
+ROLLUP_INTERVAL = float(os.getenv('ANALYTICS_ROLLUP_INTERVAL', '5'))
+ROLLUP_BATCH_SIZE = int(os.getenv('ANALYTICS_ROLLUP_BATCH_SIZE', '100000'))
+# Longest wait for postings in flight before a roll-up gives up until the next one
+ROLLUP_SETTLE_TIMEOUT = float(os.getenv('ANALYTICS_ROLLUP_SETTLE_TIMEOUT', '1'))
+
+
+@dataclass(frozen=True)
+class AnalyticsWindow:
+    start: date
+    # Exclusive
+    end: date
+    granularity: str = 'day'
+    account_type: Optional[str] = None
+    preset: Optional[str] = DEFAULT_WINDOW
+
+    @property
+    def label(self) -> str:
+        if self.preset:
+            return f"Last {WINDOW_PRESETS[self.preset]} Days"
+        return f"{self.start.isoformat()} to {(self.end - timedelta(days=1)).isoformat()}"
+
+    @property
+    def growth_start(self) -> date:
+        return min(self.start, self.end - timedelta(days=GROWTH_MIN_DAYS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window': self.preset or 'custom',
+            'start': self.start.isoformat(),
+            'end': (self.end - timedelta(days=1)).isoformat(),
+            'granularity': self.granularity,
+            'account_type': self.account_type,
+            'label': self.label
+        }
+
+
+def parse_window(args: Mapping, today: date = None) -> AnalyticsWindow:
+    """Builds a window from query parameters: window=7d|30d|90d|365d, or
+    start/end (YYYY-MM-DD, end inclusive), plus granularity and account_type."""
+    today = today or date.today()
+    granularity = args.get('granularity') or 'day'
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}. Use one of {', '.join(GRANULARITIES)}")
+    account_type = args.get('account_type') or None
+    if account_type is not None and account_type not in ACCOUNT_TYPES:
+        raise ValueError(f"Invalid account type: {account_type}")
+
+    if args.get('start') or args.get('end'):
+        try:
+            start = datetime.strptime(args.get('start'), '%Y-%m-%d').date()
+            end = datetime.strptime(args.get('end') or today.isoformat(), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError("Invalid date format. Use YYYY-MM-DD")
+        if start > end:
+            raise ValueError("Start date must be before end date")
+        if (end - start).days >= MAX_WINDOW_DAYS:
+            raise ValueError(f"Windows are limited to {MAX_WINDOW_DAYS} days")
+        return AnalyticsWindow(start, end + timedelta(days=1), granularity, account_type, preset=None)
+
+    preset = args.get('window') or DEFAULT_WINDOW
+    if preset not in WINDOW_PRESETS:
+        raise ValueError(f"Invalid window: {preset}. Use one of {', '.join(WINDOW_PRESETS)} or start/end")
+    # Same bounds as the former fixed query: from today - N days up to today included
+    return AnalyticsWindow(today - timedelta(days=WINDOW_PRESETS[preset]), today + timedelta(days=1),
+                           granularity, account_type, preset)
+
+
+class WindowAnalyticsService:
+    """Serves window queries from the daily buckets kept in memory.
+
+    Requests never roll up: app/jobs/analytics_rollup.py --follow, or the
+    dashboard snapshot refresh, keeps daily_transaction_stats up to date.
+    Requests only read the roll-up watermark (at most every ROLLUP_INTERVAL
+    seconds) and reload the buckets when it moved.
+    """
+
+    def __init__(self, refresh_interval: float = ROLLUP_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.window_stats_dao = WindowStatsDAO()
+        self._lock = threading.Lock()
+        self._buckets = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def catch_up(self) -> Dict[str, int]:
+        last_id, rolled = self.window_stats_dao.get_watermark(), 0
+        while True:
+            last_id, count = self.window_stats_dao.roll_up(ROLLUP_BATCH_SIZE, ROLLUP_SETTLE_TIMEOUT)
+            rolled += count
+            if count < ROLLUP_BATCH_SIZE:
+                break
+        return {'last_id': last_id, 'rolled_up': rolled}
+
+    def _refresh(self) -> None:
+        # Caller holds self._lock
+        if self._buckets is None or time.monotonic() - self._checked_at >= self.refresh_interval:
+            last_id = self.window_stats_dao.get_watermark()
+            if self._buckets is None or last_id != self._version:
+                # Imported here: part of the analytics stack
+                from app.services.metrics_engine import DailyBuckets
+                started = time.perf_counter()
+                self._buckets = DailyBuckets(self.window_stats_dao.get_buckets())
+                self._version = last_id
+                logger.info(f"Daily buckets reloaded up to transaction {last_id} "
+                            f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+            self._checked_at = time.monotonic()
+
+    def get_buckets(self):
+        with self._lock:
+            self._refresh()
+            return self._buckets
+
+    def buckets_version(self) -> int:
+        """Watermark of the buckets the next window query will be served from"""
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def trends(self, window: AnalyticsWindow):
+        return self.get_buckets().trends(window)
+
+    def totals(self, window: AnalyticsWindow) -> Dict[str, Dict[str, float]]:
+        return self.get_buckets().totals(window)
@@ -0,0 +1,159 @@
+import math
+import os
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+from app.dal.anomaly_dao import AnomalyDAO
+from app.logger.app_logging import setup_logging
+from app.models.risk_state import AccountRiskState
+
+logger = setup_logging()
+
+EWMA_ALPHA = float(os.getenv('ANOMALY_EWMA_ALPHA', '0.1'))
+SPIKE_Z_SCORE = float(os.getenv('ANOMALY_SPIKE_Z_SCORE', '4'))
+SPIKE_MIN_HISTORY = int(os.getenv('ANOMALY_SPIKE_MIN_HISTORY', '5'))
+LARGE_WITHDRAWAL_RATIO = float(os.getenv('ANOMALY_LARGE_WITHDRAWAL_RATIO', '0.5'))
+BURST_WINDOW = timedelta(seconds=int(os.getenv('ANOMALY_BURST_WINDOW_SECONDS', '600')))
+BURST_COUNT = int(os.getenv('ANOMALY_BURST_COUNT', '5'))
+ROUND_UNIT = Decimal(os.getenv('ANOMALY_ROUND_UNIT', '100'))
+ROUND_STREAK = int(os.getenv('ANOMALY_ROUND_STREAK', '3'))
+
+OUTGOING_TYPES = ('WITHDRAW', 'TRANSFER')
+
+RULE_LABELS = {
+    'large_withdrawal': 'Retrait important',
+    'amount_spike': 'Montant inhabituel',
+    'transfer_burst': 'Rafale de virements',
+    'round_amounts': 'Montants ronds répétés'
+}
+
+
+class AnomalyScorer:
+    """Scores outgoing transactions against the sender's rolling statistics.
+
+    Every rule only reads and updates the sender's AccountRiskState, so each
+    transaction costs O(1) whatever the account history.
+    """
+
+    def score(self, transaction: tuple, state: AccountRiskState, balance_before: Decimal) -> List[Dict[str, Any]]:
+        transaction_id, account_id, operation, amount, _, date = transaction
+        state.last_transaction_id = transaction_id
+        if operation not in OUTGOING_TYPES:
+            return []
+
+        alerts = []
+        value = float(amount)
+
+        def alert(rule: str, score: float) -> None:
+            alerts.append({
+                'transaction_id': transaction_id,
+                'account_id': account_id,
+                'rule': rule,
+                'score': round(score, 2),
+                'amount': amount,
+                'date': date
+            })
+
+        if balance_before > 0 and amount >= balance_before * Decimal(str(LARGE_WITHDRAWAL_RATIO)):
+            alert('large_withdrawal', float(amount / balance_before))
+
+        # Compared with the statistics before this transaction is folded in
+        if state.outgoing_count >= SPIKE_MIN_HISTORY and state.ewma_variance > 0:
+            z_score = (value - state.ewma_amount) / math.sqrt(state.ewma_variance)
+            if z_score >= SPIKE_Z_SCORE:
+                alert('amount_spike', z_score)
+
+        if state.outgoing_count == 0:
+            state.ewma_amount = value
+        else:
+            diff = value - state.ewma_amount
+            increment = EWMA_ALPHA * diff
+            state.ewma_amount += increment
+            state.ewma_variance = (1 - EWMA_ALPHA) * (state.ewma_variance + diff * increment)
+        state.outgoing_count += 1
+
+        if operation == 'TRANSFER':
+            if state.burst_start is None or date - state.burst_start > BURST_WINDOW:
+                state.burst_start, state.burst_count = date, 1
+            else:
+                state.burst_count += 1
+            if state.burst_count >= BURST_COUNT:
+                alert('transfer_burst', state.burst_count)
+
+        if amount % ROUND_UNIT == 0:
+            state.round_streak += 1
+            if state.round_streak >= ROUND_STREAK:
+                alert('round_amounts', state.round_streak)
+        else:
+            state.round_streak = 0
+
+        return alerts
+
+
+def balances_before(transactions: List[tuple], balances: Dict[int, Decimal]) -> Dict[int, Decimal]:
+    # Walks the batch backwards from the balances just after its last
+    # transaction, undoing each posting, to get the sender's balance just
+    # before every transaction.
+    balances = dict(balances)
+    before = {}
+    for transaction_id, account_id, operation, amount, recipient_account, _ in reversed(transactions):
+        if operation == 'DEPOSIT':
+            balances[account_id] = balances.get(account_id, Decimal('0')) - amount
+        else:
+            balances[account_id] = balances.get(account_id, Decimal('0')) + amount
+            if operation == 'TRANSFER' and recipient_account is not None:
+                balances[recipient_account] = balances.get(recipient_account, Decimal('0')) - amount
+        before[transaction_id] = balances[account_id]
+    return before
+
+
+class AnomalyScoringService:
+    def __init__(self, batch_size: int = 5000, settle_timeout: float = 1.0):
+        self.batch_size = batch_size
+        self.settle_timeout = settle_timeout
+        self.anomaly_dao = AnomalyDAO()
+        self.scorer = AnomalyScorer()
+
+    def process_batch(self, after_id: int) -> Tuple[int, int, int]:
+        """Scores the next batch of transactions; returns (last_id, scored, alerts)."""
+        transactions = self.anomaly_dao.get_new_transactions(after_id, self.batch_size, self.settle_timeout)
+        if not transactions:
+            return after_id, 0, 0
+
+        account_ids = {row[1] for row in transactions}
+        touched = account_ids | {row[4] for row in transactions if row[4] is not None}
+        states = self.anomaly_dao.get_states(account_ids)
+        before = balances_before(transactions, self.anomaly_dao.get_balances(touched, transactions[-1][0]))
+
+        alerts = []
+        for transaction in transactions:
+            account_id = transaction[1]
+            state = states.get(account_id)
+            if state is None:
+                state = states[account_id] = AccountRiskState(account_id=account_id)
+            if transaction[0] <= state.last_transaction_id:
+                continue
+            alerts.extend(self.scorer.score(transaction, state, before[transaction[0]]))
+
+        last_id = transactions[-1][0]
+        self.anomaly_dao.save_batch(states.values(), alerts, last_id)
+        return last_id, len(transactions), len(alerts)
+
+    def catch_up(self) -> Dict[str, Any]:
+        last_id = self.anomaly_dao.get_watermark()
+        scored = raised = 0
+        while True:
+            last_id, count, alerts = self.process_batch(last_id)
+            scored += count
+            raised += alerts
+            if count < self.batch_size:
+                break
+        if scored:
+            logger.info(f"Anomaly scoring: {scored} transactions scored up to {last_id}, {raised} alerts raised")
+        return {'last_id': last_id, 'scored': scored, 'alerts': raised}
+
+    def get_dashboard_alerts(self, limit: int = 20) -> Dict[str, Any]:
+        alerts = self.anomaly_dao.get_recent_alerts(limit)
+        for alert in alerts:
+            alert['label'] = RULE_LABELS.get(alert['rule'], alert['rule'])
+        return {'open_count': self.anomaly_dao.count_open_alerts(), 'recent': alerts}
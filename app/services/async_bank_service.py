@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from werkzeug.exceptions import NotFound
+from app.dal.async_account_dao import AsyncAccountDAO
+from app.models.account import Account
+from app.logger.app_logging import setup_logging
+from app.services.bank_service import BankService
+from app.services.registry import get_service
+
+logger = setup_logging()
+
+
+class AsyncBankService:
+    def __init__(self, bank_service: BankService = None):
+        self.account_dao = AsyncAccountDAO()
+        # Postings keep going through the sync service (validation,
+        # idempotency, group commit) and run on a worker thread.
+        self.bank_service = bank_service or get_service('bank')
+
+    async def get_account(self, account_number: int) -> Account:
+        logger.info(f"Fetching account {account_number}")
+        account = await self.account_dao.get_account_by_number(account_number)
+        if not account:
+            logger.warning(f"Account {account_number} not found")
+            raise NotFound(f"Account {account_number} not found")
+        return account
+
+    async def get_account_version(self, account_number: int) -> Optional[int]:
+        return await self.account_dao.get_account_version(account_number)
+
+    async def search_accounts(self, search_term: str) -> List[Account]:
+        if not search_term:
+            logger.warning("Empty search term provided")
+            raise ValueError("Search term cannot be empty")
+        logger.info(f"Searching accounts with term: {search_term}")
+        accounts = await self.account_dao.search_accounts(search_term)
+        logger.info(f"Found {len(accounts)} matching accounts")
+        return accounts
+
+    async def get_bank_statement(self, account_number: int, start_date: str = None, end_date: str = None) -> Dict:
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+        except ValueError as e:
+            logger.error(f"Invalid date format: {str(e)}")
+            raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+        statement = await self.account_dao.get_bank_statement(account_number, start_date_obj, end_date_obj)
+        if statement['account'] is None:
+            raise NotFound(f"Account {account_number} not found")
+        logger.info(f"Generated statement with {len(statement['transactions'])} transactions")
+        return statement
+
+    async def process_deposit(self, *args, **kwargs) -> bool:
+        return await asyncio.to_thread(self.bank_service.process_deposit, *args, **kwargs)
+
+    async def process_withdrawal(self, *args, **kwargs) -> bool:
+        return await asyncio.to_thread(self.bank_service.process_withdrawal, *args, **kwargs)
+
+    async def process_transfer(self, *args, **kwargs) -> bool:
+        return await asyncio.to_thread(self.bank_service.process_transfer, *args, **kwargs)
@@ -1,6 +1,114 @@
-from app.dal.admin_dao import get_admin_by_username
-def authenticate_admin(username, password):
+import argparse
+import hmac
+import json
+import os
+import time
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.dal.admin_dao import get_admin_by_username, record_admin_login, update_admin_password
+from app.logger.app_logging import setup_logging
+from app.services.rate_limiter import SlidingWindowLimiter
+
+logger = setup_logging()
+
+# PBKDF2-SHA256 rounds: each login costs one hash, measured with
+# python -m app.services.auth_service --bench
+PASSWORD_ITERATIONS = int(os.getenv('ADMIN_PASSWORD_ITERATIONS', '260000'))
+PASSWORD_METHOD = f"pbkdf2:sha256:{PASSWORD_ITERATIONS}"
+
+LOGIN_FAILURE_WINDOW = float(os.getenv('LOGIN_FAILURE_WINDOW', '300'))
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv('LOGIN_MAX_FAILURES_PER_USER', '5'))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '20'))
+
+failures_by_username = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_USER, LOGIN_FAILURE_WINDOW)
+failures_by_ip = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_IP, LOGIN_FAILURE_WINDOW)
+
+_dummy_hash = None
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many failed login attempts, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def hash_password(password: str) -> str:
+    return generate_password_hash(password, method=PASSWORD_METHOD, salt_length=16)
+
+
+def verify_password(stored: str, password: str) -> bool:
+    if stored.startswith('pbkdf2:'):
+        return check_password_hash(stored, password)
+    # Seeded plaintext passwords, hashed on the next successful login
+    return hmac.compare_digest(stored.encode(), password.encode())
+
+
+def needs_rehash(stored: str) -> bool:
+    return not stored.startswith(PASSWORD_METHOD + '$')
+
+
+def _burn_hash(password: str) -> None:
+    # Unknown usernames cost the same as wrong passwords, so timing does not
+    # reveal which usernames exist
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('not-a-password')
+    check_password_hash(_dummy_hash, password)
+
+
+def authenticate_admin(username, password, remote_addr=None):
+    """Returns the admin, or None for bad credentials.
+
+    Raises LoginThrottled, before any query or hash, once the username or
+    the client address has too many recent failures.
+    """
+    retry_after = max(failures_by_username.retry_after(username),
+                      failures_by_ip.retry_after(remote_addr) if remote_addr else 0)
+    if retry_after:
+        raise LoginThrottled(retry_after)
+
     admin = get_admin_by_username(username)
-    if admin and admin.password == password:
-        return admin
-    return None
\ No newline at end of file
+    if admin is None or not admin.is_active:
+        _burn_hash(password)
+        valid = False
+    else:
+        valid = verify_password(admin.password, password)
+    if not valid:
+        failures_by_username.hit(username)
+        if remote_addr:
+            failures_by_ip.hit(remote_addr)
+        return None
+
+    failures_by_username.reset(username)
+    try:
+        admin = record_admin_login(admin)
+    except Exception as e:
+        # Not worth refusing a valid login over
+        logger.error(f"Could not record login of admin {username}: {str(e)}")
+    if needs_rehash(admin.password):
+        try:
+            update_admin_password(admin, hash_password(password))
+            logger.info(f"Password of admin {username} rehashed with {PASSWORD_METHOD}")
+        except Exception as e:
+            # The login itself succeeded; the rehash is retried next time
+            logger.error(f"Could not rehash password of admin {username}: {str(e)}")
+    return admin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost of admin password hashing")
+    parser.add_argument('--bench', type=int, nargs='*', default=[PASSWORD_ITERATIONS],
+                        help="PBKDF2 iteration counts to time")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    for iterations in args.bench or [PASSWORD_ITERATIONS]:
+        stored = generate_password_hash('benchmark', method=f"pbkdf2:sha256:{iterations}", salt_length=16)
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            check_password_hash(stored, 'benchmark')
+            timings.append((time.perf_counter() - started) * 1000)
+        report.append({'iterations': iterations, 'best_ms': round(min(timings), 1),
+                       'logins_per_second_per_core': round(1000 / min(timings), 1)})
+    print(json.dumps(report))
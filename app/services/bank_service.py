@@ -1,10 +1,13 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from flask import session
 from werkzeug.exceptions import NotFound, Forbidden, Unauthorized
 from app.models.account import Account
 from app.dal.user_dao import UserDAO
 from app.dal.transaction_dao import TransactionDAO
 from app.dal.account_dao import AccountDAO
+from app.dal.idempotency import idempotency_cache, idempotency_request, IDEMPOTENCY_KEY_MAX_LENGTH
+from app.services.statement_export import EXPORTERS, EXPORT_FORMATS
+from app.services.posting_queue import posting_queue
 from app.logger.app_logging import setup_logging
 from functools import wraps
 from decimal import Decimal
@@ -13,6 +16,15 @@ import decimal
 
 logger = setup_logging()
 
+BULK_OPERATION_TYPES = {
+    'DEPOSIT': 'DEPOSIT',
+    'WITHDRAW': 'WITHDRAW',
+    'WITHDRAWAL': 'WITHDRAW',
+    'TRANSFER': 'TRANSFER'
+}
+BULK_MAX_OPERATIONS = 50000
+BULK_CHUNK_SIZE = 1000
+
 class BankService:
     def __init__(self):
         self.account_dao = AccountDAO()
@@ -48,6 +60,10 @@ class BankService:
             logger.error(f"Error fetching account {account_number}: {str(e)}")
             raise
 
+    def get_account_version(self, account_number: int) -> Optional[int]:
+        """Change counter of the account and its ledger, None if it does not exist"""
+        return self.account_dao.get_account_version(account_number)
+
     def update_account(self, account_number: int, data: Dict[str, Any]) -> Account:
         try:
             logger.info(f"Updating account {account_number}")
@@ -214,7 +230,38 @@ class BankService:
             logger.error(f"Error searching accounts: {str(e)}")
             raise
 
-    def process_deposit(self, account_number: int, amount: float, description: str = None) -> bool:
+    def _check_idempotency_key(self, idempotency_key: Optional[str]) -> Optional[str]:
+        if not idempotency_key:
+            return None
+        idempotency_key = idempotency_key.strip()
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ValueError(f"Idempotency key cannot exceed {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+        return idempotency_key or None
+
+    def _post_once(self, idempotency_key: Optional[str], request: Dict[str, Any], post) -> bool:
+        idempotency_key = self._check_idempotency_key(idempotency_key)
+        if idempotency_key and idempotency_cache.replay(idempotency_key, request):
+            logger.info(f"Replaying {request['operation']} for idempotency key {idempotency_key}")
+            return True
+
+        result = post(idempotency_key)
+        if idempotency_key:
+            idempotency_cache.remember(idempotency_key, request)
+        return result
+
+    def _post(self, operation: str, **kwargs) -> bool:
+        # With POSTING_MODE=group the operation joins the next group commit
+        if posting_queue is not None:
+            return posting_queue.post(operation, **kwargs)
+        return getattr(self.transaction_dao, operation)(**kwargs)
+
+    def get_posting_stats(self) -> Dict[str, Any]:
+        if posting_queue is None:
+            return {'mode': 'direct'}
+        return {'mode': 'group', **posting_queue.stats()}
+
+    def process_deposit(self, account_number: int, amount: float, description: str = None,
+                        idempotency_key: str = None) -> bool:
         try:
             if amount <= 0:
                 raise ValueError("Amount must be positive")
@@ -222,13 +269,19 @@ class BankService:
             amount_decimal = Decimal(str(amount))
             logger.info(f"Processing deposit: Account={account_number}, Amount={amount_decimal}")
             
-            return self.transaction_dao.deposit(account_number, amount_decimal, description)
+            return self._post_once(
+                idempotency_key,
+                idempotency_request('DEPOSIT', account_number, amount_decimal),
+                lambda key: self._post('deposit', account_number=account_number, amount=amount_decimal,
+                                       description=description, idempotency_key=key)
+            )
             
         except Exception as e:
             logger.error(f"Error processing deposit: {str(e)}")
             raise
 
-    def process_withdrawal(self, account_number: int, amount: float, description: str = None) -> bool:
+    def process_withdrawal(self, account_number: int, amount: float, description: str = None,
+                           idempotency_key: str = None) -> bool:
         try:
             if amount <= 0:
                 raise ValueError("Amount must be positive")
@@ -236,13 +289,19 @@ class BankService:
             amount_decimal = Decimal(str(amount))
             logger.info(f"Processing withdrawal: Account={account_number}, Amount={amount_decimal}")
             
-            return self.transaction_dao.withdraw(account_number, amount_decimal, description)
+            return self._post_once(
+                idempotency_key,
+                idempotency_request('WITHDRAW', account_number, amount_decimal),
+                lambda key: self._post('withdraw', account_number=account_number, amount=amount_decimal,
+                                       description=description, idempotency_key=key)
+            )
             
         except Exception as e:
             logger.error(f"Error processing withdrawal: {str(e)}")
             raise
 
-    def process_transfer(self, from_account: int, to_account: int, amount: float, description: str = None) -> bool:
+    def process_transfer(self, from_account: int, to_account: int, amount: float, description: str = None,
+                         idempotency_key: str = None) -> bool:
         try:
             if amount <= 0:
                 raise ValueError("Amount must be positive")
@@ -253,12 +312,107 @@ class BankService:
             amount_decimal = Decimal(str(amount))
             logger.info(f"Processing transfer: From={from_account}, To={to_account}, Amount={amount_decimal}")
             
-            return self.transaction_dao.transfer(from_account, to_account, amount_decimal, description)
+            return self._post_once(
+                idempotency_key,
+                idempotency_request('TRANSFER', from_account, amount_decimal, to_account),
+                lambda key: self._post('transfer', from_account=from_account, to_account=to_account, amount=amount_decimal,
+                                       description=description, idempotency_key=key)
+            )
             
         except Exception as e:
             logger.error(f"Error processing transfer: {str(e)}")
             raise
 
+    def _validate_bulk_operation(self, index: int, raw: Dict[str, Any]) -> Dict[str, Any]:
+        operation_type = BULK_OPERATION_TYPES.get(str(raw.get('type') or '').strip().upper())
+        if not operation_type:
+            raise ValueError(f"Invalid operation type: {raw.get('type')}")
+
+        try:
+            account_id = int(raw.get('account'))
+            amount = Decimal(str(raw.get('amount')).strip())
+        except (ValueError, TypeError, decimal.InvalidOperation):
+            raise ValueError("Invalid account number or amount")
+        if not amount.is_finite() or amount <= 0:
+            raise ValueError("Amount must be positive")
+        if amount != amount.quantize(Decimal('0.01')):
+            raise ValueError("Amount cannot have more than 2 decimal places")
+
+        recipient_account = None
+        if operation_type == 'TRANSFER':
+            try:
+                recipient_account = int(raw.get('to_account'))
+            except (ValueError, TypeError):
+                raise ValueError("Transfer requires a valid to_account")
+            if recipient_account == account_id:
+                raise ValueError("Cannot transfer to same account")
+
+        return {
+            'index': index,
+            'type': operation_type,
+            'account_id': account_id,
+            'amount': amount,
+            'recipient_account': recipient_account,
+            'description': raw.get('description') or None,
+            'idempotency_key': self._check_idempotency_key(raw.get('idempotency_key'))
+        }
+
+    def process_bulk_postings(self, operations: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+        if not isinstance(operations, list) or not operations:
+            raise ValueError("No operations provided")
+        if len(operations) > BULK_MAX_OPERATIONS:
+            raise ValueError(f"Too many operations: maximum is {BULK_MAX_OPERATIONS} per request")
+
+        logger.info(f"Processing bulk posting of {len(operations)} operations")
+        results = []
+        valid = []
+        seen_keys = set()
+        for index, raw in enumerate(operations):
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError("Operation must be an object")
+                operation = self._validate_bulk_operation(index, raw)
+                key = operation['idempotency_key']
+                if key:
+                    if key in seen_keys:
+                        raise ValueError("Duplicate idempotency key in request")
+                    seen_keys.add(key)
+                    request = idempotency_request(operation['type'], operation['account_id'],
+                                                  operation['amount'], operation['recipient_account'])
+                    if idempotency_cache.replay(key, request):
+                        results.append({'index': index, 'status': 'ok', 'replayed': True})
+                        continue
+                valid.append(operation)
+            except ValueError as e:
+                results.append({'index': index, 'status': 'error', 'error': str(e)})
+
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                chunk_results = self.transaction_dao.bulk_post(chunk)
+                results.extend(chunk_results)
+                posted = {result['index'] for result in chunk_results if result['status'] == 'ok'}
+                for op in chunk:
+                    if op['idempotency_key'] and op['index'] in posted:
+                        idempotency_cache.remember(op['idempotency_key'], idempotency_request(
+                            op['type'], op['account_id'], op['amount'], op['recipient_account']))
+            except Exception as e:
+                logger.error(f"Bulk posting chunk starting at operation {chunk[0]['index']} failed: {str(e)}")
+                results.extend({'index': op['index'], 'status': 'error', 'error': "Chunk rolled back"} for op in chunk)
+
+        results.sort(key=lambda result: result['index'])
+        for result in results:
+            if 'new_balance' in result:
+                result['new_balance'] = str(result['new_balance'])
+        succeeded = sum(1 for result in results if result['status'] == 'ok')
+        logger.info(f"Bulk posting finished: {succeeded} posted, {len(results) - succeeded} rejected")
+        return {
+            'total': len(operations),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }
+
     def get_bank_statement(self, account_number: int, start_date: str = None, end_date: str = None) -> Dict:
         try:
             logger.info(f"Generating bank statement for account {account_number}")
@@ -277,3 +431,27 @@ class BankService:
         except Exception as e:
             logger.error(f"Error generating bank statement: {str(e)}")
             raise
+
+
+    def export_bank_statement(self, account_number: int, export_format: str,
+                              start_date: str = None, end_date: str = None) -> Tuple[Iterator, str, str]:
+        if export_format not in EXPORTERS:
+            raise ValueError(f"Unsupported export format: {export_format}. Use one of: {', '.join(EXPORTERS)}")
+
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+        except ValueError as e:
+            logger.error(f"Invalid date format: {str(e)}")
+            raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+        # Resolved before streaming starts so a missing account is still a 404
+        account = self.get_account(account_number)
+        logger.info(f"Exporting bank statement for account {account_number} as {export_format}")
+
+        opening_balance = self.account_dao.get_opening_balance(account_number, start_date_obj)
+        transactions = self.account_dao.iter_bank_statement(account_number, start_date_obj, end_date_obj,
+                                                            opening_balance)
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f"statement_{account_number}.{extension}"
+        return EXPORTERS[export_format](account, transactions, opening_balance), mimetype, filename
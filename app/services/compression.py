@@ -0,0 +1,64 @@
+import gzip
+import os
+from typing import Optional
+from flask import Flask, request
+from app.logger.app_logging import setup_logging
+
+try:
+    import brotli
+except ImportError:
+    # Optional (pip install brotli): without it responses are gzipped only
+    brotli = None
+
+logger = setup_logging()
+
+# Smaller bodies gain less than the headers and CPU they cost
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+# Per-response levels favour speed; precompressed static files use the maximum
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/csv', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml'
+}
+ENCODINGS = ['br', 'gzip'] if brotli else ['gzip']
+
+
+def accepted_encoding() -> Optional[str]:
+    """Best encoding the client accepts, br over gzip, None for identity"""
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    return encoding if encoding in ENCODINGS else None
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else COMPRESS_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9 if best else COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    # The body depends on Accept-Encoding even when this client gets identity
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding()
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding))
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same content, other bytes: only a weak validator still holds
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def register_compression(app: Flask) -> None:
+    app.after_request(compress_response)
+    logger.info(f"Response compression: {', '.join(ENCODINGS)} above {COMPRESS_MIN_SIZE} bytes")
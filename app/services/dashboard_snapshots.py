@@ -0,0 +1,286 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.dal.data_version import get_data_version
+from app.logger.app_logging import setup_logging
+from app.services.analytics_windows import (DEFAULT_WINDOW, ROLLUP_INTERVAL, ROLLUP_SETTLE_TIMEOUT, WINDOW_PRESETS,
+                                            AnalyticsWindow, parse_window)
+from app.services.registry import get_service
+from app.services.render_profiles import RenderProfile
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, every process schedules its own refreshes
+    fcntl = None
+
+logger = setup_logging()
+
+SNAPSHOT_DIR = os.getenv('DASHBOARD_SNAPSHOT_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'snapshots')
+# Presets kept precomputed, comma separated
+SNAPSHOT_WINDOWS = [w for w in os.getenv('DASHBOARD_SNAPSHOT_WINDOWS', DEFAULT_WINDOW).split(',') if w]
+SNAPSHOT_INTERVAL = float(os.getenv('DASHBOARD_SNAPSHOT_INTERVAL', '300'))
+SNAPSHOT_JITTER = float(os.getenv('DASHBOARD_SNAPSHOT_JITTER', '30'))
+SNAPSHOT_KEEP = int(os.getenv('DASHBOARD_SNAPSHOT_KEEP', '5'))
+# 'app' runs the scheduler in the web workers, 'off' leaves it to the
+# app/jobs/dashboard_snapshots.py sidecar
+SNAPSHOT_SCHEDULER = os.getenv('DASHBOARD_SNAPSHOT_SCHEDULER', 'app')
+
+for _preset in SNAPSHOT_WINDOWS:
+    if _preset not in WINDOW_PRESETS:
+        raise ValueError(f"Invalid DASHBOARD_SNAPSHOT_WINDOWS entry: {_preset}")
+
+
+class SnapshotEncoder(json.JSONEncoder):
+    # Tagged so that decoding gives back the exact types the template formats
+    def default(self, value):
+        if isinstance(value, datetime):
+            return {'__datetime__': value.isoformat()}
+        if isinstance(value, date):
+            return {'__date__': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'__decimal__': str(value)}
+        if hasattr(value, 'item'):
+            # numpy scalars
+            return value.item()
+        return super().default(value)
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+        if '__decimal__' in obj:
+            return Decimal(obj['__decimal__'])
+    return obj
+
+
+class DashboardSnapshotService:
+    """Versioned, precomputed dashboards stored as JSON files.
+
+    Each refresh writes <window>-<version>.json next to the previous ones
+    (the version is the build time in milliseconds) and keeps the last
+    SNAPSHOT_KEEP. Files are written to a temporary name and renamed, so a
+    reader in any worker only ever sees complete snapshots.
+    """
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+        self.analytics_service = get_service('analytics')
+        self._cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+
+    def snapshot_key(self, window: AnalyticsWindow, profile: RenderProfile) -> Optional[str]:
+        # Only the default view of a precomputed preset is served from a snapshot
+        if (window.preset in SNAPSHOT_WINDOWS and window.granularity == 'day'
+                and window.account_type is None and profile == RenderProfile()):
+            return window.preset
+        return None
+
+    def _versions(self, key: str) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        prefix = f"{key}-"
+        return sorted(name for name in names if name.startswith(prefix) and name.endswith('.json'))
+
+    def latest(self, key: str) -> Optional[Dict[str, Any]]:
+        versions = self._versions(key)
+        if not versions:
+            return None
+        name = versions[-1]
+        cached = self._cache.get(key)
+        if cached and cached[0] == name:
+            return cached[1]
+        try:
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                snapshot = json.load(f, object_hook=_decode)
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable dashboard snapshot {name}: {str(e)}")
+            return None
+        with self._cache_lock:
+            self._cache[key] = (name, snapshot)
+        return snapshot
+
+    def version(self, window: AnalyticsWindow, profile: RenderProfile) -> Optional[Tuple[str, Optional[datetime]]]:
+        """(version, last modified) of the dashboard for these options, without building it.
+
+        A snapshot only changes with the next refresh; a live build changes
+        with the data and with the daily buckets, which the roll-up job
+        brings up to date on its own schedule. None while the latest change
+        may not be in the buckets yet, since they only take transactions
+        once settled.
+        """
+        key = self.snapshot_key(window, profile)
+        versions = self._versions(key) if key else []
+        if versions:
+            version = int(versions[-1][len(key) + 1:-len('.json')])
+            return f"snapshot-{key}-{version}", datetime.fromtimestamp(version / 1000)
+        data_version, changed_at = get_data_version()
+        if changed_at and (datetime.now() - changed_at).total_seconds() < ROLLUP_SETTLE_TIMEOUT + ROLLUP_INTERVAL:
+            return None
+        buckets_version = self.analytics_service.window_service.buckets_version()
+        return f"data-{data_version}-{buckets_version}", changed_at
+
+    def store(self, key: str, dashboard: Dict[str, Any], built_ms: float) -> Dict[str, Any]:
+        os.makedirs(self.directory, exist_ok=True)
+        now = datetime.now()
+        version = int(now.timestamp() * 1000)
+        snapshot = dict(dashboard, snapshot={
+            'key': key,
+            'version': version,
+            'as_of': now.replace(microsecond=0),
+            'built_ms': round(built_ms, 1),
+            'live': False
+        })
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{key}-", suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, cls=SnapshotEncoder)
+            # mkstemp creates it private; a sidecar may run as another user
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(self.directory, f"{key}-{version:015d}.json"))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        for name in self._versions(key)[:-SNAPSHOT_KEEP]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        return snapshot
+
+    def refresh(self, keys: Iterable[str] = None) -> List[Dict[str, Any]]:
+        # Requests only read the daily buckets; bring them up to date first
+        self.analytics_service.window_service.catch_up()
+        results = []
+        for key in keys or SNAPSHOT_WINDOWS:
+            started = time.perf_counter()
+            dashboard = self.analytics_service.generate_dashboard_data(parse_window({'window': key}), RenderProfile())
+            built_ms = (time.perf_counter() - started) * 1000
+            if 'error' in dashboard:
+                # Keep serving the previous snapshot rather than an empty dashboard
+                logger.error(f"Dashboard snapshot {key} not stored: build failed")
+                continue
+            snapshot = self.store(key, dashboard, built_ms)['snapshot']
+            logger.info(f"Dashboard snapshot {key} v{snapshot['version']} built in {built_ms:.0f}ms")
+            results.append(snapshot)
+        return results
+
+    def _live(self, dashboard: Dict[str, Any], built_ms: float) -> Dict[str, Any]:
+        dashboard['snapshot'] = {'key': None, 'version': None, 'as_of': datetime.now().replace(microsecond=0),
+                                 'built_ms': round(built_ms, 1), 'live': True}
+        return dashboard
+
+    def get_dashboard(self, window: AnalyticsWindow, profile: RenderProfile) -> Dict[str, Any]:
+        key = self.snapshot_key(window, profile)
+        snapshot = self.latest(key) if key else None
+        if snapshot is not None:
+            return snapshot
+        started = time.perf_counter()
+        dashboard = self.analytics_service.generate_dashboard_data(window, profile)
+        built_ms = (time.perf_counter() - started) * 1000
+        if key and 'error' not in dashboard:
+            # First request before any snapshot: this build becomes one
+            return self.store(key, dashboard, built_ms)
+        return self._live(dashboard, built_ms)
+
+    async def get_dashboard_async(self, window: AnalyticsWindow, profile: RenderProfile) -> Dict[str, Any]:
+        key = self.snapshot_key(window, profile)
+        snapshot = self.latest(key) if key else None
+        if snapshot is not None:
+            return snapshot
+        started = time.perf_counter()
+        dashboard = await self.analytics_service.generate_dashboard_data_async(window, profile)
+        built_ms = (time.perf_counter() - started) * 1000
+        if key and 'error' not in dashboard:
+            return self.store(key, dashboard, built_ms)
+        return self._live(dashboard, built_ms)
+
+
+class SnapshotScheduler:
+    """Refreshes the snapshots every interval, give or take the jitter.
+
+    Every web worker may start one; an advisory lock on the snapshot
+    directory makes a single process do the work, and another one takes
+    over if it goes away.
+    """
+
+    def __init__(self, service: DashboardSnapshotService = None, interval: float = SNAPSHOT_INTERVAL,
+                 jitter: float = SNAPSHOT_JITTER):
+        self.service = service or get_service('dashboard_snapshots')
+        self.interval = interval
+        self.jitter = jitter
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._thread = None
+
+    def _is_leader(self) -> bool:
+        if fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(self.service.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.service.directory, '.scheduler.lock'), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Dashboard snapshot scheduler active in process {os.getpid()}")
+        return True
+
+    def next_delay(self) -> float:
+        return max(1.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def run_pending(self) -> List[Dict[str, Any]]:
+        if not self._is_leader():
+            return []
+        try:
+            return self.service.refresh()
+        except Exception as e:
+            logger.error(f"Dashboard snapshot refresh failed: {str(e)}")
+            return []
+
+    def run_forever(self) -> None:
+        # The first pass runs at once so a fresh deployment gets its snapshots
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.next_delay())
+
+    def start(self) -> threading.Thread:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='dashboard-snapshots', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+_scheduler = None
+
+
+def start_scheduler() -> Optional[SnapshotScheduler]:
+    """Starts this process's scheduler unless DASHBOARD_SNAPSHOT_SCHEDULER is off"""
+    global _scheduler
+    if SNAPSHOT_SCHEDULER == 'off':
+        return None
+    if _scheduler is None:
+        _scheduler = SnapshotScheduler()
+    _scheduler.start()
+    return _scheduler
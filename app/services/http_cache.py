@@ -0,0 +1,98 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+from flask import current_app, make_response, request, session
+
+# 'off' renders every page, without ETag or 304
+HTTP_CACHE = os.getenv('HTTP_CACHE', 'on')
+
+_templates_stamp = None
+
+
+def _templates_version() -> str:
+    # Latest template or static file change: pages rendered by a previous
+    # deployment, or linking to its fingerprinted CSS, are not answered with a 304
+    global _templates_stamp
+    if _templates_stamp is None or current_app.jinja_env.auto_reload:
+        mtimes = [0.0]
+        for folder in current_app.jinja_loader.searchpath + [current_app.static_folder]:
+            for root, _, files in os.walk(folder):
+                mtimes.extend(os.path.getmtime(os.path.join(root, name)) for name in files)
+        _templates_stamp = str(max(mtimes))
+    return _templates_stamp
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag of a page from what its content depends on (versions, options).
+
+    The admin is part of it since pages show their name and permissions.
+    """
+    key = '|'.join(str(part) for part in (_templates_version(), session.get('admin_id'),
+                                          session.get('role'), *parts))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Database timestamps are naive local times
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _enabled(etag: Optional[str]) -> bool:
+    return HTTP_CACHE != 'off' and etag is not None and request.method == 'GET'
+
+
+def _is_fresh(etag: str, last_modified: Optional[datetime]) -> bool:
+    # A pending flash message must be rendered, not hidden behind a 304
+    if '_flashes' in session:
+        return False
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+
+def _tag(response, etag: str, last_modified: Optional[datetime]):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Browsers may keep the page but must ask again before reusing it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+
+def _finish(rendered, etag: str, last_modified: Optional[datetime], had_flashes: bool):
+    response = make_response(rendered)
+    # A page that displayed flash messages is not reused later
+    if response.status_code != 200 or (had_flashes and '_flashes' not in session):
+        return response
+    return _tag(response, etag, last_modified)
+
+
+def conditional_response(etag: Optional[str], render: Callable[[], Any], last_modified: datetime = None):
+    """Answers 304 when the client's copy matches etag, else renders.
+
+    etag is None when it could not be computed (e.g. unknown account):
+    the page is then rendered as usual.
+    """
+    if not _enabled(etag):
+        return render()
+    last_modified = _utc(last_modified)
+    if _is_fresh(etag, last_modified):
+        return _tag(current_app.response_class(status=304), etag, last_modified)
+    had_flashes = '_flashes' in session
+    return _finish(render(), etag, last_modified, had_flashes)
+
+
+async def conditional_response_async(etag: Optional[str], render: Callable[[], Awaitable[Any]],
+                                     last_modified: datetime = None):
+    if not _enabled(etag):
+        return await render()
+    last_modified = _utc(last_modified)
+    if _is_fresh(etag, last_modified):
+        return _tag(current_app.response_class(status=304), etag, last_modified)
+    had_flashes = '_flashes' in session
+    return _finish(await render(), etag, last_modified, had_flashes)
@@ -0,0 +1,282 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 7
+
+EMPTY_TRANSACTION_METRICS = {
+    'total_volume': 0,
+    'total_volume_90days': 0,
+    'avg_transaction_size': 0,
+    'max_daily_volume': 0,
+    'transaction_growth': 0
+}
+EMPTY_USER_METRICS = {
+    'total_users': 0,
+    'active_users': 0,
+    'inactive_users': 0,
+    'avg_user_age': 0,
+    'total_unique_jobs': 0
+}
+EMPTY_ACCOUNT_METRICS = {
+    'total_active_accounts': 0,
+    'total_inactive_accounts': 0,
+    'avg_balance_active': 0,
+    'highest_balance_type': 'N/A'
+}
+EMPTY_GROWTH_METRICS = {
+    'avg_monthly_growth': 0,
+    'latest_growth': 0,
+    'active_accounts_trend': 0
+}
+
+
+@dataclass
+class TypeSeries:
+    dates: Any
+    amounts: np.ndarray
+    # Least-squares line over the type's rows, None with fewer than two points
+    trend: Any = None
+
+
+@dataclass
+class MetricsBundle:
+    """Every series derived from the dashboard datasets, computed once.
+
+    The metrics and the charts both read from here instead of regrouping
+    the same frames.
+    """
+    trends: pd.DataFrame
+    demographics: pd.DataFrame
+    account_types: pd.DataFrame
+    monthly_growth: pd.DataFrame
+    by_type: Dict[str, TypeSeries] = field(default_factory=dict)
+    daily_volume: pd.Series = None
+    rolling_volume: pd.Series = None
+    metrics: Dict[str, Dict] = field(default_factory=dict)
+
+
+def _type_series(trends: pd.DataFrame) -> Dict[str, TypeSeries]:
+    # One factorize for all types, then per-type sums with bincount: the
+    # linear fits are closed-form least squares instead of a boolean filter
+    # and a polyfit per type.
+    codes, types = pd.factorize(trends['type'])
+    amounts = trends['total_amount'].to_numpy(dtype=float)
+    counts = np.bincount(codes)
+    order = np.argsort(codes, kind='stable')
+    position = np.empty(len(codes))
+    position[order] = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    n = counts.astype(float)
+    sum_x = np.bincount(codes, position)
+    sum_y = np.bincount(codes, amounts)
+    sum_xx = np.bincount(codes, position * position)
+    sum_xy = np.bincount(codes, position * amounts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x ** 2)
+        intercept = (sum_y - slope * sum_x) / n
+
+    dates = trends['trans_date'].to_numpy()
+    series = {}
+    for code, rows in enumerate(np.split(order, np.cumsum(counts)[:-1])):
+        trend = intercept[code] + slope[code] * position[rows] if len(rows) > 1 else None
+        series[types[code]] = TypeSeries(dates=dates[rows], amounts=amounts[rows], trend=trend)
+    return series
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points stay; every bucket in between keeps the point
+    forming the largest triangle with the point kept before it and the mean
+    of the next bucket, which preserves peaks and troughs.
+    """
+    length = len(y)
+    if threshold <= 0 or length <= threshold or threshold < 3:
+        return np.arange(length)
+    x = np.asarray(x).astype('float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, length - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        mean_x = x[end:next_end].mean() if next_end > end else x[-1]
+        mean_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _transaction_metrics(trends: pd.DataFrame, daily_volume: pd.Series) -> Dict[str, float]:
+    if trends.empty:
+        return dict(EMPTY_TRANSACTION_METRICS)
+    total_volume = float(trends['total_amount'].sum())
+    return {
+        'total_volume': total_volume,
+        'total_volume_90days': total_volume,
+        'avg_transaction_size': float(trends['avg_amount'].mean()),
+        'max_daily_volume': int(daily_volume.max()),
+        'transaction_growth': float(daily_volume.pct_change().mean() * 100)
+    }
+
+
+def _user_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+    if df.empty:
+        return dict(EMPTY_USER_METRICS)
+    return {
+        'total_users': int(df['count'].sum()),
+        'active_users': int(df['active_users'].sum()),
+        'inactive_users': int(df['inactive_users'].sum()),
+        'avg_user_age': float(df['avg_age'].mean()),
+        'total_unique_jobs': int(df['unique_jobs'].sum())
+    }
+
+
+def _account_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+    if df.empty:
+        return dict(EMPTY_ACCOUNT_METRICS)
+    return {
+        'total_active_accounts': int(df['active_accounts'].sum()),
+        'total_inactive_accounts': int(df['inactive_accounts'].sum()),
+        'avg_balance_active': float(df['avg_active_balance'].mean()),
+        'highest_balance_type': df.loc[df['avg_balance'].idxmax(), 'type']
+    }
+
+
+def _growth_metrics(df: pd.DataFrame) -> Dict[str, float]:
+    if df.empty:
+        return dict(EMPTY_GROWTH_METRICS)
+    return {
+        'avg_monthly_growth': float(df['growth_rate'].mean()),
+        'latest_growth': float(df['growth_rate'].iloc[-1]),
+        'active_accounts_trend': float(df['active_accounts'].pct_change().mean() * 100)
+    }
+
+
+def build_metrics_bundle(trends: pd.DataFrame, demographics: pd.DataFrame,
+                         account_types: pd.DataFrame, monthly_growth: pd.DataFrame) -> MetricsBundle:
+    bundle = MetricsBundle(trends=trends, demographics=demographics,
+                           account_types=account_types, monthly_growth=monthly_growth)
+    if not trends.empty:
+        bundle.daily_volume = trends.groupby('trans_date')['transaction_count'].sum()
+        bundle.rolling_volume = bundle.daily_volume.rolling(window=ROLLING_WINDOW, min_periods=1).mean()
+        bundle.by_type = _type_series(trends)
+    bundle.metrics = {
+        'transaction_metrics': _transaction_metrics(trends, bundle.daily_volume),
+        'user_metrics': _user_metrics(demographics),
+        'account_metrics': _account_metrics(account_types),
+        'growth_metrics': _growth_metrics(monthly_growth)
+    }
+    return bundle
+
+
+class DailyBuckets:
+    """Daily transaction buckets on a dense day axis, with prefix sums.
+
+    Counts and totals are kept as running sums per (type, account_type), so
+    the totals of any window are two lookups and a bucketed series costs
+    O(number of buckets), whatever the transaction volume behind them.
+    """
+
+    def __init__(self, buckets: pd.DataFrame):
+        self.empty = buckets.empty
+        if self.empty:
+            return
+        days = buckets['day'].to_numpy().astype('datetime64[D]')
+        self.first_day = days.min()
+        day_count = int((days.max() - self.first_day).astype(int)) + 1
+        keys = pd.MultiIndex.from_frame(buckets[['type', 'account_type']])
+        codes, self.keys = pd.factorize(keys)
+        positions = (days - self.first_day).astype(int)
+
+        # Totals in integer cents: a difference of two large running sums
+        # stays exact, which floats would not guarantee
+        counts = np.zeros((len(self.keys), day_count), dtype='int64')
+        totals = np.zeros((len(self.keys), day_count), dtype='int64')
+        self.mins = np.full((len(self.keys), day_count), np.inf)
+        self.maxs = np.full((len(self.keys), day_count), -np.inf)
+        counts[codes, positions] = buckets['transaction_count'].to_numpy()
+        totals[codes, positions] = np.rint(buckets['total_amount'].to_numpy() * 100).astype('int64')
+        self.mins[codes, positions] = buckets['min_amount'].to_numpy()
+        self.maxs[codes, positions] = buckets['max_amount'].to_numpy()
+        zeros = np.zeros((len(self.keys), 1), dtype='int64')
+        self.cum_counts = np.hstack([zeros, np.cumsum(counts, axis=1)])
+        self.cum_totals = np.hstack([zeros, np.cumsum(totals, axis=1)])
+
+    def _range(self, window) -> Tuple[int, int]:
+        day_count = self.cum_counts.shape[1] - 1
+        start = int((np.datetime64(window.start, 'D') - self.first_day).astype(int))
+        end = int((np.datetime64(window.end, 'D') - self.first_day).astype(int))
+        return min(max(start, 0), day_count), min(max(end, 0), day_count)
+
+    def _by_type(self, window):
+        # Rows of the account type asked for, merged per transaction type;
+        # running sums stay running sums when added together
+        types = {}
+        for row, (trans_type, account_type) in enumerate(self.keys):
+            if window.account_type is None or account_type == window.account_type:
+                types.setdefault(trans_type, []).append(row)
+        return types
+
+    def _boundaries(self, window, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """First day of each bucket and its label, the period start like DATE_TRUNC"""
+        days = self.first_day + np.arange(start, end)
+        if window.granularity == 'week':
+            # Weeks start on Monday; day 0 of datetime64 was a Thursday
+            periods = days - (days.astype('int64') + 3) % 7
+        elif window.granularity == 'month':
+            periods = days.astype('datetime64[M]').astype('datetime64[D]')
+        else:
+            return np.arange(start, end), days
+        firsts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        return start + firsts, periods[firsts]
+
+    def totals(self, window) -> Dict[str, Dict[str, float]]:
+        if self.empty:
+            return {}
+        start, end = self._range(window)
+        result = {}
+        for trans_type, rows in self._by_type(window).items():
+            count = int(self.cum_counts[rows, end].sum() - self.cum_counts[rows, start].sum())
+            if count:
+                total = int(self.cum_totals[rows, end].sum() - self.cum_totals[rows, start].sum()) / 100
+                result[trans_type] = {'transaction_count': count, 'total_amount': total,
+                                      'avg_amount': total / count}
+        return result
+
+    def trends(self, window) -> pd.DataFrame:
+        """Per bucket and type, in the shape of AnalyticsDAO.get_transaction_trends."""
+        columns = ['trans_date', 'type', 'transaction_count', 'total_amount',
+                   'avg_amount', 'min_amount', 'max_amount']
+        if self.empty:
+            return pd.DataFrame(columns=columns)
+        start, end = self._range(window)
+        if start >= end:
+            return pd.DataFrame(columns=columns)
+
+        bounds, labels = self._boundaries(window, start, end)
+        edges = np.r_[bounds, end]
+        frames = []
+        for trans_type, rows in sorted(self._by_type(window).items()):
+            counts = np.diff(self.cum_counts[rows][:, edges].sum(axis=0))
+            totals = np.diff(self.cum_totals[rows][:, edges].sum(axis=0)) / 100
+            mins = np.minimum.reduceat(self.mins[rows, start:end].min(axis=0), bounds - start)
+            maxs = np.maximum.reduceat(self.maxs[rows, start:end].max(axis=0), bounds - start)
+            present = counts > 0
+            frames.append(pd.DataFrame({
+                'trans_date': labels[present].astype('datetime64[ns]'),
+                'type': trans_type,
+                'transaction_count': counts[present],
+                'total_amount': totals[present],
+                'avg_amount': totals[present] / counts[present],
+                'min_amount': mins[present],
+                'max_amount': maxs[present]
+            }))
+        trends = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        return trends.sort_values(['trans_date', 'type'], kind='stable', ignore_index=True)
@@ -0,0 +1,172 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, List
+from psycopg2.errors import DeadlockDetected
+from app.dal.transaction_dao import TransactionDAO
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+POSTING_MODE = os.getenv('POSTING_MODE', 'direct')
+POSTING_BATCH_SIZE = int(os.getenv('POSTING_BATCH_SIZE', '64'))
+POSTING_MAX_WAIT_MS = float(os.getenv('POSTING_MAX_WAIT_MS', '5'))
+POSTING_TIMEOUT = float(os.getenv('POSTING_TIMEOUT', '30'))
+POSTING_DEADLOCK_RETRIES = int(os.getenv('POSTING_DEADLOCK_RETRIES', '2'))
+
+FILL_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class PostingTimeout(ValueError):
+    """The operation waited too long and was withdrawn: nothing was posted."""
+
+
+class PostingPending(Exception):
+    """The operation is being committed but its outcome is not known yet."""
+
+    def __init__(self, operation: str, idempotency_key: str = None):
+        reference = f" (idempotency key {idempotency_key})" if idempotency_key else ""
+        super().__init__(f"The {operation}{reference} is still being posted: "
+                         f"check the account before entering it again")
+        self.operation = operation
+        self.idempotency_key = idempotency_key
+
+
+class PostingQueue:
+    """Group commit for deposits, withdrawals and transfers.
+
+    Callers enqueue an operation and wait on its future. A single worker
+    thread per process drains the queue, collecting whatever arrives within
+    the latency budget (or until the batch is full) and posting it as one
+    database transaction. Operations are applied in arrival order, so
+    postings to the same account keep their order.
+
+    A caller that stops waiting withdraws its operation if the batch has not
+    picked it up yet; otherwise it gets PostingPending, never a failure for
+    an operation that may still commit.
+    """
+
+    def __init__(self, transaction_dao: TransactionDAO = None, max_batch_size: int = POSTING_BATCH_SIZE,
+                 max_wait_ms: float = POSTING_MAX_WAIT_MS):
+        self.transaction_dao = transaction_dao or TransactionDAO()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self._stats = {
+            'batches': 0,
+            'operations': 0,
+            'failed_operations': 0,
+            'failed_batches': 0,
+            'fill_histogram': {bucket: 0 for bucket in FILL_BUCKETS},
+            'last_batch_ms': 0.0
+        }
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork, so a forked worker process starts its own
+        if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name='posting-queue', daemon=True)
+                self._worker.start()
+
+    def submit(self, operation: str, **kwargs) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((operation, kwargs, future))
+        return future
+
+    def post(self, operation: str, **kwargs) -> Any:
+        future = self.submit(operation, **kwargs)
+        try:
+            return future.result(timeout=POSTING_TIMEOUT)
+        except FutureTimeout:
+            if future.cancel():
+                raise PostingTimeout(f"The {operation} was not posted, the server is busy: try again")
+        # Already in a batch: its commit decides, wait for it a little longer
+        try:
+            return future.result(timeout=POSTING_TIMEOUT)
+        except FutureTimeout:
+            raise PostingPending(operation, kwargs.get('idempotency_key'))
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _post_batch(self, batch: list, retries: int = POSTING_DEADLOCK_RETRIES) -> List[Any]:
+        try:
+            return self.transaction_dao.post_batch([(operation, kwargs) for operation, kwargs, _ in batch])
+        except DeadlockDetected as e:
+            # Rolled back as a whole: posting it again is safe
+            if retries:
+                logger.warning(f"Posting batch of {len(batch)} operations deadlocked, retrying")
+                return self._post_batch(batch, retries - 1)
+            error = e
+        except Exception as e:
+            error = e
+        # The commit itself failed: nothing in the batch was posted. Halves
+        # are retried so one bad operation does not fail all the others.
+        self._stats['failed_batches'] += 1
+        if len(batch) == 1:
+            logger.error(f"Posting {batch[0][0]} failed: {str(error)}")
+            return [error]
+        logger.error(f"Posting batch of {len(batch)} operations failed, splitting it: {str(error)}")
+        middle = len(batch) // 2
+        return self._post_batch(batch[:middle]) + self._post_batch(batch[middle:])
+
+    def _run(self) -> None:
+        while True:
+            # Operations their caller withdrew are dropped; the others can
+            # no longer be withdrawn
+            batch = [item for item in self._collect() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            outcomes = self._post_batch(batch)
+
+            for (_, _, future), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    self._stats['failed_operations'] += 1
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            self._record(len(batch), time.monotonic() - started)
+
+    def _record(self, size: int, elapsed: float) -> None:
+        self._stats['batches'] += 1
+        self._stats['operations'] += size
+        self._stats['last_batch_ms'] = elapsed * 1000
+        bucket = next((bucket for bucket in FILL_BUCKETS if size <= bucket), FILL_BUCKETS[-1])
+        self._stats['fill_histogram'][bucket] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats['batches']
+        avg_batch_size = self._stats['operations'] / batches if batches else 0
+        return {
+            **self._stats,
+            'fill_histogram': dict(self._stats['fill_histogram']),
+            'avg_batch_size': avg_batch_size,
+            'avg_batch_fill': avg_batch_size / self.max_batch_size,
+            'queue_depth': self._queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+
+posting_queue = PostingQueue() if POSTING_MODE == 'group' else None
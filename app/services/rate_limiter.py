@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SlidingWindowLimiter:
+    """Allows at most `limit` hits per key over the last `window_seconds`.
+
+    Each key keeps the times of its hits within the window, so a burst is
+    forgotten exactly window_seconds later instead of at a fixed boundary.
+    Keys are kept in an LRU bounded by max_keys.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now: float):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - self.window_seconds:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+            return None
+        return hits
+
+    def retry_after(self, key) -> float:
+        """Seconds before the key may try again, 0 when it is under the limit"""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._prune(key, now)
+            if hits is None or len(hits) < self.limit:
+                return 0
+            return hits[-self.limit] + self.window_seconds - now
+
+    def hit(self, key) -> None:
+        now = time.monotonic()
+        with self._lock:
+            hits = self._prune(key, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            hits.append(now)
+            self._hits.move_to_end(key)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+    def reset(self, key) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
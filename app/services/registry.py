@@ -0,0 +1,104 @@
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Iterable
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+# Services are built on first use rather than when the controllers are
+# imported, so a worker can answer /login before the analytics stack loads.
+SERVICES = {
+    'bank': ('app.services.bank_service', 'BankService'),
+    'async_bank': ('app.services.async_bank_service', 'AsyncBankService'),
+    'analytics': ('app.services.analytics_service', 'AnalyticsService'),
+    'dashboard_snapshots': ('app.services.dashboard_snapshots', 'DashboardSnapshotService'),
+}
+
+# Modules that must not be loaded by importing the app
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'psycopg')
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '400'))
+
+_instances: Dict[str, Any] = {}
+# Reentrant: a service may get_service() its dependencies while being built
+_lock = threading.RLock()
+
+
+def get_service(name: str) -> Any:
+    service = _instances.get(name)
+    if service is None:
+        with _lock:
+            service = _instances.get(name)
+            if service is None:
+                module_name, class_name = SERVICES[name]
+                service = getattr(importlib.import_module(module_name), class_name)()
+                _instances[name] = service
+                logger.info(f"Service {name} initialized")
+    return service
+
+
+class LazyService:
+    """Module-level stand-in for a service, resolved on first attribute access"""
+
+    def __init__(self, name: str):
+        if name not in SERVICES:
+            raise KeyError(f"Unknown service: {name}")
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(get_service(self._name), attr)
+
+
+def warm_up(names: Iterable[str] = None, background: bool = True):
+    """Builds the services (and the dashboard's plotting stack) ahead of traffic"""
+    def run():
+        for name in names or SERVICES:
+            try:
+                service = get_service(name)
+                if hasattr(service, 'warm_up'):
+                    service.warm_up()
+            except Exception as e:
+                logger.error(f"Warm-up of service {name} failed: {str(e)}")
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name='service-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def measure_import(module: str = 'main') -> Dict[str, Any]:
+    # Measured in a fresh interpreter so nothing is already cached in sys.modules
+    probe = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = (time.perf_counter() - started) * 1000\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'ms': round(elapsed, 1), 'heavy_modules': heavy}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', probe], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the app's import time against a budget")
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=3, help="The best of these runs is compared with the budget")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    best = min(run['ms'] for run in runs)
+    heavy = sorted({m for run in runs for m in run['heavy_modules']})
+    report = {'module': args.module, 'best_ms': best, 'runs_ms': [run['ms'] for run in runs],
+              'budget_ms': args.budget_ms, 'heavy_modules': heavy}
+    print(json.dumps(report))
+    if best > args.budget_ms or heavy:
+        sys.exit(1)
@@ -0,0 +1,71 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+RENDER_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml', 'webp': 'image/webp'}
+DEFAULT_FORMAT = os.getenv('CHART_FORMAT', 'png')
+# 300dpi made the PNG encode the most expensive part of the dashboard;
+# 100dpi matches the size the charts are displayed at
+DEFAULT_DPI = int(os.getenv('CHART_DPI', '100'))
+DPI_RANGE = (50, 300)
+WIDTH_RANGE = (320, 4000)
+# Line series longer than this are downsampled (LTTB) before plotting; 0 disables
+DEFAULT_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '500'))
+WEBP_QUALITY = int(os.getenv('CHART_WEBP_QUALITY', '90'))
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    format: str = DEFAULT_FORMAT
+    dpi: int = DEFAULT_DPI
+    # Target width in pixels, None keeps each chart's own size
+    width: Optional[int] = None
+    max_points: int = DEFAULT_MAX_POINTS
+
+    @property
+    def mime_type(self) -> str:
+        return RENDER_FORMATS[self.format]
+
+    def figure_size(self, size: Tuple[float, float]) -> Tuple[float, float]:
+        if self.width is None:
+            return size
+        width = self.width / self.dpi
+        return width, width * size[1] / size[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'format': self.format,
+            'dpi': self.dpi,
+            'width': self.width,
+            'max_points': self.max_points,
+            'mime_type': self.mime_type
+        }
+
+
+def _int_arg(args: Mapping, name: str, bounds: Tuple[int, int] = None) -> Optional[int]:
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+    if bounds and not bounds[0] <= value <= bounds[1]:
+        raise ValueError(f"{name} must be between {bounds[0]} and {bounds[1]}")
+    return value
+
+
+def parse_render_profile(args: Mapping) -> RenderProfile:
+    """Builds a profile from query parameters: format=png|svg|webp, dpi, width
+    (pixels) and points (maximum points per line series, 0 for all)."""
+    chart_format = args.get('format') or DEFAULT_FORMAT
+    if chart_format not in RENDER_FORMATS:
+        raise ValueError(f"Invalid format: {chart_format}. Use one of {', '.join(RENDER_FORMATS)}")
+    dpi = _int_arg(args, 'dpi', DPI_RANGE) or DEFAULT_DPI
+    width = _int_arg(args, 'width', WIDTH_RANGE)
+    max_points = _int_arg(args, 'points')
+    if max_points is None:
+        max_points = DEFAULT_MAX_POINTS
+    elif max_points and max_points < 3:
+        raise ValueError("points must be 0 or at least 3")
+    return RenderProfile(chart_format, dpi, width, max_points)
@@ -0,0 +1,200 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from app.logger.app_logging import setup_logging
+
+logger = setup_logging()
+
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', '10000'))
+SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sessions', 'sessions.db')
+
+
+class MemorySessionStore:
+    """Sessions of this process only, in an LRU bounded by max_entries.
+
+    Enough for a single worker; sessions are lost on restart and not seen
+    by other processes.
+    """
+
+    def __init__(self, max_entries: int = SESSION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return dict(data)
+
+    def save(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        with self._lock:
+            self._entries[sid] = (dict(data), expires_at)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revoke(self, sid: str) -> None:
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def revoke_admin(self, admin_id: int) -> int:
+        with self._lock:
+            sids = [sid for sid, (data, _) in self._entries.items() if data.get('admin_id') == admin_id]
+            for sid in sids:
+                del self._entries[sid]
+        return len(sids)
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file, shared by every worker on the host.
+
+    Lookups are local reads (WAL mode, one connection per thread), so an
+    authenticated request still costs no round trip to PostgreSQL.
+    """
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    admin_id INTEGER,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_admin ON sessions(admin_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        conn = self._connection()
+        conn.execute("""
+            INSERT INTO sessions (sid, admin_id, data, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (sid) DO UPDATE SET admin_id = excluded.admin_id, data = excluded.data,
+                expires_at = excluded.expires_at""",
+            (sid, data.get('admin_id'), json.dumps(data), expires_at))
+        # Expired rows are cleared now and then rather than by a separate job
+        if secrets.randbelow(100) == 0:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def revoke(self, sid: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def revoke_admin(self, admin_id: int) -> int:
+        return self._connection().execute("DELETE FROM sessions WHERE admin_id = ?", (admin_id,)).rowcount
+
+
+SESSION_STORES = {
+    'memory': MemorySessionStore,
+    'sqlite': SQLiteSessionStore
+}
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid: str = None, expires_at: float = None):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.modified = False
+        self.rotate = False
+
+    def regenerate(self) -> None:
+        """Gives the session a new id when it is saved, e.g. after login"""
+        self.rotate = True
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a store; the cookie only carries a random id.
+
+    Revoking a session in the store logs it out everywhere, and nothing
+    depends on the workers sharing a secret key.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _lifetime(self, app) -> float:
+        return app.permanent_session_lifetime.total_seconds()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(app.config['SESSION_COOKIE_NAME'])
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                session = ServerSession(data, sid=sid, expires_at=data.pop('_expires_at', None))
+                return session
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        cookie_name = app.config['SESSION_COOKIE_NAME']
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.sid:
+                self.store.revoke(session.sid)
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        lifetime = self._lifetime(app)
+        now = time.time()
+        # Sliding expiry, written back once half the lifetime has gone by
+        # rather than on every request
+        refresh = session.expires_at is None or session.expires_at - now < lifetime / 2
+        if not (session.modified or refresh):
+            return
+        if session.rotate or session.sid is None:
+            if session.sid:
+                self.store.revoke(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+        session.expires_at = now + lifetime
+        self.store.save(session.sid, dict(session, _expires_at=session.expires_at), session.expires_at)
+        response.set_cookie(
+            cookie_name, session.sid,
+            max_age=int(lifetime),
+            domain=domain, path=path,
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def create_session_store(name: str):
+    if name not in SESSION_STORES:
+        raise ValueError(f"Unknown session store: {name}")
+    logger.info(f"Using the {name} session store")
+    return SESSION_STORES[name]()
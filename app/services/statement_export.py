@@ -0,0 +1,213 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Any
+from app.models.account import Account
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'pdf': ('application/pdf', 'pdf'),
+}
+
+EXPORT_COLUMNS = ['date', 'id', 'type', 'description', 'recipient_account',
+                  'amount', 'transaction_amount', 'running_balance']
+
+# Chunks are flushed once they reach this size so the response is written in
+# a few large writes instead of one per row.
+FLUSH_SIZE = 64 * 1024
+PDF_LINES_PER_PAGE = 60
+
+
+class StatementTotals:
+    # opening_balance is the balance when the period began; the transactions'
+    # running_balance carries on from it
+    def __init__(self, opening_balance: Decimal = Decimal('0.00')):
+        self.count = 0
+        self.total_deposits = Decimal('0.00')
+        self.total_withdrawals = Decimal('0.00')
+        self.opening_balance = opening_balance
+        self.running_balance = opening_balance
+
+    def add(self, transaction: Dict[str, Any]) -> None:
+        self.count += 1
+        amount = transaction['transaction_amount']
+        if amount > 0:
+            self.total_deposits += amount
+        else:
+            self.total_withdrawals += abs(amount)
+        self.running_balance = transaction['running_balance']
+
+    def summary(self, account: Account) -> Dict[str, Any]:
+        return {
+            'account_number': account.account_number,
+            'transactions': self.count,
+            'opening_balance': self.opening_balance,
+            'closing_balance': self.running_balance,
+            'total_deposits': self.total_deposits,
+            'total_withdrawals': self.total_withdrawals
+        }
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def export_csv(account: Account, transactions: Iterable[Dict],
+               opening_balance: Decimal = Decimal('0.00')) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    totals = StatementTotals(opening_balance)
+    for transaction in transactions:
+        totals.add(transaction)
+        writer.writerow([transaction[column] for column in EXPORT_COLUMNS])
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    summary = totals.summary(account)
+    writer.writerow([])
+    for key, value in summary.items():
+        writer.writerow([key, value])
+    yield buffer.getvalue()
+
+
+def export_jsonl(account: Account, transactions: Iterable[Dict],
+                 opening_balance: Decimal = Decimal('0.00')) -> Iterator[str]:
+    yield json.dumps({
+        'record': 'account',
+        'account_number': account.account_number,
+        'holder_name': account.holder_name,
+        'account_type': account.account_type
+    }) + '\n'
+
+    totals = StatementTotals(opening_balance)
+    lines = []
+    size = 0
+    for transaction in transactions:
+        totals.add(transaction)
+        line = json.dumps({'record': 'transaction', **transaction}, default=_json_default) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            yield ''.join(lines)
+            lines = []
+            size = 0
+
+    lines.append(json.dumps({'record': 'summary', **totals.summary(account)}, default=_json_default) + '\n')
+    yield ''.join(lines)
+
+
+def _pdf_escape(text: str) -> bytes:
+    text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('latin-1', errors='replace')
+
+
+class _PdfWriter:
+    """Minimal PDF writer that emits each page as soon as it is full.
+
+    Only the object offsets and page references are kept in memory, so the
+    size of the statement does not affect memory usage.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4  # 1 = catalog, 2 = page tree, 3 = font
+
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def _object(self, obj_id: int, body: bytes) -> bytes:
+        self.offsets[obj_id] = self.offset
+        return self._emit(b'%d 0 obj\n' % obj_id + body + b'\nendobj\n')
+
+    def header(self) -> bytes:
+        return (self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+                + self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>'))
+
+    def page(self, lines: Iterable[str]) -> bytes:
+        content = [b'BT /F1 8 Tf 10 TL 30 810 Td']
+        for line in lines:
+            content.append(b'(' + _pdf_escape(line) + b") '")
+        content.append(b'ET')
+        stream = b'\n'.join(content)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self.page_ids.append(page_id)
+        return (self._object(content_id, b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+                + self._object(page_id, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                                        b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id))
+
+    def trailer(self) -> bytes:
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        data = self._object(2, b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(self.page_ids))
+        data += self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        xref_offset = self.offset
+        xref = [b'xref\n0 %d\n' % self.next_id, b'0000000000 65535 f \n']
+        for obj_id in range(1, self.next_id):
+            xref.append(b'%010d 00000 n \n' % self.offsets[obj_id])
+        xref.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (self.next_id, xref_offset))
+        return data + self._emit(b''.join(xref))
+
+
+def export_pdf(account: Account, transactions: Iterable[Dict],
+               opening_balance: Decimal = Decimal('0.00')) -> Iterator[bytes]:
+    writer = _PdfWriter()
+    yield writer.header()
+
+    title = [
+        f"Releve Bancaire - Compte #{account.account_number}",
+        f"Titulaire: {account.holder_name or ''}    Type: {account.account_type}",
+        '',
+        f"{'Date':<17}{'Type':<10}{'Description':<40}{'Montant':>14}{'Solde':>16}",
+    ]
+    lines = list(title)
+    totals = StatementTotals(opening_balance)
+    for transaction in transactions:
+        totals.add(transaction)
+        description = (transaction['description'] or transaction['type'])[:38]
+        lines.append(
+            f"{transaction['date'].strftime('%Y-%m-%d %H:%M'):<17}"
+            f"{transaction['type']:<10}"
+            f"{description:<40}"
+            f"{transaction['transaction_amount']:>14.2f}"
+            f"{transaction['running_balance']:>16.2f}"
+        )
+        if len(lines) >= PDF_LINES_PER_PAGE:
+            yield writer.page(lines)
+            lines = []
+
+    summary = totals.summary(account)
+    lines.extend([
+        '',
+        f"Solde d'Ouverture: MAD{summary['opening_balance']:.2f}",
+        f"Total des Depots: MAD{summary['total_deposits']:.2f}",
+        f"Total des Retraits: MAD{summary['total_withdrawals']:.2f}",
+        f"Solde: MAD{summary['closing_balance']:.2f}",
+    ])
+    yield writer.page(lines)
+    yield writer.trailer()
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'jsonl': export_jsonl,
+    'pdf': export_pdf,
+}
@@ -0,0 +1,184 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, send_file, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+from app.logger.app_logging import setup_logging
+from app.services.compression import COMPRESS_MIN_SIZE, ENCODINGS, accepted_encoding, compress
+
+logger = setup_logging()
+
+# Built bundles and precompressed copies, named after their content digest
+STATIC_CACHE_DIR = os.getenv('STATIC_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static_cache')
+# Fingerprinted URLs change with the content, so they never need revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DIGEST_LENGTH = 12
+
+# css/list.css, css/list.<digest>.css, or a bundle: css/list+common.<digest>.css
+ASSET_NAME = re.compile(r'^(?P<names>[^/]+?)(?:\.(?P<digest>[0-9a-f]{%d}))?(?P<ext>\.\w+)$' % DIGEST_LENGTH)
+
+
+class StaticAssets:
+    """Fingerprinted and bundled static files, served precompressed.
+
+    url_for('static', filename='css/view.css') links to css/view.<digest>.css,
+    and 'css/view+common.css' to one file joining both. Each variant (plain,
+    gzip, br) is written once to STATIC_CACHE_DIR and sent from there.
+    """
+
+    def __init__(self, static_folder: str, cache_dir: str = STATIC_CACHE_DIR):
+        self.static_folder = static_folder
+        self.cache_dir = cache_dir
+        self._digests: Dict[Tuple[str, ...], Tuple[Tuple[float, ...], str]] = {}
+
+    def _parse(self, filename: str):
+        # (directory, match, source paths) or None when a source is missing
+        directory, name = os.path.split(filename)
+        match = ASSET_NAME.match(name)
+        if not match:
+            return None
+        sources = []
+        for part in match.group('names').split('+'):
+            path = safe_join(self.static_folder, directory, part + match.group('ext'))
+            if path is None or not os.path.isfile(path):
+                return None
+            sources.append(path)
+        return directory, match, sources
+
+    def resolve(self, filename: str) -> Optional[Tuple[List[str], Optional[str]]]:
+        """(source paths, digest in the name) of an asset URL, None if it is not one"""
+        parsed = self._parse(filename)
+        if parsed is None:
+            return None
+        _, match, sources = parsed
+        if len(sources) == 1 and not match.group('digest'):
+            # A plain file name: left to Flask's static view
+            return None
+        return sources, match.group('digest')
+
+    def digest(self, sources: List[str]) -> str:
+        # Recomputed only when a source file changed
+        key = tuple(sources)
+        mtimes = tuple(os.path.getmtime(path) for path in sources)
+        cached = self._digests.get(key)
+        if cached and cached[0] == mtimes:
+            return cached[1]
+        sha = hashlib.sha256()
+        for path in sources:
+            with open(path, 'rb') as f:
+                sha.update(f.read())
+        digest = sha.hexdigest()[:DIGEST_LENGTH]
+        self._digests[key] = (mtimes, digest)
+        return digest
+
+    def fingerprint(self, filename: str) -> str:
+        """css/list+common.css -> css/list+common.<digest>.css; unknown files are left as they are"""
+        parsed = self._parse(filename)
+        if parsed is None or parsed[1].group('digest'):
+            return filename
+        directory, match, sources = parsed
+        return f"{directory + '/' if directory else ''}{match.group('names')}.{self.digest(sources)}{match.group('ext')}"
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.asset-', suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def variant(self, sources: List[str], digest: str, ext: str, encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+        """Path of the file to send and its Content-Encoding, built on first use.
+
+        Files under COMPRESS_MIN_SIZE are always sent as they are.
+        """
+        names = '+'.join(os.path.splitext(os.path.basename(path))[0] for path in sources)
+        plain = os.path.join(self.cache_dir, f"{names}.{digest}{ext}")
+        if not os.path.exists(plain):
+            self._write(plain, b''.join(self._read(path) for path in sources))
+        if encoding is None or os.path.getsize(plain) < COMPRESS_MIN_SIZE:
+            return plain, None
+        encoded = f"{plain}.{'br' if encoding == 'br' else 'gz'}"
+        if not os.path.exists(encoded):
+            with open(plain, 'rb') as f:
+                self._write(encoded, compress(f.read(), encoding, best=True))
+        return encoded, encoding
+
+    def _read(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Files of a bundle stay separated by a newline
+        return data if data.endswith(b'\n') else data + b'\n'
+
+    def precompress(self) -> int:
+        """Builds every variant of the files under the static folder; returns the count"""
+        built = 0
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                ext = os.path.splitext(name)[1]
+                for encoding in [None] + ENCODINGS:
+                    self.variant([path], self.digest([path]), ext, encoding)
+                    built += 1
+        logger.info(f"Static assets: {built} variants ready in {self.cache_dir}")
+        return built
+
+
+def register_static_assets(app: Flask) -> StaticAssets:
+    """Fingerprints url_for('static', ...) links and serves them with a year of caching."""
+    assets = StaticAssets(app.static_folder)
+    send_static_file = app.view_functions['static']
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = assets.fingerprint(values['filename'])
+
+    def static(filename):
+        asset = assets.resolve(filename)
+        if asset is None:
+            return send_static_file(filename=filename)
+        sources, requested = asset
+        digest = assets.digest(sources)
+        ext = os.path.splitext(filename)[1]
+        path, encoding = assets.variant(sources, digest, ext, accepted_encoding())
+        # A name from an older deployment still gets the current content,
+        # but is not cached as if it were that version
+        immutable = requested == digest
+        try:
+            response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], conditional=True,
+                                 max_age=IMMUTABLE_MAX_AGE if immutable else app.get_send_file_max_age(filename))
+        except FileNotFoundError:
+            raise NotFound()
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+        if immutable:
+            response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+    app.jinja_env.globals['static_bundle'] = static_bundle
+    app.extensions['static_assets'] = assets
+    return assets
+
+
+def static_bundle(*filenames: str) -> str:
+    """URL of one file joining the given static files, in that order (templates)"""
+    directories = {os.path.dirname(name) for name in filenames}
+    extensions = {os.path.splitext(name)[1] for name in filenames}
+    if len(directories) != 1 or len(extensions) != 1:
+        raise ValueError("Bundled files must share a directory and an extension")
+    directory, ext = directories.pop(), extensions.pop()
+    names = '+'.join(os.path.splitext(os.path.basename(name))[0] for name in filenames)
+    return url_for('static', filename=f"{directory + '/' if directory else ''}{names}{ext}")
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+# Production serving profile: gunicorn -c gunicorn.conf.py main:app
+os.environ.setdefault('APP_ENV', 'production')
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+# Each worker holds up to DB_POOL_MAX + DB_STREAM_POOL_MAX connections; keep
+# workers * (DB_POOL_MAX + DB_STREAM_POOL_MAX) under the server's max_connections
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+# The app is imported and warmed up once in the master, then forked
+preload_app = True
+accesslog = '-'
+
+def when_ready(server):
+    from app import warm_up_app
+    warm_up_app(server.app.wsgi(), connections=False)
+
+def post_fork(server, worker):
+    # Connections must not be shared with the master or other workers
+    from app.dal.database import connection_pool, stream_pool
+    connection_pool.reset()
+    stream_pool.reset()
+
+def post_worker_init(worker):
+    from app.dal.database import connection_pool
+    from app.services.dashboard_snapshots import start_scheduler
+    connection_pool.warm_up()
+    # Only one worker at a time holds the scheduler lock and does the work
+    start_scheduler()